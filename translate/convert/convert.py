@@ -20,15 +20,35 @@
 :mod:`translate.convert` tools).
 """
 
+import hashlib
+import json
 import os.path
 from io import BytesIO
 
+from translate import __version__
 from translate.misc import optrecurse
 
 
 # Don't import optparse ourselves, get the version from optrecurse.
 optparse = optrecurse.optparse
 
+#: The name of the file recording converted files in the output directory
+MANIFEST_NAME = ".translate-manifest"
+
+#: The options that don't influence the contents of the converted files
+UNDIGESTED_OPTIONS = {
+    "errorlevel",
+    "exclude",
+    "input",
+    "jobs",
+    "manpage",
+    "output",
+    "progress",
+    "skipunchanged",
+    "template",
+    "timestamp",
+}
+
 
 class ConvertOptionParser(optrecurse.RecursiveOptionParser):
     """A specialized Option Parser for convertor tools..."""
@@ -49,7 +69,13 @@ class ConvertOptionParser(optrecurse.RecursiveOptionParser):
             description=description,
         )
         self.usepots = usepots
+        self.manifest = None
+        self.manifestentry = None
+        # the options naming files whose contents influence the output, like
+        # a translation memory
+        self.digestfiles = []
         self.settimestampoption()
+        self.setskipunchangedoption()
         self.setpotoption()
         self.set_usage()
 
@@ -209,6 +235,19 @@ class ConvertOptionParser(optrecurse.RecursiveOptionParser):
         )
         self.define_option(timestampopt)
 
+    def setskipunchangedoption(self):
+        """Sets ``--skipunchanged`` option."""
+        skipunchangedopt = optparse.Option(
+            "",
+            "--skipunchanged",
+            action="store_true",
+            dest="skipunchanged",
+            default=False,
+            help="skip conversion if the input, template and options are "
+            "unchanged since the last run",
+        )
+        self.define_option(skipunchangedopt)
+
     def verifyoptions(self, options):
         """Verifies that the options are valid (required options are present,
         etc).
@@ -226,12 +265,119 @@ class ConvertOptionParser(optrecurse.RecursiveOptionParser):
             self.error(str(e))
         self.recursiveprocess(options)
 
+    def recursiveprocess(self, options):
+        """Recurse through directories and convert files, keeping track of
+        the converted files with ``--skipunchanged``.
+        """
+        if not getattr(options, "skipunchanged", False) or options.output is None:
+            return super().recursiveprocess(options)
+        self.manifest = ConversionManifest(
+            os.path.join(options.output, MANIFEST_NAME),
+            self.getoptionsdigest(options),
+        )
+        try:
+            result = super().recursiveprocess(options)
+            if options.recursiveoutput and os.path.isdir(options.output):
+                self.manifest.save()
+        finally:
+            self.manifest = None
+        return result
+
+    def getoptionsdigest(self, options):
+        """Returns a digest of everything besides the files that influences
+        the output of a conversion: the options besides those in
+        :data:`UNDIGESTED_OPTIONS`, and the contents of the files named by
+        the options in ``digestfiles``.
+        """
+        values = sorted(
+            (name, value)
+            for name, value in vars(options).items()
+            if name not in UNDIGESTED_OPTIONS
+        )
+        files = [
+            (name, _file_digest(getattr(options, name, None)))
+            for name in sorted(self.digestfiles)
+        ]
+        description = repr((self.get_prog_name(), __version__.sver, values, files))
+        return hashlib.sha1(description.encode("utf-8")).hexdigest()
+
+    def processjobs(self, options, jobs):
+        """Processes the jobs, recording the successful conversions in the
+        manifest.
+        """
+        if self.manifest is None:
+            yield from super().processjobs(options, jobs)
+            return
+        entries = {}
+
+        def hashfiles(jobs):
+            # The files are hashed before they are converted, so that a file
+            # changed meanwhile is converted again in the next run. The entry
+            # is passed on with the job so it isn't hashed again to check it.
+            for job in jobs:
+                inputpath, _, fullinputpath, fulloutputpath, fulltemplatepath = job
+                entry = self.manifest.getentry(fullinputpath, fulltemplatepath)
+                entries[inputpath] = (fulloutputpath, entry)
+                yield job + (entry,)
+
+        for result in super().processjobs(options, hashfiles(jobs)):
+            inputpath, success, errormessage = result
+            fulloutputpath, entry = entries.pop(inputpath)
+            if success:
+                self.manifest.record(
+                    self.getmanifestkey(options, fulloutputpath), entry, fulloutputpath
+                )
+            yield result
+
+    def processjob(self, options, job):
+        """Processes a single job, which carries the manifest entry of its
+        files with ``--skipunchanged``.
+        """
+        if self.manifest is None:
+            return super().processjob(options, job)
+        *job, self.manifestentry = job
+        try:
+            return super().processjob(options, tuple(job))
+        finally:
+            self.manifestentry = None
+
+    def isexcluded(self, options, inputpath):
+        """Checks if this path has been excluded, which is always the case for
+        the manifest of an earlier run.
+        """
+        if os.path.basename(inputpath) == MANIFEST_NAME:
+            return True
+        return super().isexcluded(options, inputpath)
+
+    def getmanifestkey(self, options, fulloutputpath):
+        """Returns the name of the output file in the manifest."""
+        if fulloutputpath is None:
+            return None
+        return os.path.relpath(fulloutputpath, options.output)
+
+    def isunchanged(self, options, fullinputpath, fulloutputpath, fulltemplatepath):
+        """Checks whether the output was converted from the same input and
+        template with the same options in a previous run.
+        """
+        if self.manifest is None or not fulloutputpath:
+            return False
+        entry = self.manifestentry
+        if entry is None:
+            entry = self.manifest.getentry(fullinputpath, fulltemplatepath)
+        return self.manifest.isunchanged(
+            self.getmanifestkey(options, fulloutputpath), entry, fulloutputpath
+        )
+
     def processfile(
         self, fileprocessor, options, fullinputpath, fulloutputpath, fulltemplatepath
     ):
         if options.timestamp and _output_is_newer(fullinputpath, fulloutputpath):
             return False
 
+        if self.isunchanged(options, fullinputpath, fulloutputpath, fulltemplatepath):
+            # the output is up to date
+            return True
+
         return super().processfile(
             fileprocessor, options, fullinputpath, fulloutputpath, fulltemplatepath
         )
@@ -486,6 +632,18 @@ class ArchiveConvertOptionParser(ConvertOptionParser):
             self.outputarchive = self.openarchive(options.output, "output", mode="w")
         return super().recursiveprocess(options)
 
+    def canprocessinparallel(self, options):
+        """Archives are opened once and can't be shared between processes, so
+        files are processed one at a time when archives are used.
+        """
+        if (
+            self.isarchive(options.input, "input")
+            or self.isarchive(options.output, "output")
+            or (self.usetemplates and self.isarchive(options.template, "template"))
+        ):
+            return False
+        return super().canprocessinparallel(options)
+
     def processfile(
         self, fileprocessor, options, fullinputpath, fulloutputpath, fulltemplatepath
     ):
@@ -493,6 +651,10 @@ class ArchiveConvertOptionParser(ConvertOptionParser):
         if options.timestamp and _output_is_newer(fullinputpath, fulloutputpath):
             return False
 
+        if self.isunchanged(options, fullinputpath, fulloutputpath, fulltemplatepath):
+            # the output is up to date
+            return True
+
         if self.isarchive(options.output, "output"):
             inputfile = self.openinputfile(options, fullinputpath)
             # TODO: handle writing back to same archive as input/template
@@ -514,6 +676,100 @@ class ArchiveConvertOptionParser(ConvertOptionParser):
             )
 
 
+class ConversionManifest:
+    """Records the digests of the input and template of converted files, so
+    that unchanged files can be skipped in the next run.
+
+    The size and modification time of the output are recorded as well, so
+    that an output changed by anything else is converted again.
+
+    Only the files recorded in a run are saved, so files that were removed
+    or failed to convert are dropped.
+    """
+
+    def __init__(self, filename, optionsdigest):
+        self.filename = filename
+        self.optionsdigest = optionsdigest
+        self.previous = {}
+        self.entries = {}
+        if os.path.isfile(filename):
+            try:
+                with open(filename) as manifestfile:
+                    manifest = json.load(manifestfile)
+            except ValueError:
+                manifest = {}
+            # Everything needs to be converted again if the options changed
+            if manifest.get("options") == optionsdigest:
+                self.previous = manifest.get("files", {})
+
+    def getentry(self, fullinputpath, fulltemplatepath):
+        """Returns the digests of the given input and template files."""
+        return {
+            "input": _file_digest(fullinputpath),
+            "template": _file_digest(fulltemplatepath),
+        }
+
+    def isunchanged(self, outputname, entry, fulloutputpath):
+        """Checks if the files for outputname, with the digests returned by
+        :meth:`getentry`, and the output itself are the same as recorded in
+        the previous run.
+        """
+        previous = self.previous.get(outputname)
+        if previous is None or entry["input"] is None:
+            return False
+        return previous == dict(entry, output=_file_stamp(fulloutputpath))
+
+    def record(self, outputname, entry, fulloutputpath):
+        """Records the digests of the files that outputname was converted
+        from, as returned by :meth:`getentry` before converting them, and
+        the stamp of the output written from them.
+        """
+        stamp = _file_stamp(fulloutputpath)
+        if outputname is not None and entry["input"] is not None and stamp is not None:
+            self.entries[outputname] = dict(entry, output=stamp)
+
+    def save(self):
+        """Writes the manifest, replacing the previous one."""
+        tempname = self.filename + ".tmp"
+        with open(tempname, "w") as manifestfile:
+            json.dump(
+                {"options": self.optionsdigest, "files": self.entries},
+                manifestfile,
+                indent=0,
+                sort_keys=True,
+            )
+        os.replace(tempname, self.filename)
+
+
+def _file_stamp(path):
+    """Returns the size and modification time of the file at path, or None
+    if it doesn't exist.
+    """
+    if not path:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _file_digest(path):
+    """Returns the SHA-1 digest of the contents of the file at path, or None
+    if it isn't a readable file.
+    """
+    if not path:
+        return None
+    digest = hashlib.sha1()
+    try:
+        with open(path, "rb") as infile:
+            for block in iter(lambda: infile.read(65536), b""):
+                digest.update(block)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
 def _output_is_newer(input_path, output_path):
     """Check if input_path was not modified since output_path was generated,
     used to avoid needless regeneration of output.
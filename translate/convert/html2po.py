@@ -132,6 +132,14 @@ class Html2POOptionParser(convert.ConvertOptionParser):
         else:
             super().recursiveprocess(options)
 
+    def canprocessinparallel(self, options):
+        """All files are converted into one output store with onefile, so
+        they can't be processed in parallel. (override)
+        """
+        if options.multifilestyle == "onefile":
+            return False
+        return super().canprocessinparallel(options)
+
     def isrecursive(self, fileoption, filepurpose="input"):
         """Check if fileoption is a recursive file. (override)"""
         if hasattr(self, "outputstore") and filepurpose == "output":
@@ -336,6 +336,7 @@ def main(argv=None):
         help="The file to use as translation memory when fuzzy matching",
     )
     parser.passthrough.append("tm")
+    parser.digestfiles.append("tm")
 
     defaultsimilarity = 75
     parser.add_option(
@@ -356,6 +357,7 @@ def main(argv=None):
         help="Disable fuzzy matching",
     )
     parser.passthrough.append("fuzzymatching")
+    parser.preparejobs = pretranslate.preload_memory
 
     parser.run(argv)
 
@@ -118,8 +118,40 @@ class TestConvertCommand:
         options = self.help_check(options, "-h, --help")
         options = self.help_check(options, "--manpage")
         options = self.help_check(options, "--errorlevel=ERRORLEVEL")
+        options = self.help_check(options, "-j JOBS, --jobs=JOBS")
         options = self.help_check(options, "-i INPUT, --input=INPUT")
         options = self.help_check(options, "-x EXCLUDE, --exclude=EXCLUDE")
         options = self.help_check(options, "-o OUTPUT, --output=OUTPUT")
         options = self.help_check(options, "-S, --timestamp")
+        options = self.help_check(options, "--skipunchanged")
         return options
+
+
+def test_skipunchanged_options(tmp_path, monkeypatch):
+    """tests that changing an option not passed to the converter converts
+    everything again
+    """
+    # like po2moz, the --locale option only reaches the converter through a
+    # Replacer set up before converting
+    replacer = convert.Replacer(b"${locale}", None)
+    parser = convert.ConvertOptionParser(
+        {("js", "js"): ("js", replacer.searchreplaceinput)}, usetemplates=True
+    )
+    parser.add_option("-l", "--locale", dest="locale")
+    original_recursiveprocess = parser.recursiveprocess
+
+    def recursiveprocess(options):
+        replacer.replacestring = options.locale.encode("utf-8")
+        return original_recursiveprocess(options)
+
+    parser.recursiveprocess = recursiveprocess
+    monkeypatch.chdir(tmp_path)
+    for name in ("input", "templates"):
+        os.mkdir(name)
+        with open(os.path.join(name, "locale.js"), "w") as jsfile:
+            jsfile.write("locale = '${locale}';\n")
+    argv = ["--progress=none", "--skipunchanged", "-t", "templates", "input", "out"]
+    for locale in ("af", "zu"):
+        parser.run(argv + ["--locale=%s" % locale])
+        with open(os.path.join("out", "locale.js")) as jsfile:
+            assert jsfile.read() == "locale = '%s';\n" % locale
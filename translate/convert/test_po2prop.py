@@ -1,6 +1,10 @@
+import hashlib
+import json
+import os
 from io import BytesIO
 
-from translate.convert import po2prop, test_convert
+from translate.convert import convert, po2prop, test_convert
+from translate.misc import optrecurse
 from translate.storage import po
 
 
@@ -526,3 +530,81 @@ class TestPO2PropCommand(test_convert.TestConvertCommand, TestPO2Prop):
         options = self.help_check(options, "--encoding=ENCODING")
         options = self.help_check(options, "--removeuntranslated")
         options = self.help_check(options, "--nofuzzy", last=True)
+
+    def test_skipunchanged(self):
+        """tests that only changed files are converted again"""
+        for name in ("one", "two"):
+            self.create_testfile(
+                os.path.join("templates", name + ".properties"), "k=v\n"
+            )
+            self.create_testfile(
+                os.path.join("po", name + ".po"),
+                '#: k\nmsgid "v"\nmsgstr "%s"\n' % name,
+            )
+        self.run_command("po", "out", template="templates", skipunchanged=True)
+        assert self.read_testfile(os.path.join("out", "one.properties")) == b"k=one\n"
+        # Outputs of unchanged files are left alone
+        onestat = os.stat(self.get_testfilename(os.path.join("out", "one.properties")))
+        self.create_testfile(
+            os.path.join("po", "two.po"), '#: k\nmsgid "v"\nmsgstr "2"\n'
+        )
+        self.run_command("po", "out", template="templates", skipunchanged=True)
+        assert (
+            os.stat(self.get_testfilename(os.path.join("out", "one.properties")))
+            == onestat
+        )
+        assert self.read_testfile(os.path.join("out", "two.properties")) == b"k=2\n"
+        # Outputs changed by anything else are converted again
+        self.create_testfile(os.path.join("out", "one.properties"), "edited")
+        self.run_command("po", "out", template="templates", skipunchanged=True)
+        assert self.read_testfile(os.path.join("out", "one.properties")) == b"k=one\n"
+        # Different options convert everything again
+        self.run_command(
+            "po", "out", template="templates", skipunchanged=True, fuzzy=True
+        )
+        assert self.read_testfile(os.path.join("out", "one.properties")) == b"k=one\n"
+
+    def test_skipunchanged_manifest(self, monkeypatch):
+        """tests the files recorded in the manifest"""
+        posource = '#: k\nmsgid "v"\nmsgstr "w"\n'
+        for name in ("one", "two"):
+            self.create_testfile(
+                os.path.join("templates", name + ".properties"), "k=v\n"
+            )
+            self.create_testfile(os.path.join("po", name + ".po"), posource)
+        original_processfile = convert.ConvertOptionParser.processfile
+
+        def processfile(parser, fileprocessor, options, fullinputpath, *args):
+            result = original_processfile(
+                parser, fileprocessor, options, fullinputpath, *args
+            )
+            # the input is changed while it is converted
+            with open(fullinputpath, "a") as inputfile:
+                inputfile.write("# changed\n")
+            return result
+
+        monkeypatch.setattr(convert.ConvertOptionParser, "processfile", processfile)
+        self.run_command("po", "out", template="templates", skipunchanged=True)
+        manifestname = os.path.join("out", convert.MANIFEST_NAME)
+        manifest = json.loads(self.read_testfile(manifestname))
+        assert sorted(manifest["files"]) == ["one.properties", "two.properties"]
+        # the digest is that of the converted input
+        digest = hashlib.sha1(posource.encode("utf-8")).hexdigest()
+        assert manifest["files"]["one.properties"]["input"] == digest
+        monkeypatch.undo()
+
+        progress = []
+        monkeypatch.setattr(
+            optrecurse.ProgressBar,
+            "report_progress",
+            lambda bar, filename, success: progress.append((filename, success)),
+        )
+        self.run_command("po", "out", template="templates", skipunchanged=True)
+        self.run_command("po", "out", template="templates", skipunchanged=True)
+        # skipped files count as successes
+        assert progress[2:] == [("one.po", True), ("two.po", True)]
+        # removed files are dropped
+        os.remove(self.get_testfilename(os.path.join("po", "one.po")))
+        self.run_command("po", "out", template="templates", skipunchanged=True)
+        manifest = json.loads(self.read_testfile(manifestname))
+        assert sorted(manifest["files"]) == ["two.properties"]
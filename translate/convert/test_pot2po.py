@@ -1,3 +1,4 @@
+import os
 import warnings
 from io import BytesIO
 
@@ -5,6 +6,7 @@ from pytest import mark
 
 from translate.convert import pot2po, test_convert
 from translate.storage import po
+from translate.tools import pretranslate
 
 
 class TestPOT2PO:
@@ -843,3 +845,39 @@ class TestPOT2POCommand(test_convert.TestConvertCommand, TestPOT2PO):
             options, "-s MIN_SIMILARITY, --similarity=MIN_SIMILARITY"
         )
         options = self.help_check(options, "--nofuzzymatching", last=True)
+
+    def test_jobs(self):
+        """tests that parallel jobs give the same output as a serial run"""
+        pretranslate.tmmatcher = None
+        self.create_testfile("tm.po", 'msgid "Open file"\nmsgstr "Maak lêer oop"\n')
+        for name in ("one", "two", "three"):
+            self.create_testfile(
+                os.path.join("pot", name + ".pot"),
+                'msgid ""\nmsgstr ""\n\n#: %s\nmsgid "Open files"\nmsgstr ""\n' % name,
+            )
+            self.create_testfile(os.path.join("po", name + ".po"), "")
+        self.run_command("pot", "serial", template="po", tm="tm.po")
+        self.run_command("pot", "parallel", template="po", tm="tm.po", jobs=2)
+        for name in ("one", "two", "three"):
+            serial = self.read_testfile(os.path.join("serial", name + ".po"))
+            parallel = self.read_testfile(os.path.join("parallel", name + ".po"))
+            assert b"Maak l\xc3\xaaer oop" in serial
+            assert parallel == serial
+
+    def test_skipunchanged_tm(self):
+        """tests that changing the translation memory converts everything again"""
+        self.create_testfile(
+            os.path.join("pot", "one.pot"), 'msgid "Open file"\nmsgstr ""\n'
+        )
+        self.create_testfile(os.path.join("po", "one.po"), "")
+        for translation in ("Maak lêer oop", "Open lêer"):
+            pretranslate.tmmatcher = None
+            self.create_testfile(
+                "tm.po", 'msgid "Open file"\nmsgstr "%s"\n' % translation
+            )
+            self.run_command(
+                "pot", "out", template="po", tm="tm.po", skipunchanged=True
+            )
+            output = self.read_testfile(os.path.join("out", "one.po"))
+            assert translation.encode("utf-8") in output
+        pretranslate.tmmatcher = None
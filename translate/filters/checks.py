@@ -302,17 +302,23 @@ class CheckerConfig:
 
 
 def cache_results(f):
+    """Caches the results of a method for the unit being checked, so that all
+    checks share them.
+    """
+    name = f.__name__
+
     def cached_f(self, param1):
-        key = (f.__name__, param1)
+        key = (name, param1)
         res_cache = self.results_cache
 
-        if key in res_cache:
+        try:
             return res_cache[key]
-        else:
-            value = f(self, param1)
-            res_cache[key] = value
+        except KeyError:
+            value = res_cache[key] = f(self, param1)
             return value
 
+    cached_f.__name__ = name
+    cached_f.__doc__ = f.__doc__
     return cached_f
 
 
@@ -352,6 +358,8 @@ class UnitChecker:
 
         self.defaultfilters = self.getfilters(excludefilters, limitfilters)
         self.results_cache = {}
+        # Check plans compiled by get_check_plan, by filters dictionary
+        self._check_plans = {}
 
     def getfilters(self, excludefilters=None, limitfilters=None):
         """Returns dictionary of available filters, including/excluding those
@@ -428,6 +436,20 @@ class UnitChecker:
 
     filteraccelerators = cache_results(filteraccelerators)
 
+    def filterplaceholders(self, str1):
+        """Filter out variables and then accelerators from ``str1``."""
+        return self.filteraccelerators(self.filtervariables(str1))
+
+    filterplaceholders = cache_results(filterplaceholders)
+
+    def punctranslate(self, str1):
+        """Converts the punctuation in ``str1`` to that of the target
+        language.
+        """
+        return self.config.lang.punctranslate(str1)
+
+    punctranslate = cache_results(punctranslate)
+
     def filteraccelerators_by_list(self, str1, acceptlist=None):
         """Filter out accelerators from ``str1``."""
         return helpers.multifilter(str1, self.accfilters, acceptlist)
@@ -467,24 +489,37 @@ class UnitChecker:
             )
         )
 
-    def run_filters(self, unit, categorised=False):
-        """Run all the tests in this suite.
+    def get_check_plan(self):
+        """Returns the tests to run on every unit for the current filters and
+        language, in order.
+
+        Every test is a ``(functionname, filterfunction, docmessage, record,
+        skips)`` tuple, where ``record`` tells whether a failure is reported
+        and ``skips`` lists the tests not to run when it fails. The plan is
+        only compiled again when :attr:`defaultfilters` or the language
+        changes.
+        """
+        defaultfilters = self.defaultfilters
+        lang = self.config.lang
+        try:
+            plan = self._check_plans[id(defaultfilters)]
+        except KeyError:
+            pass
+        else:
+            if plan[0] is defaultfilters and plan[1] is lang:
+                return plan[2]
 
-        :rtype: Dictionary
-        :return: Content of the dictionary is as follows::
+        import pydoc
 
-           {'testname': { 'message': message_or_exception, 'category': failure_category } }
-        """
-        self.results_cache = {}
-        failures = {}
         ignores = self.get_ignored_filters()
-        functionnames = self.defaultfilters.keys()
-        priorityfunctionnames = self.preconditions.keys()
-        otherfunctionnames = filter(
-            lambda functionname: functionname not in self.preconditions, functionnames
-        )
+        functionnames = list(self.preconditions) + [
+            functionname
+            for functionname in defaultfilters
+            if functionname not in self.preconditions
+        ]
+        checks = []
 
-        for functionname in list(priorityfunctionnames) + list(otherfunctionnames):
+        for functionname in functionnames:
             if functionname in ignores:
                 continue
 
@@ -495,6 +530,45 @@ class UnitChecker:
             if filterfunction is None:
                 continue
 
+            checks.append(
+                (
+                    functionname,
+                    filterfunction,
+                    # Strip out unnecessary whitespace from docstring
+                    pydoc.getdoc(filterfunction),
+                    # We test some preconditions that aren't actually a cause
+                    # for failure
+                    functionname in defaultfilters,
+                    self.preconditions.get(functionname, ()),
+                )
+            )
+
+        # Keep a reference to the filters, so that their id is not reused
+        self._check_plans[id(defaultfilters)] = (defaultfilters, lang, checks)
+        return checks
+
+    def run_filters(self, unit, categorised=False):
+        """Run all the tests in this suite.
+
+        :rtype: Dictionary
+        :return: Content of the dictionary is as follows::
+
+           {'testname': { 'message': message_or_exception, 'category': failure_category } }
+        """
+        self.results_cache = {}
+        failures = {}
+        skipped = ()
+
+        for (
+            functionname,
+            filterfunction,
+            docmessage,
+            record,
+            skips,
+        ) in self.get_check_plan():
+            if functionname in skipped:
+                continue
+
             filtermessage = ""
 
             try:
@@ -515,21 +589,16 @@ class UnitChecker:
             if not filterresult:
                 if not filtermessage:
                     # Should be quite rare
-                    import pydoc
-
-                    # Strip out unnecessary whitespace from docstring
-                    filtermessage = pydoc.getdoc(filterfunction)
-                # We test some preconditions that aren't actually a cause for
-                # failure
-                if functionname in self.defaultfilters:
+                    filtermessage = docmessage
+                if record:
                     failures[functionname] = {
                         "message": filtermessage,
                         "category": self.categories[functionname],
                     }
 
-                if functionname in self.preconditions:
-                    for ignoredfunctionname in self.preconditions[functionname]:
-                        ignores.append(ignoredfunctionname)
+                if skips:
+                    skipped = set(skipped)
+                    skipped.update(skips)
 
         self.results_cache = {}
 
@@ -851,14 +920,10 @@ class StandardChecker(TranslationChecker):
         translation, i.e. ``'.``, this might not be detected properly by the
         check.
         """
-        str1 = self.filterwordswithpunctuation(
-            self.filteraccelerators(self.filtervariables(str1))
-        )
-        str1 = self.config.lang.punctranslate(str1)
+        str1 = self.filterwordswithpunctuation(self.filterplaceholders(str1))
+        str1 = self.punctranslate(str1)
 
-        str2 = self.filterwordswithpunctuation(
-            self.filteraccelerators(self.filtervariables(str2))
-        )
+        str2 = self.filterwordswithpunctuation(self.filterplaceholders(str2))
 
         if helpers.countsmatch(str1, str2, ("'", "''", "\\'")):
             return True
@@ -874,11 +939,11 @@ class StandardChecker(TranslationChecker):
         account that several languages use different quoting characters, and
         will test for them instead.
         """
-        str1 = self.filteraccelerators(self.filtervariables(str1))
+        str1 = self.filterplaceholders(str1)
         str1 = self.filterxml(str1)
-        str1 = self.config.lang.punctranslate(str1)
+        str1 = self.punctranslate(str1)
 
-        str2 = self.filteraccelerators(self.filtervariables(str2))
+        str2 = self.filterplaceholders(str2)
         str2 = self.filterxml(str2)
 
         if helpers.countsmatch(str1, str2, ('"', '""', '\\"', "«", "»", "“", "”")):
@@ -917,14 +982,14 @@ class StandardChecker(TranslationChecker):
         """
         # Convert all nbsp to space, and just check spaces. Useful intermediate
         # step to stricter nbsp checking?
-        str1 = self.filteraccelerators(self.filtervariables(str1))
-        str1 = self.config.lang.punctranslate(str1)
+        str1 = self.filterplaceholders(str1)
+        str1 = self.punctranslate(str1)
         str1 = str1.replace("\u00a0", " ")
 
         if str1.find(" ") == -1:
             return True
 
-        str2 = self.filteraccelerators(self.filtervariables(str2))
+        str2 = self.filterplaceholders(str2)
         # Substitute: nbsp
         str2 = str2.replace("\u00a0", " ")
         # Strip: Bidi markers and ZW* chars
@@ -1434,7 +1499,7 @@ class StandardChecker(TranslationChecker):
         If your language uses full-width punctuation (like Chinese), the visual
         spacing in the character might be enough without an added extra space.
         """
-        str1 = self.config.lang.punctranslate(str1)
+        str1 = self.punctranslate(str1)
 
         if helpers.funcmatch(str1, str2, decoration.spaceend):
             return True
@@ -1448,15 +1513,11 @@ class StandardChecker(TranslationChecker):
         Operates as endpunc but you will probably see fewer errors.
         """
         str1 = self.filterxml(
-            self.filterwordswithpunctuation(
-                self.filteraccelerators(self.filtervariables(str1))
-            )
+            self.filterwordswithpunctuation(self.filterplaceholders(str1))
         )
-        str1 = self.config.lang.punctranslate(str1)
+        str1 = self.punctranslate(str1)
         str2 = self.filterxml(
-            self.filterwordswithpunctuation(
-                self.filteraccelerators(self.filtervariables(str2))
-            )
+            self.filterwordswithpunctuation(self.filterplaceholders(str2))
         )
 
         if helpers.funcmatch(str1, str2, decoration.puncstart, self.config.punctuation):
@@ -1492,7 +1553,7 @@ class StandardChecker(TranslationChecker):
         Support for your language can be added easily if it is not there yet.
         """
         str1 = self.filtervariables(str1)
-        str1 = self.config.lang.punctranslate(str1)
+        str1 = self.punctranslate(str1)
         str2 = self.filtervariables(str2)
         str1 = str1.rstrip()
         str2 = str2.rstrip()
@@ -1712,9 +1773,9 @@ class StandardChecker(TranslationChecker):
             allowed += decoration.getvariables(startmatch, endmatch)(str1)
 
         allowed += self.config.musttranslatewords.keys()
-        str1 = self.filteraccelerators(self.filtervariables(str1))
+        str1 = self.filterplaceholders(str1)
         iter = self.config.lang.word_iter(str1)
-        str2 = self.filteraccelerators(self.filtervariables(str2))
+        str2 = self.filterplaceholders(str2)
 
         # TODO: strip XML? - should provide better error messsages
         # see mail/chrome/messanger/smime.properties.po
@@ -2715,6 +2776,7 @@ class L20nChecker(MozillaChecker):
             kwargs["checkerconfig"] = checkerconfig
 
         super().__init__(**kwargs)
+        self._complex_filters = (None, None)
 
     def run_filters(self, unit, categorised=False):
         is_unit_complex = (
@@ -2725,11 +2787,17 @@ class L20nChecker(MozillaChecker):
         saved_default_filters = {}
         if is_unit_complex:
             saved_default_filters = self.defaultfilters
-            self.defaultfilters = {
-                key: value
-                for (key, value) in self.defaultfilters.items()
-                if key not in self.excluded_filters_for_complex_units
-            }
+            # Reuse the reduced filters, and thus their compiled check plan
+            if self._complex_filters[0] is not saved_default_filters:
+                self._complex_filters = (
+                    saved_default_filters,
+                    {
+                        key: value
+                        for (key, value) in saved_default_filters.items()
+                        if key not in self.excluded_filters_for_complex_units
+                    },
+                )
+            self.defaultfilters = self._complex_filters[1]
 
         result = MozillaChecker.run_filters(self, unit, categorised=categorised)
 
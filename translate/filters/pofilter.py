@@ -28,7 +28,9 @@ http://docs.translatehouse.org/projects/translate-toolkit/en/latest/commands/pof
 for full descriptions of all tests.
 """
 
+import multiprocessing
 import os
+from itertools import chain
 
 from translate.filters import autocorrect, checks
 from translate.misc import optrecurse
@@ -36,7 +38,42 @@ from translate.storage import factory
 from translate.storage.poheader import poheader
 
 
+# The checkers used by the worker processes checking a file in parallel. These
+# are set just before the workers are forked, so that they are shared with the
+# workers instead of being pickled for every chunk of units.
+_checkers = None
+
+
+def _checkrecords(records):
+    """Runs the checkers on a chunk of unit records in a worker process."""
+    return [
+        [checker.run_filters(record, categorised=True) for checker in _checkers]
+        for record in records
+    ]
+
+
+class UnitRecord:
+    """The parts of a unit used by source and target checks, which are
+    cheap to send to another process.
+    """
+
+    def __init__(self, unit):
+        self.source = unit.source
+        self.target = unit.target
+        self.plural = unit.hasplural()
+        self.locations = unit.getlocations()
+
+    def hasplural(self):
+        return self.plural
+
+    def getlocations(self):
+        return self.locations
+
+
 class pocheckfilter:
+    #: The number of units checked by a worker process at once
+    chunksize = 500
+
     def __init__(self, options, checkerclasses=None, checkerconfig=None):
         # excludefilters={}, limitfilters=None, includefuzzy=True, includereview=True, autocorrect=False):
         """Builds a checkfilter using the given checker (a list is allowed too)"""
@@ -63,20 +100,31 @@ class pocheckfilter:
 
         return "\n".join(filterdocs)
 
-    def filterunit(self, unit):
-        """Runs filters on an element."""
-
+    def ischecked(self, unit):
+        """Checks whether the filters should be run on unit."""
         if unit.isheader():
-            return []
+            return False
 
         if not self.options.includefuzzy and unit.isfuzzy():
-            return []
+            return False
 
         if not self.options.includereview and unit.isreview():
+            return False
+
+        return True
+
+    def filterunit(self, unit):
+        """Runs filters on an element."""
+        if not self.ischecked(unit):
             return []
 
         failures = self.checker.run_filters(unit, categorised=True)
+        return self.correctunit(unit, failures)
 
+    def correctunit(self, unit, failures):
+        """Returns the failures to report for unit, after correcting it if
+        requested.
+        """
         if failures and self.options.autocorrect:
             # we can't get away with bad unquoting / requoting if we're going to change the result...
             correction = autocorrect.correct(unit.source, unit.target)
@@ -90,6 +138,59 @@ class pocheckfilter:
 
         return failures
 
+    def canfilterinparallel(self, units):
+        """Checks whether the units can be checked by several processes.
+
+        This is not done from the worker of a parallel run over several
+        files, and needs forked workers to share the checkers.
+        """
+        return (
+            getattr(self.options, "jobs", 1) > 1
+            and len(units) > self.chunksize
+            and not multiprocessing.current_process().daemon
+            and "fork" in multiprocessing.get_all_start_methods()
+        )
+
+    def filterunits(self, units):
+        """Returns the results of :meth:`filterunit` for all units, checking
+        them in parallel if requested.
+        """
+        if not self.canfilterinparallel(units):
+            return [self.filterunit(unit) for unit in units]
+
+        # Source and target checks run in the workers on records of the
+        # units, the checks needing the units themselves run here.
+        global _checkers
+        checkers = self.checker.checkers
+        _checkers = [
+            checker
+            for checker in checkers
+            if isinstance(checker, checks.TranslationChecker)
+        ]
+        checkedunits = [unit for unit in units if self.ischecked(unit)]
+        records = [UnitRecord(unit) for unit in checkedunits]
+        chunks = [
+            records[start : start + self.chunksize]
+            for start in range(0, len(records), self.chunksize)
+        ]
+        try:
+            with multiprocessing.get_context("fork").Pool(self.options.jobs) as pool:
+                recordfailures = chain.from_iterable(pool.imap(_checkrecords, chunks))
+                results = {}
+                for unit, shardfailures in zip(checkedunits, recordfailures):
+                    shardfailures = iter(shardfailures)
+                    failures = {}
+                    # Merge in checker order, like TeeChecker.run_filters
+                    for checker in checkers:
+                        if isinstance(checker, checks.TranslationChecker):
+                            failures.update(next(shardfailures))
+                        else:
+                            failures.update(checker.run_filters(unit, categorised=True))
+                    results[id(unit)] = self.correctunit(unit, failures)
+        finally:
+            _checkers = None
+        return [results.get(id(unit), []) for unit in units]
+
     def filterfile(self, transfile):
         """Runs filters on a translation store object.
 
@@ -101,8 +202,8 @@ class pocheckfilter:
         newtransfile.setsourcelanguage(transfile.getsourcelanguage())
         newtransfile.settargetlanguage(transfile.gettargetlanguage())
 
-        for unit in transfile.units:
-            filter_result = self.filterunit(unit)
+        units = transfile.units
+        for unit, filter_result in zip(units, self.filterunits(units)):
 
             if filter_result:
                 if filter_result != autocorrect:
@@ -2421,6 +2421,48 @@ def test_skip_checks_per_language_in_some_checkers():
     checker_config.lang.ignoretests = previous_ignoretests
 
 
+def test_check_plan_language_change():
+    """Test the compiled checks follow a change of the target language."""
+    from translate.storage import base
+
+    stdchecker = checks.StandardChecker()
+    unit = base.TranslationUnit("Save as PDF")
+    unit.target = "Stoor as pdf"
+    assert "acronyms" in stdchecker.run_filters(unit)
+    assert stdchecker.get_check_plan() is stdchecker.get_check_plan()
+
+    # Arabic ignores the acronyms check
+    stdchecker.config.updatetargetlanguage("ar")
+    assert "acronyms" not in stdchecker.run_filters(unit)
+
+    stdchecker.config.updatetargetlanguage("af")
+    assert "acronyms" in stdchecker.run_filters(unit)
+
+
+def test_shared_results_cache(monkeypatch):
+    """Test the checks of a unit share the filtered strings."""
+    from translate.storage import base
+
+    stdchecker = checks.StandardChecker(
+        checkerconfig=checks.CheckerConfig(accelmarkers="&", targetlanguage="fr")
+    )
+    lang = stdchecker.config.lang
+    punctranslate = lang.punctranslate
+    calls = []
+
+    def counting_punctranslate(text):
+        calls.append(text)
+        return punctranslate(text)
+
+    monkeypatch.setattr(lang, "punctranslate", counting_punctranslate)
+    unit = base.TranslationUnit("&Open file: %s")
+    unit.target = "&Ouvrir le fichier: %s"
+    stdchecker.run_filters(unit)
+    assert calls
+    assert len(calls) == len(set(calls))
+    assert stdchecker.filterplaceholders("&Open %s") == "Open %s"
+
+
 def test_mozilla_no_accelerators_for_indic():
     """
     Test accelerators in MozillaChecker fails if accelerator in target.
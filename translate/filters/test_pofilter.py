@@ -223,6 +223,45 @@ msgstr "koei"
             print(first_translatable(filter_result))
         assert headerless_len(filter_result.units) == 0
 
+    def test_parallel(self, monkeypatch):
+        """Tests that checking the units in several processes gives the same
+        results.
+        """
+        posource = """
+#: file.c:1
+msgid "File"
+msgstr ""
+
+#, fuzzy
+msgid "Open %s"
+msgstr "Maak oop"
+
+msgid "One file"
+msgid_plural "%d files"
+msgstr[0] "Een lêer"
+msgstr[1] "lêers"
+
+msgid "Save"
+msgstr "Stoor"
+
+msgid "Close the file."
+msgstr "Maak die lêer toe"
+
+msgid "Quit"
+msgstr "QUIT"
+
+msgid "Cut"
+msgstr "Sny "
+"""
+        monkeypatch.setattr(pofilter.pocheckfilter, "chunksize", 2)
+        for options in [[], ["--nofuzzy"], ["--autocorrect"]]:
+            serial = self.filter(self.parse_text(posource), cmdlineoptions=options)
+            parallel = self.filter(
+                self.parse_text(posource), cmdlineoptions=options + ["--jobs", "2"]
+            )
+            assert bytes(parallel) == bytes(serial)
+            assert headerless_len(serial.units) > 1
+
 
 class TestXliffFilter(BaseTestFilter):
     """Test class for xliff-specific tests."""
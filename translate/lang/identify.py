@@ -36,6 +36,10 @@ class LanguageIdentifier:
     The name of the file that contains language name-code pairs
     (relative to ``MODEL_DIR``).
     """
+    _ngrams = {}
+    """The compiled language models of every model directory, shared by all
+    instances.
+    """
 
     def __init__(self, model_dir=None, conf_file=None):
         if model_dir is None:
@@ -51,7 +55,10 @@ class LanguageIdentifier:
 
         self._lang_codes = {}
         self._load_config(conf_file)
-        self.ngram = NGram(model_dir)
+        model_dir = path.abspath(model_dir)
+        if model_dir not in self._ngrams:
+            self._ngrams[model_dir] = NGram(model_dir)
+        self.ngram = self._ngrams[model_dir]
 
     def _load_config(self, conf_file):
         """Load the mapping of language names to language codes as given in the
@@ -81,10 +88,20 @@ class LanguageIdentifier:
         """Identify the language of the text in the given string."""
         if not text:
             return None
-        result = self.ngram.classify(text)
-        if result in self._lang_codes:
-            result = self._lang_codes[result]
-        return result
+        return self.identify_langs([text])[0]
+
+    def identify_langs(self, texts):
+        """Identify the language of every text in the given list of strings.
+
+        This is faster than calling :meth:`identify_lang` for each of them.
+        """
+        texts = list(texts)
+        results = [None] * len(texts)
+        indexes = [i for i, text in enumerate(texts) if text]
+        langs = self.ngram.classify_texts([texts[i] for i in indexes])
+        for i, result in zip(indexes, langs):
+            results[i] = self._lang_codes.get(result, result)
+        return results
 
     def identify_source_lang(self, instore):
         """Identify the source language of the given translation store or
@@ -25,11 +25,19 @@
 """
 
 import glob
+import heapq
 import re
 import sys
+from collections import Counter
 from os import path
 
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
 nb_ngrams = 400
 white_space_re = re.compile(r"\s+")
 
@@ -49,31 +57,27 @@ class _NGram:
         if isinstance(text, bytes):
             text = text.decode("utf-8")
 
-        ngrams = dict()
+        ngrams = Counter()
+        once = []
 
-        for word in white_space_re.split(text):
-            word = "_%s_" % word
+        # Every word is only split once, however often it occurs. The n-grams
+        # are those of "_word", the trailing "_" is never part of them.
+        for word, count in Counter(white_space_re.split(text)).items():
+            word = "_" + word
             size = len(word)
-            for i in range(size - 1):
-                for s in (1, 2, 3, 4):
-                    end = i + s
-                    if end >= size:
-                        break
-                    sub = word[i:end]
-
-                    if sub not in ngrams:
-                        ngrams[sub] = 0
-                    ngrams[sub] += 1
+            subs = [word[i : i + n] for n in (1, 2, 3, 4) for i in range(size - n + 1)]
+            if count == 1:
+                once.extend(subs)
+            else:
+                for sub in subs:
+                    ngrams[sub] += count
+        ngrams.update(once)
 
-        self.ngrams = ngrams
+        self.ngrams = dict(ngrams)
         return self
 
     def sorted_by_score(self):
-        sorted = [(self.ngrams[k], k) for k in self.ngrams]
-        sorted.sort()
-        sorted.reverse()
-        sorted = sorted[:nb_ngrams]
-        return sorted
+        return heapq.nlargest(nb_ngrams, ((v, k) for k, v in self.ngrams.items()))
 
     def normalise(self):
         ngrams = {}
@@ -99,6 +103,9 @@ class _NGram:
 
 
 class NGram:
+    batchsize = 128
+    """Number of texts compared at once by :meth:`classify_texts`"""
+
     def __init__(self, folder, ext=".lm"):
         self.ngrams = {}
         folder = path.join(folder, "*" + ext)
@@ -120,22 +127,100 @@ class NGram:
 
         if not self.ngrams:
             raise ValueError("no language files found")
+        self.compile()
+
+    def compile(self):
+        """Indexes the languages by n-gram, so that a text is only compared to
+        the languages sharing its n-grams.
+
+        The distance of :meth:`_NGram.compare` is the largest possible
+        distance for the language, less what every shared n-gram saves.
+        """
+        self.langs = list(self.ngrams)
+        self.maxdistances = [
+            nb_ngrams * len(self.ngrams[lang].ngrams) for lang in self.langs
+        ]
+        self.index = {}
+        for langindex, lang in enumerate(self.langs):
+            for ngram, rank in self.ngrams[lang].ngrams.items():
+                self.index.setdefault(ngram, []).append((langindex, rank))
+
+        if numpy is not None:
+            # The same as a matrix of the ranks of every n-gram in every
+            # language, with an extra row for the n-grams in no language.
+            self.vocabulary = {ngram: i for i, ngram in enumerate(self.index)}
+            shape = (len(self.vocabulary) + 1, len(self.langs))
+            rows = []
+            langranks = []
+            for i, postings in enumerate(self.index.values()):
+                rows.extend([i] * len(postings))
+                langranks.extend(postings)
+            rows = numpy.array(rows, numpy.intp)
+            columns, ranks = numpy.array(langranks, numpy.intp).T
+            self.ranks = numpy.zeros(shape, numpy.int32)
+            self.ranks[rows, columns] = ranks
+            self.present = numpy.zeros(shape, numpy.int32)
+            self.present[rows, columns] = 1
+            self.maxdistances = numpy.array(self.maxdistances)
+
+    def distances(self, text):
+        """Returns the distance of the text to every language, in the order
+        of :attr:`langs`.
+        """
+        distances = list(self.maxdistances)
+        for ngram, rank in _NGram(text).ngrams.items():
+            for langindex, langrank in self.index.get(ngram, ()):
+                distances[langindex] -= nb_ngrams - abs(rank - langrank)
+        return distances
+
+    def batchdistances(self, texts):
+        """Returns a matrix with the distance of every text to every
+        language, calculated with NumPy.
+        """
+        missing = len(self.vocabulary)
+        indexes = numpy.full((len(texts), nb_ngrams), missing, numpy.intp)
+        textranks = numpy.zeros((len(texts), nb_ngrams), numpy.int32)
+        for row, text in enumerate(texts):
+            ngrams = _NGram(text).ngrams
+            columns = len(ngrams)
+            indexes[row, :columns] = [
+                self.vocabulary.get(ngram, missing) for ngram in ngrams
+            ]
+            textranks[row, :columns] = list(ngrams.values())
+        # Indexed by text, n-gram of the text and language
+        savings = nb_ngrams - numpy.abs(textranks[:, :, None] - self.ranks[indexes])
+        return self.maxdistances - (savings * self.present[indexes]).sum(axis=1)
+
+    def _classify(self, distances, langindex):
+        if distances[langindex] > 0.8 * (nb_ngrams ** 2):
+            return ""
+        return self.langs[langindex]
 
     def classify(self, text):
-        ngram = _NGram(text)
-        r = "guess"
-
-        min = sys.maxsize
-
-        for lang in self.ngrams:
-            d = self.ngrams[lang].compare(ngram)
-            if d < min:
-                min = d
-                r = lang
-
-        if min > 0.8 * (nb_ngrams ** 2):
-            r = ""
-        return r
+        return self.classify_texts([text])[0]
+
+    def classify_texts(self, texts):
+        """Returns the language of every text, as :meth:`classify` would.
+
+        This compares many texts to all languages at once if NumPy is
+        available.
+        """
+        results = []
+        if numpy is None:
+            for text in texts:
+                distances = self.distances(text)
+                # The first language is kept in case of a tie
+                langindex = min(range(len(distances)), key=distances.__getitem__)
+                results.append(self._classify(distances, langindex))
+            return results
+
+        texts = list(texts)
+        for start in range(0, len(texts), self.batchsize):
+            batch = self.batchdistances(texts[start : start + self.batchsize])
+            # argmin also keeps the first language in case of a tie
+            for distances, langindex in zip(batch, batch.argmin(axis=1)):
+                results.append(self._classify(distances, langindex))
+        return results
 
 
 class Generate:
@@ -1,6 +1,8 @@
 from pytest import raises
 
+from translate.lang import ngram
 from translate.lang.identify import LanguageIdentifier
+from translate.lang.ngram import NGram
 from translate.storage.base import TranslationUnit
 
 
@@ -167,6 +169,18 @@ class TestLanguageIdentifier:
         assert self.langident.identify_lang("") is None
         assert self.langident.identify_lang(TEXT) == "de"
 
+    def test_identify_langs(self):
+        texts = ["", TEXT] + TEXT_LIST
+        langs = self.langident.identify_langs(texts)
+        assert langs == [self.langident.identify_lang(text) for text in texts]
+        assert langs[:2] == [None, "de"]
+
+    def test_classify_without_numpy(self, monkeypatch):
+        texts = [TEXT] + TEXT_LIST
+        langs = self.langident.ngram.classify_texts(texts)
+        monkeypatch.setattr(ngram, "numpy", None)
+        assert NGram(self.langident.MODEL_DIR).classify_texts(texts) == langs
+
     def test_identify_store(self):
         langlist = [TranslationUnit(string) for string in TEXT_LIST]
         assert self.langident.identify_source_lang(langlist) == "de"
@@ -0,0 +1,134 @@
+#
+# Copyright 2026 Zuza Software Foundation
+#
+# This file is part of translate.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>.
+
+"""Wrapper to serve WSGI applications from an asyncio based ASGI server."""
+
+import asyncio
+import logging
+import sys
+from io import BytesIO
+
+
+class WSGIApplication:
+    """An ASGI application running a WSGI application.
+
+    The WSGI application is called in a thread pool, so blocking calls such as
+    database lookups do not stall the event loop.
+    """
+
+    def __init__(self, app, executor=None):
+        self.app = app
+        self.executor = executor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            raise ValueError("Unsupported ASGI scope type %s" % scope["type"])
+
+        body = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            body.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+
+        environ = self.getenviron(scope, b"".join(body))
+        # get_running_loop() is new in Python 3.7
+        loop = getattr(asyncio, "get_running_loop", asyncio.get_event_loop)()
+        status, headers, content = await loop.run_in_executor(
+            self.executor, self.run, environ
+        )
+        await send(
+            {
+                "type": "http.response.start",
+                "status": int(status.split(" ", 1)[0]),
+                "headers": [
+                    (name.lower().encode("latin-1"), value.encode("latin-1"))
+                    for name, value in headers
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": content})
+
+    @staticmethod
+    def getenviron(scope, body):
+        """Builds a WSGI environ for the ASGI HTTP connection scope."""
+        server = scope.get("server") or ("localhost", 80)
+        environ = {
+            "REQUEST_METHOD": scope["method"],
+            "SCRIPT_NAME": scope.get("root_path", ""),
+            "PATH_INFO": scope["path"],
+            "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+            "SERVER_NAME": server[0],
+            "SERVER_PORT": str(server[1]),
+            "SERVER_PROTOCOL": "HTTP/%s" % scope.get("http_version", "1.1"),
+            "CONTENT_LENGTH": str(len(body)),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": scope.get("scheme", "http"),
+            "wsgi.input": BytesIO(body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        if scope.get("client"):
+            environ["REMOTE_ADDR"] = scope["client"][0]
+        for name, value in scope.get("headers", []):
+            name = name.decode("latin-1").upper().replace("-", "_")
+            value = value.decode("latin-1")
+            if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+                name = "HTTP_" + name
+            if name in environ and name.startswith("HTTP_"):
+                value = environ[name] + "," + value
+            environ[name] = value
+        return environ
+
+    def run(self, environ):
+        """Calls the WSGI application, returning the status, headers and the
+        complete response body.
+        """
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response["status"] = status
+            response["headers"] = headers
+            return body.append
+
+        body = []
+        result = self.app(environ, start_response)
+        try:
+            body.extend(result)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        return response["status"], response["headers"], b"".join(body)
+
+
+def launch_server(host, port, app, **kwargs):
+    """Use uvicorn ASGI server, an asyncio based server."""
+    import uvicorn
+
+    logging.info("Starting server, listening on port %s", port)
+    uvicorn.run(WSGIApplication(app), host=host, port=port, **kwargs)
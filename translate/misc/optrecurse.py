@@ -18,6 +18,7 @@
 
 import fnmatch
 import logging
+import multiprocessing
 import optparse
 import os.path
 import re
@@ -65,6 +66,18 @@ class ProgressBar:
         self._progressbar.show(filename)
 
 
+# The parser and options used by the worker processes of a parallel run. These
+# are set just before the workers are forked, so that they are shared with the
+# workers instead of being pickled for every file.
+_jobstate = None
+
+
+def _processjob(job):
+    """Process a single file in a worker process."""
+    parser, options = _jobstate
+    return parser.processjob(options, job)
+
+
 class ManPageOption(optparse.Option):
     ACTIONS = optparse.Option.ACTIONS + ("manpage",)
 
@@ -135,9 +148,14 @@ class RecursiveOptionParser(optparse.OptionParser):
         self.setmanpageoption()
         self.setprogressoptions()
         self.seterrorleveloptions()
+        self.setjobsoption()
         self.setformats(formats, usetemplates)
         self.passthrough = []
         self.allowmissingtemplate = allowmissingtemplate
+        # Optional function called with the passthrough options before the
+        # files are processed, e.g. to load data once in the main process so
+        # that all parallel jobs can share it.
+        self.preparejobs = None
         logging.basicConfig(format="%(name)s: %(levelname)s: %(message)s")
 
     def get_prog_name(self):
@@ -216,6 +234,14 @@ class RecursiveOptionParser(optparse.OptionParser):
 
     def warning(self, msg, options=None, exc_info=None):
         """Print a warning message incorporating 'msg' to stderr and exit."""
+        logging.getLogger(self.get_prog_name()).warning(
+            self.formatwarning(msg, options, exc_info)
+        )
+
+    def formatwarning(self, msg, options=None, exc_info=None):
+        """Returns the warning message incorporating 'msg' and the error
+        information required by the errorlevel in options.
+        """
         if options:
             if options.errorlevel == "traceback":
                 errorinfo = "\n".join(
@@ -231,7 +257,7 @@ class RecursiveOptionParser(optparse.OptionParser):
                 errorinfo = ""
             if errorinfo:
                 msg += ": " + errorinfo
-        logging.getLogger(self.get_prog_name()).warning(msg)
+        return msg
 
     def getusagestring(self, option):
         """returns the usage string for the given option"""
@@ -391,6 +417,19 @@ class RecursiveOptionParser(optparse.OptionParser):
         )
         self.define_option(errorleveloption)
 
+    def setjobsoption(self):
+        """Sets the option to process several files at the same time."""
+        jobsoption = optparse.Option(
+            "-j",
+            "--jobs",
+            dest="jobs",
+            default=1,
+            type="int",
+            metavar="JOBS",
+            help="process JOBS files at the same time (default: 1)",
+        )
+        self.define_option(jobsoption)
+
     def getformathelp(self, formats):
         """Make a nice help string for describing formats..."""
         formats = sorted([f for f in formats if f is not None])
@@ -585,6 +624,19 @@ class RecursiveOptionParser(optparse.OptionParser):
         # sort the input files to preserve the order between runs as much as possible.
         # this makes for more merge-friendly content in single-output-file mode.
         inputfiles.sort()
+        if self.preparejobs is not None:
+            self.preparejobs(**self.getpassthroughoptions(options))
+        jobs = self.getjobs(options, inputfiles)
+        for inputpath, success, errormessage in self.processjobs(options, jobs):
+            if errormessage is not None:
+                self.warning(errormessage)
+            progress_bar.report_progress(inputpath, success)
+        del progress_bar
+
+    def getjobs(self, options, inputfiles):
+        """Yields the files to process as tuples of the input path, the file
+        processor and the full input, output and template paths.
+        """
         for inputpath in inputfiles:
             try:
                 templatepath = self.gettemplatename(options, inputpath)
@@ -613,24 +665,64 @@ class RecursiveOptionParser(optparse.OptionParser):
                     "Couldn't handle input file %s" % inputpath, options, sys.exc_info()
                 )
                 continue
-            try:
-                success = self.processfile(
-                    fileprocessor,
-                    options,
-                    fullinputpath,
-                    fulloutputpath,
-                    fulltemplatepath,
-                )
-            except Exception:
-                self.warning(
-                    "Error processing: input %s, output %s, template %s"
-                    % (fullinputpath, fulloutputpath, fulltemplatepath),
-                    options,
-                    sys.exc_info(),
-                )
-                success = False
-            progress_bar.report_progress(inputpath, success)
-        del progress_bar
+            yield (
+                inputpath,
+                fileprocessor,
+                fullinputpath,
+                fulloutputpath,
+                fulltemplatepath,
+            )
+
+    def canprocessinparallel(self, options):
+        """Checks whether the files can be processed by several processes.
+
+        This is only possible when every file is written to its own output
+        file, and when the workers can be forked to share the parser state.
+        """
+        return (
+            getattr(options, "jobs", 1) > 1
+            and options.recursiveoutput
+            and "fork" in multiprocessing.get_all_start_methods()
+        )
+
+    def processjobs(self, options, jobs):
+        """Processes the jobs, in parallel if requested, and yields the
+        results of :meth:`processjob` in the order of the jobs.
+        """
+        if not self.canprocessinparallel(options):
+            for job in jobs:
+                yield self.processjob(options, job)
+            return
+        global _jobstate
+        _jobstate = (self, options)
+        try:
+            with multiprocessing.get_context("fork").Pool(options.jobs) as pool:
+                yield from pool.imap(_processjob, jobs)
+        finally:
+            _jobstate = None
+
+    def processjob(self, options, job):
+        """Processes a single job, returning the input path, whether it
+        succeeded and the warning to show if it failed with an error.
+        """
+        inputpath, fileprocessor, fullinputpath, fulloutputpath, fulltemplatepath = job
+        try:
+            success = self.processfile(
+                fileprocessor,
+                options,
+                fullinputpath,
+                fulloutputpath,
+                fulltemplatepath,
+            )
+        except Exception:
+            errormessage = self.formatwarning(
+                "Error processing: input %s, output %s, template %s"
+                % (fullinputpath, fulloutputpath, fulltemplatepath),
+                options,
+                sys.exc_info(),
+            )
+            return inputpath, False, errormessage
+        return inputpath, success, None
 
     def openinputfile(self, options, fullinputpath):
         """Opens the input file."""
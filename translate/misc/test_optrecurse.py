@@ -31,3 +31,28 @@ class TestRecursiveOptionParser:
 
         out = parser.openoutputfile(None, None)  # To sys.stdout
         out.write(b"binary suff")
+
+    def test_jobs(self, tmpdir, caplog):
+        """test processing files with several processes"""
+        inputdir = tmpdir.mkdir("input")
+        for name in ("one", "two", "three", "bad"):
+            inputdir.join(name + ".txt").write(name)
+        outputdir = tmpdir.join("output")
+        parser = optrecurse.RecursiveOptionParser({"txt": ("po", upperprocessor)})
+        options, args = parser.parse_args(
+            ["--progress=none", "--jobs=2", str(inputdir), str(outputdir)]
+        )
+        parser.recursiveprocess(options)
+        assert outputdir.join("one.po").read() == "ONE"
+        assert outputdir.join("three.po").read() == "THREE"
+        assert "Error processing: input %s" % inputdir.join("bad.txt") in caplog.text
+        assert "ValueError: bad input" not in caplog.text
+        assert caplog.text.rstrip().endswith(": bad input")
+
+
+def upperprocessor(inputfile, outputfile, templatefile):
+    content = inputfile.read()
+    if content == b"bad":
+        raise ValueError("bad input")
+    outputfile.write(content.upper())
+    return True
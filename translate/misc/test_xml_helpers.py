@@ -1,6 +1,14 @@
 from lxml import etree
 
-from translate.misc.xml_helpers import reindent
+from translate.misc.xml_helpers import getText, reindent
+
+
+def test_gettext():
+    for xmlstring in ("<a> One\n two\t</a>", "<a> One\n <b>two</b>\t</a>", "<a/>"):
+        node = etree.fromstring(xmlstring)
+        # Without XPath for nodes without children
+        assert getText(node) == "".join(node.itertext())
+        assert getText(node, "default") == " ".join("".join(node.itertext()).split())
 
 
 class TestReindent:
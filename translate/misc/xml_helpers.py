@@ -46,6 +46,12 @@ def getText(node, xml_space="preserve"):
     optional default to use in case nothing is specified in this node.
     """
     xml_space = getXMLspace(node, xml_space)
+    if not len(node):
+        # Only text, which is much faster to get without XPath
+        text = node.text or ""
+        if xml_space == "default":
+            return normalize_space(text).strip(" ")
+        return text
     if xml_space == "default":
         return str(string_xpath_normalized(node))  # specific to lxml.etree
     else:
@@ -25,7 +25,7 @@ import re
 from operator import itemgetter
 
 from translate.misc.multistring import multistring
-from translate.search import lshtein, terminology
+from translate.search import lshtein, qgram, terminology
 from translate.storage import base, po
 
 
@@ -59,17 +59,22 @@ class matcher:
         max_length=70,
         comparer=None,
         usefuzzy=False,
+        useindex=False,
     ):
         """max_candidates is the maximum number of candidates that should be
         assembled, min_similarity is the minimum similarity that must be
         attained to be included in the result, comparer is an optional Comparer
-        with similarity() function
+        with similarity() function. If useindex is True, a q-gram index is
+        built to avoid comparing candidates that can't be similar enough; this
+        is only worth it for large translation memories.
         """
         if comparer is None:
             comparer = lshtein.LevenshteinComparer(max_length)
         self.comparer = comparer
         self.setparameters(max_candidates, min_similarity, max_length)
         self.usefuzzy = usefuzzy
+        self.useindex = useindex
+        self.index = None
         self.inittm(store)
         self.addpercentage = True
 
@@ -101,6 +106,7 @@ class matcher:
         for store in stores:
             self.extendtm(store.units, store=store, sort=False)
         self.candidates.units.sort(key=sourcelen, reverse=self.sort_reverse)
+        self.buildindex()
 
     def extendtm(self, units, store=None, sort=True):
         """Extends the memory with extra unit(s).
@@ -134,8 +140,27 @@ class matcher:
             simpleunit.addnote(candidate.getnotes(origin="translator"))
             simpleunit.fuzzy = candidate.isfuzzy()
             self.candidates.units.append(simpleunit)
+        self.index = None
         if sort:
             self.candidates.units.sort(key=sourcelen, reverse=self.sort_reverse)
+            self.buildindex()
+
+    def buildindex(self):
+        """Builds the q-gram index over the (sorted) candidates if requested.
+
+        The index is only valid for the Levenshtein comparer, so it is not
+        built if another comparer is used.
+        """
+        self.index = None
+        if (
+            self.useindex
+            and not self.sort_reverse
+            and isinstance(self.comparer, lshtein.LevenshteinComparer)
+        ):
+            self.index = qgram.QGramIndex(
+                (unit.source for unit in self.candidates.units),
+                max_len=self.comparer.MAX_LEN,
+            )
 
     def setparameters(self, max_candidates=10, min_similarity=75, max_length=70):
         """Sets the parameters without reinitialising the tm. If a parameter is
@@ -193,7 +218,28 @@ class matcher:
         stoplength = self.getstoplength(min_similarity, text)
         lowestscore = 0
 
-        for candidate in self.candidates.units[startindex:]:
+        if self.useindex and self.index is None:
+            self.buildindex()
+        if self.index is not None:
+            # Only compare with the candidates that share enough q-grams to
+            # be able to reach min_similarity. The others would be skipped
+            # in the loop below anyway, so the results are identical.
+            stopindex = startindex
+            endindex = len(self.candidates.units)
+            while stopindex < endindex:
+                mid = (stopindex + endindex) // 2
+                if sourcelen(self.candidates.units[mid]) <= stoplength:
+                    stopindex = mid + 1
+                else:
+                    endindex = mid
+            candidates = map(
+                self.candidates.units.__getitem__,
+                self.index.candidates(text, min_similarity, startindex, stopindex),
+            )
+        else:
+            candidates = self.candidates.units[startindex:]
+
+        for candidate in candidates:
             cmpstring = candidate.source
             if len(cmpstring) > stoplength:
                 break
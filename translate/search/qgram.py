@@ -0,0 +1,126 @@
+#
+# Copyright 2026 Zuza Software Foundation
+#
+# This file is part of translate.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, see <http://www.gnu.org/licenses/>.
+
+"""An inverted q-gram index to shortlist candidates for Levenshtein matching.
+
+The index uses the q-gram count filter: two strings with an edit distance of
+*k* share at least ``max(len(a), len(b)) - q + 1 - k * q`` q-grams. Strings
+that share fewer q-grams with the query can therefore never reach the
+requested similarity as calculated by
+:class:`~translate.search.lshtein.LevenshteinComparer`, and do not need to be
+compared at all.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+
+
+def qgrams(text, q=3):
+    """Returns a :class:`~collections.Counter` of the q-grams in text."""
+    return Counter(text[i : i + q] for i in range(len(text) - q + 1))
+
+
+def required_qgrams(length, min_similarity, q=3):
+    """Returns the minimum number of shared q-grams for two strings with the
+    longest being length characters to be at least min_similarity percent
+    similar.
+    """
+    # Similarity is 100 - 100 * distance / length, so this is the largest
+    # distance still allowed. The epsilon errs on the side of caution for
+    # floating point rounding.
+    maxdistance = int((100 - min_similarity) * length / 100.0 + 1e-9)
+    return length - q + 1 - maxdistance * q
+
+
+class QGramIndex:
+    """An inverted q-gram index over a list of strings sorted by length.
+
+    Strings are identified by their position in the list, so the index has to
+    be rebuilt whenever the list changes.
+    """
+
+    def __init__(self, strings, q=3, max_len=None):
+        """strings must be sorted by ascending length. Only the first max_len
+        characters of each string are indexed, as is done by the comparer.
+        """
+        self.q = q
+        self.max_len = max_len
+        self.lengths = array("I")
+        # Maps every q-gram to the (sorted) positions of the strings
+        # containing it, and the number of times it occurs in each of them.
+        self.postings = {}
+        for position, string in enumerate(strings):
+            string = string[:max_len]
+            self.lengths.append(len(string))
+            for gram, count in qgrams(string, q).items():
+                try:
+                    positions, counts = self.postings[gram]
+                except KeyError:
+                    positions, counts = self.postings[gram] = (array("I"), array("I"))
+                positions.append(position)
+                counts.append(count)
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def required(self, length, min_similarity):
+        """Returns the minimum number of shared q-grams, see
+        :func:`required_qgrams`.
+        """
+        return required_qgrams(length, min_similarity, self.q)
+
+    def candidates(self, text, min_similarity, start=0, end=None):
+        """Returns the sorted positions in [start, end) of all strings that
+        could be at least min_similarity percent similar to text.
+        """
+        if end is None:
+            end = len(self.lengths)
+        text = str(text)[: self.max_len]
+        textlen = len(text)
+
+        shared = {}
+        for gram, textcount in qgrams(text, self.q).items():
+            try:
+                positions, counts = self.postings[gram]
+            except KeyError:
+                continue
+            for i in range(bisect_left(positions, start), bisect_left(positions, end)):
+                position = positions[i]
+                shared[position] = shared.get(position, 0) + min(textcount, counts[i])
+
+        # Walk the window one length at a time: short strings might need no
+        # shared q-grams at all, while the others need a number depending on
+        # their length.
+        shortlist = []
+        required = {}
+        lengths = self.lengths
+        position = start
+        while position < end:
+            length = lengths[position]
+            nextposition = bisect_right(lengths, length, position, end)
+            required[length] = self.required(max(length, textlen), min_similarity)
+            if required[length] <= 0:
+                shortlist.extend(range(position, nextposition))
+            position = nextposition
+        for position, count in shared.items():
+            needed = required[lengths[position]]
+            if needed > 0 and count >= needed:
+                shortlist.append(position)
+        shortlist.sort()
+        return shortlist
@@ -128,3 +128,42 @@ class TestMatch:
         assert candidates == ["preorder"]
         candidates = self.candidatestrings(matcher.matches("You can pre order"))
         assert candidates == ["pre order"]
+
+    def test_index(self):
+        """Test that the q-gram index gives the same results as a full scan"""
+        sources = [
+            "Open file",
+            "Open file...",
+            "Open a file",
+            "Open the selected file",
+            "Close file",
+            "Save file as...",
+            "Ek skop die bal",
+            "Hy skop die bal",
+            "Jannie skop die bal",
+            "Ek skop die balle",
+            "Niemand skop die bal nie",
+            "hand",
+            "pond",
+            "haas",
+        ]
+        csvfile = self.buildcsv(sources)
+        scanner = match.matcher(csvfile, max_candidates=1, min_similarity=50)
+        indexed = match.matcher(
+            csvfile, max_candidates=1, min_similarity=50, useindex=True
+        )
+        assert indexed.index is not None
+        for text in sources + ["Open files", "Ek skop die bal nie", "hond", "xyz"]:
+            assert self.candidatestrings(indexed.matches(text)) == (
+                self.candidatestrings(scanner.matches(text))
+            )
+
+    def test_index_extendtm(self):
+        """Test that the q-gram index is updated when extending the TM"""
+        message = "Open file..."
+        csvfile1 = self.buildcsv(["Close application", "Do something"])
+        matcher = match.matcher([csvfile1], useindex=True)
+        assert self.candidatestrings(matcher.matches(message)) == []
+        csvfile2 = self.buildcsv(["Open file"])
+        matcher.extendtm(csvfile2.units, store=csvfile2)
+        assert self.candidatestrings(matcher.matches(message)) == ["Open file"]
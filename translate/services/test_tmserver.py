@@ -1,13 +1,16 @@
+import asyncio
 import json
 import os
 import shutil
 import tempfile
 import threading
-from urllib.request import urlopen
+from io import BytesIO
+from urllib.request import Request, urlopen
 
 from cheroot.wsgi import Server
 from pytest import mark
 
+from translate.misc import asgi
 from translate.services.tmserver import TMServer
 
 
@@ -29,7 +32,8 @@ msgstr "Ahoj"
         return test_dir, application
 
     def cleanup(self, test_dir, application):
-        application.tmdb.connection.close()
+        application.executor.shutdown()
+        application.tmdb.close()
         shutil.rmtree(test_dir)
 
     def test_import(self):
@@ -59,3 +63,91 @@ msgstr "Ahoj"
         server.stop()
         thread.join()
         self.cleanup(test_dir, application)
+
+    @mark.skipif(os.name == "nt", reason="can not delete non closed files")
+    def test_server_batch(self):
+        """Test looking up several strings in one request"""
+        test_dir, application = self.create_server(max_workers=2)
+
+        server = Server(("localhost", 0), application.rest)
+        server.prepare()
+        server_port = server.bind_addr[1]
+        thread = threading.Thread(target=server.serve)
+        thread.start()
+
+        request = Request(
+            f"http://localhost:{server_port}/en/cs/units/",
+            data=json.dumps(["Hello", "Goodbye", "Hello!"]).encode("utf-8"),
+        )
+        payload = json.loads(urlopen(request).read().decode("utf-8"))
+        assert len(payload) == 3
+        assert payload[0][0]["target"] == "Ahoj"
+        assert payload[1] == []
+        assert payload[2][0]["source"] == "Hello"
+
+        server.stop()
+        thread.join()
+        self.cleanup(test_dir, application)
+
+    def test_batch_invalid(self):
+        """Test that batch requests need a list of source strings"""
+        test_dir, application = self.create_server()
+        for body in (b'"Hello"', b'["Hello", 1]', b"{", b'{"source": "Hello"}'):
+            environ = {
+                "REQUEST_METHOD": "POST",
+                "PATH_INFO": "/en/cs/units/",
+                "CONTENT_LENGTH": str(len(body)),
+                "wsgi.input": BytesIO(body),
+            }
+            statuses = []
+            application.rest(environ, lambda status, headers: statuses.append(status))
+            assert statuses == ["400 Bad Request"]
+        self.cleanup(test_dir, application)
+
+    def test_store_stats(self):
+        """Test the database and cache statistics"""
+        test_dir, application = self.create_server()
+        application.tmdb.translate_unit("Hello", "en", "cs")
+        application.tmdb.translate_unit("Hello", "en", "cs")
+        environ = {"REQUEST_METHOD": "GET", "PATH_INFO": "/en/cs/store/test.po"}
+        response = application.rest(environ, lambda status, headers: None)
+        stats = json.loads(b"".join(response).decode("utf-8"))
+        assert stats["targets"] == 1
+        assert stats["cache"]["hits"] == 1
+        assert stats["cache"]["misses"] == 1
+        self.cleanup(test_dir, application)
+
+    def test_asgi(self):
+        """Test the asyncio based application"""
+        test_dir, application = self.create_server()
+        body = json.dumps(["Hello"]).encode("utf-8")
+        messages = [
+            {"type": "http.request", "body": body[:3], "more_body": True},
+            {"type": "http.request", "body": body[3:]},
+        ]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            "type": "http",
+            "method": "POST",
+            "path": "/en/cs/units/",
+            "headers": [(b"content-type", b"application/json")],
+        }
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(
+                asgi.WSGIApplication(application.rest)(scope, receive, send)
+            )
+        finally:
+            loop.close()
+        assert sent[0]["status"] == 200
+        assert (b"content-type", b"text/plain") in sent[0]["headers"]
+        payload = json.loads(sent[1]["body"].decode("utf-8"))
+        assert payload[0][0]["target"] == "Ahoj"
+        self.cleanup(test_dir, application)
@@ -23,10 +23,11 @@ clients using JSON over HTTP.
 import json
 import logging
 from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 from urllib import parse
 
-from translate.misc import selector, wsgi
+from translate.misc import asgi, selector, wsgi
 from translate.storage import base, tmdb
 
 
@@ -43,19 +44,28 @@ class TMServer:
         prefix="",
         source_lang=None,
         target_lang=None,
+        max_workers=None,
+        cache_size=1024,
     ):
         if not isinstance(tmdbfile, str):
             import sys
 
             tmdbfile = tmdbfile.decode(sys.getfilesystemencoding())
 
-        self.tmdb = tmdb.TMDB(tmdbfile, max_candidates, min_similarity, max_length)
+        self.tmdb = tmdb.TMDB(
+            tmdbfile, max_candidates, min_similarity, max_length, cache_size
+        )
 
         if tmfiles:
             self._load_files(tmfiles, source_lang, target_lang)
 
+        # batch lookups are spread over a pool of threads, each of them using
+        # its own database connection
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
         # initialize url dispatcher
         self.rest = selector.Selector(prefix=prefix)
+        self.rest.add("/{slang}/{tlang}/units/", POST=self.translate_units)
         self.rest.add(
             "/{slang}/{tlang}/unit/{uid:any}",
             GET=self.translate_unit,
@@ -88,14 +98,38 @@ class TMServer:
         start_response("200 OK", [("Content-type", "text/plain")])
         candidates = self.tmdb.translate_unit(uid, slang, tlang)
         logging.debug("candidates: %s", str(candidates))
-        response = json.dumps(candidates, indent=4).encode("utf-8")
+        response = json.dumps(candidates, indent=4)
         params = parse.parse_qs(environ.get("QUERY_STRING", ""))
         try:
             callback = params.get("callback", [])[0]
             response = f"{callback}({response})"
         except IndexError:
             pass
-        return [response]
+        return [response.encode("utf-8")]
+
+    @selector.opliant
+    def translate_units(self, environ, start_response, slang, tlang):
+        """Return the candidates for each of the source strings in a JSON list
+        from POST data, in the same order.
+        """
+        try:
+            sources = json.loads(
+                environ["wsgi.input"].read(int(environ["CONTENT_LENGTH"]))
+            )
+        except ValueError:
+            sources = None
+        if not isinstance(sources, list) or not all(
+            isinstance(source, str) for source in sources
+        ):
+            start_response("400 Bad Request", [("Content-type", "text/plain")])
+            return [b"400 Bad Request\n\nExpected a JSON list of source strings."]
+        start_response("200 OK", [("Content-type", "text/plain")])
+        candidates = list(
+            self.executor.map(
+                lambda source: self.tmdb.translate_unit(source, slang, tlang), sources
+            )
+        )
+        return [json.dumps(candidates, indent=4).encode("utf-8")]
 
     @selector.opliant
     def add_unit(self, environ, start_response, uid, slang, tlang):
@@ -105,7 +139,7 @@ class TMServer:
         unit = base.TranslationUnit(data["source"])
         unit.target = data["target"]
         self.tmdb.add_unit(unit, slang, tlang)
-        return [""]
+        return [b""]
 
     @selector.opliant
     def update_unit(self, environ, start_response, uid, slang, tlang):
@@ -115,7 +149,7 @@ class TMServer:
         unit = base.TranslationUnit(data["source"])
         unit.target = data["target"]
         self.tmdb.add_unit(unit, slang, tlang)
-        return [""]
+        return [b""]
 
     @selector.opliant
     def forget_unit(self, environ, start_response, uid):
@@ -123,15 +157,16 @@ class TMServer:
         start_response("200 OK", [("Content-type", "text/plain")])
         # uid = unicode(urllib.unquote_plus(uid), "utf-8")
 
-        return ["FIXME"]
+        return [b"FIXME"]
 
     @selector.opliant
-    def get_store_stats(self, environ, start_response, sid):
-        # FIXME: implement me
+    def get_store_stats(self, environ, start_response, sid, slang, tlang):
+        """Return the database statistics for the language pair and the
+        suggestion cache counters.
+        """
         start_response("200 OK", [("Content-type", "text/plain")])
-        # sid = unicode(urllib.unquote_plus(sid), "utf-8")
-
-        return ["FIXME"]
+        stats = self.tmdb.get_stats(slang, tlang)
+        return [json.dumps(stats, indent=4).encode("utf-8")]
 
     @selector.opliant
     def upload_store(self, environ, start_response, sid, slang, tlang):
@@ -144,7 +179,7 @@ class TMServer:
         store = factory.getobject(data)
         count = self.tmdb.add_store(store, slang, tlang)
         response = "added %d units from %s" % (count, sid)
-        return [response]
+        return [response.encode("utf-8")]
 
     @selector.opliant
     def add_store(self, environ, start_response, sid, slang, tlang):
@@ -153,7 +188,7 @@ class TMServer:
         units = json.loads(environ["wsgi.input"].read(int(environ["CONTENT_LENGTH"])))
         count = self.tmdb.add_list(units, slang, tlang)
         response = "added %d units from %s" % (count, sid)
-        return [response]
+        return [response.encode("utf-8")]
 
     @selector.opliant
     def forget_store(self, environ, start_response, sid):
@@ -161,7 +196,7 @@ class TMServer:
         start_response("200 OK", [("Content-type", "text/plain")])
         # sid = unicode(urllib.unquote_plus(sid), "utf-8")
 
-        return ["FIXME"]
+        return [b"FIXME"]
 
 
 def main():
@@ -228,6 +263,27 @@ def main():
         default=1000,
         help="Maxmimum string length",
     )
+    parser.add_argument(
+        "--cache-size",
+        dest="cache_size",
+        type=int,
+        default=1024,
+        help="number of cached suggestions (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--max-workers",
+        dest="max_workers",
+        type=int,
+        default=None,
+        help="number of threads looking up batch requests",
+    )
+    parser.add_argument(
+        "--asgi",
+        action="store_true",
+        dest="asgi",
+        default=False,
+        help="serve using the asyncio based uvicorn server",
+    )
     parser.add_argument(
         "--debug",
         action="store_true",
@@ -255,8 +311,13 @@ def main():
         prefix="/tmserver",
         source_lang=args.source_lang,
         target_lang=args.target_lang,
+        max_workers=args.max_workers,
+        cache_size=args.cache_size,
     )
-    wsgi.launch_server(args.bind, args.port, application.rest)
+    if args.asgi:
+        asgi.launch_server(args.bind, args.port, application.rest)
+    else:
+        wsgi.launch_server(args.bind, args.port, application.rest)
 
 
 if __name__ == "__main__":
@@ -21,6 +21,7 @@
 import codecs
 import logging
 import pickle
+import re
 from collections import OrderedDict
 from io import BytesIO
 
@@ -29,17 +30,20 @@ from translate.storage.placeables import StringElem, parse as rich_parse
 from translate.storage.workflow import StateEnum as states
 
 
-# Simple BOM based encoding detection
+# Simple BOM based encoding detection, the UTF-32 BOMs come first as the
+# little endian one starts with the little endian UTF-16 BOM
 ENCODING_BOMS = (
     (codecs.BOM_UTF8, "utf-8-sig"),
-    (codecs.BOM_UTF16, "utf-16"),
-    (codecs.BOM_UTF16_BE, "utf-16-be"),
-    (codecs.BOM_UTF16_LE, "utf-16-le"),
     (codecs.BOM_UTF32, "utf-32"),
     (codecs.BOM_UTF32_BE, "utf-32-be"),
     (codecs.BOM_UTF32_LE, "utf-32-le"),
+    (codecs.BOM_UTF16, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
 )
 
+NON_ASCII_RE = re.compile(b"[\x80-\xff]")
+
 
 class ParseError(Exception):
     def __init__(self, inner_exc):
@@ -519,6 +523,9 @@ class TranslationStore:
     for a unit"""
 
     default_encoding = "utf-8"
+    encoding_sample_size = 65536
+    """The number of bytes from the first non-ASCII one that chardet looks at
+    when a file has no BOM and is not UTF-8."""
     sourcelanguage = None
     targetlanguage = None
 
@@ -774,26 +781,83 @@ class TranslationStore:
                 return {"encoding": encoding, "confidence": 1.0}
         return None
 
+    def sample_detection(self, text, sample_size=None):
+        """
+        Detection with the chardet lib, if available, on `sample_size` bytes
+        of `text` (:attr:`encoding_sample_size` by default).
+
+        The sample starts at the first non-ASCII byte, as any ASCII text
+        before it does not tell encodings apart.
+        """
+        try:
+            from chardet.universaldetector import UniversalDetector
+        except ImportError:
+            return None
+        if sample_size is None:
+            sample_size = self.encoding_sample_size
+        non_ascii = NON_ASCII_RE.search(text)
+        end = (non_ascii.start() if non_ascii else 0) + sample_size
+        detector = UniversalDetector()
+        # many false complaints with ellipse (…) (see bug 1825)
+        sample = text[:end].replace(b"\xe2\x80\xa6", b"")
+        for start in range(0, len(sample), 4096):
+            detector.feed(sample[start : start + 4096])
+            if detector.done:
+                break
+        detected_encoding = detector.close()
+        if not detected_encoding["encoding"] or detected_encoding["confidence"] < 0.48:
+            return None
+        if detected_encoding["encoding"] == "ascii":
+            detected_encoding["encoding"] = self.encoding
+        else:
+            detected_encoding["encoding"] = detected_encoding["encoding"].lower()
+        return detected_encoding
+
     def detect_encoding(self, text, default_encodings=None):
         """
         Try to detect a file encoding from `text`, using either the chardet lib
         or by trying to decode the file.
+
+        Files with a BOM or that are valid UTF-8 are recognised without
+        chardet, which only looks at a sample of other files (see
+        :meth:`sample_detection`), unless the encoding detected on the
+        sample cannot decode the whole file.
         """
         if not default_encodings:
             default_encodings = ["utf-8"]
-        try:
-            import chardet
-        except ImportError:
-            detected_encoding = self.fallback_detection(text)
+        # texts already decoded while detecting, by encoding
+        decoded = {}
+        detected_encoding = self.fallback_detection(text)
+        if detected_encoding:
+            method = "BOM"
         else:
-            # many false complaints with ellipse (…) (see bug 1825)
-            detected_encoding = chardet.detect(text.replace(b"\xe2\x80\xa6", b""))
-            if detected_encoding["confidence"] < 0.48:
-                detected_encoding = None
-            elif detected_encoding["encoding"] == "ascii":
-                detected_encoding["encoding"] = self.encoding
+            try:
+                decoded["utf-8"] = str(text, "utf-8")
+            except UnicodeDecodeError:
+                method = "chardet"
+                detected_encoding = self.sample_detection(text)
+                if detected_encoding:
+                    try:
+                        decoded[detected_encoding["encoding"]] = str(
+                            text, detected_encoding["encoding"]
+                        )
+                    except (UnicodeDecodeError, LookupError):
+                        method = "chardet on the whole text"
+                        detected_encoding = self.sample_detection(text, len(text))
             else:
-                detected_encoding["encoding"] = detected_encoding["encoding"].lower()
+                method = "UTF-8 decoding"
+                if len(decoded["utf-8"]) == len(text):
+                    # Only ASCII characters
+                    detected_encoding = {"encoding": self.encoding, "confidence": 1.0}
+                else:
+                    detected_encoding = {"encoding": "utf-8", "confidence": 0.99}
+        logging.debug(
+            "detected encoding of %s (%d bytes) by %s: %s",
+            getattr(self, "filename", None) or "given string",
+            len(text),
+            method,
+            detected_encoding,
+        )
 
         encodings = []
         # Purposefully accessed the internal _encoding, as encoding is never 'auto'
@@ -817,7 +881,7 @@ class TranslationStore:
                 logging.warning(
                     "trying to parse %s with encoding: %s but "
                     "detected encoding is %s (confidence: %s)",
-                    self.filename,
+                    getattr(self, "filename", None) or "given string",
                     self.encoding,
                     detected_encoding["encoding"],
                     detected_encoding["confidence"],
@@ -827,6 +891,10 @@ class TranslationStore:
             encodings.append(self.encoding)
 
         for encoding in encodings:
+            if encoding in decoded:
+                r_text = decoded[encoding]
+                r_encoding = encoding
+                break
             try:
                 r_text = str(text, encoding)
                 r_encoding = encoding
@@ -885,6 +953,16 @@ class TranslationStore:
         newstore._assignname()
         return newstore
 
+    @classmethod
+    def iterparse(cls, storefile):
+        """Reads the given file (or opens the given filename) and yields its
+        units one at a time.
+
+        Stores that can be parsed incrementally override this to avoid
+        holding all the units in memory.
+        """
+        yield from cls.parsefile(storefile).units
+
     @property
     def merge_on(self):
         """The matching criterion to use when merging on.
@@ -23,7 +23,9 @@ import pstats
 import random
 import sys
 from importlib import import_module
+from io import BytesIO
 
+from translate.filters import checks
 from translate.storage import factory, placeables
 
 
@@ -102,11 +104,19 @@ class TranslateBenchmarker:
         for dirpath, subdirs, filenames in os.walk(file_dir, topdown=False):
             for name in filenames:
                 pofilename = os.path.join(dirpath, name)
-                parsedfile = self.StoreClass(open(pofilename))
+                parsedfile = self.StoreClass.parsefile(pofilename)
                 count += len(parsedfile.units)
                 self.parsedfiles.append(parsedfile)
         print("counted %d units" % count)
 
+    def serialize_files(self):
+        """serializes all the parsed files"""
+        count = 0
+        for parsedfile in self.parsedfiles:
+            parsedfile.serialize(BytesIO())
+            count += len(parsedfile.units)
+        print("counted %d units" % count)
+
     def parse_placeables(self):
         """parses placeables"""
         count = 0
@@ -117,6 +127,18 @@ class TranslateBenchmarker:
             count += len(parsedfile.units)
         print("counted %d units" % count)
 
+    def run_checks(self):
+        """runs the standard pofilter checks on all units"""
+        count = 0
+        checker = checks.TeeChecker(
+            checkerclasses=[checks.StandardChecker, checks.StandardUnitChecker]
+        )
+        for parsedfile in self.parsedfiles:
+            for unit in parsedfile.units:
+                checker.run_filters(unit)
+            count += len(parsedfile.units)
+        print("counted %d units" % count)
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Process some integers.")
@@ -130,8 +152,7 @@ if __name__ == "__main__":
     parser.add_argument(
         "--store-type",
         dest="storetype",
-        action="store_const",
-        const="po",
+        choices=["po", "mo"],
         default="po",
         help="type of the store to benchmark (default: %(default)s)",
     )
@@ -141,18 +162,30 @@ if __name__ == "__main__":
         action="store_true",
         help="benchmark parsing files",
     )
+    parser.add_argument(
+        "--check-serializing",
+        dest="check_serializing",
+        action="store_true",
+        help="benchmark serializing files",
+    )
     parser.add_argument(
         "--check-placeables",
         dest="check_placeables",
         action="store_true",
         help="benchmark placeables",
     )
+    parser.add_argument(
+        "--check-filters",
+        dest="check_filters",
+        action="store_true",
+        help="benchmark quality checks",
+    )
     args = parser.parse_args()
 
     storetype = args.storetype
 
-    if storetype in factory.classes_str:
-        _module, _class = factory.classes_str[storetype]
+    if storetype in factory._classes_str:
+        _module, _class = factory._classes_str[storetype]
         module = import_module("translate.storage.%s" % _module)
         storeclass = getattr(module, _class)
     else:
@@ -193,9 +226,15 @@ if __name__ == "__main__":
         if args.check_parsing:
             methods.append(("parse_files", ""))
 
+        if args.check_serializing:
+            methods.append(("serialize_files", ""))
+
         if args.check_placeables:
             methods.append(("parse_placeables", ""))
 
+        if args.check_filters:
+            methods.append(("run_checks", ""))
+
         for methodname, methodparam in methods:
             print("_______________________________________________________")
             statsfile = (
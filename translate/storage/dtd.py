@@ -99,6 +99,9 @@ accesskeysuffixes = (".accesskey", ".accessKey", ".akey")
 """Accesskey Suffixes: entries with this suffix may be combined with labels
 ending in :attr:`.labelsuffixes` into accelerator notation"""
 
+entity_closing_re = re.compile(r"[\"']\s*>")
+"""Matches lines that start by closing a multiline entity definition"""
+
 
 def quoteforandroid(source):
     """Escapes a line for Android DTD files."""
@@ -305,6 +308,12 @@ class dtdunit(base.TranslationUnit):
 
     def parse(self, dtdsrc):
         """read the first dtd element from the source code into this object, return linesprocessed"""
+        return self.parselines(dtdsrc.split("\n") if dtdsrc else ())
+
+    def parselines(self, lines):
+        """read the first dtd element from the lines (without their newlines)
+        into this object, return linesprocessed
+        """
         self.comments = []
         # make all the lists the same
         self._locfilenotes = self.comments
@@ -318,9 +327,6 @@ class dtdunit(base.TranslationUnit):
         # self.comments = []
         self.entity = None
         self.definition = ""
-        if not dtdsrc:
-            return 0
-        lines = dtdsrc.split("\n")
         linesprocessed = 0
         comment = ""
         for line in lines:
@@ -558,29 +564,43 @@ class dtdfile(base.TranslationStore):
 
     def parse(self, dtdsrc):
         """read the source code of a dtd file in and include them as dtdunits in self.units"""
+        try:
+            lines = dtdsrc.decode(self.encoding).split("\n")
+        except UnicodeDecodeError:
+            lines = []
+            for lineno, line in enumerate(dtdsrc.split(b"\n"), 1):
+                try:
+                    lines.append(line.decode(self.encoding))
+                except UnicodeDecodeError as e:
+                    warnings.warn(
+                        "%s\nSkipping line %d that could not be decoded:\n%s"
+                        % (e, lineno, line)
+                    )
         start = 0
         end = 0
-        lines = dtdsrc.split(b"\n")
         while end < len(lines):
             if start == end:
                 end += 1
             foundentity = False
             while end < len(lines):
-                if end >= len(lines):
-                    break
-                if lines[end].find(b"<!ENTITY") > -1:
+                if "<!ENTITY" in lines[end]:
                     foundentity = True
-                if foundentity and re.match(br"[\"']\s*>", lines[end]):
+                if foundentity and entity_closing_re.match(lines[end]):
                     end += 1
                     break
                 end += 1
 
             linesprocessed = 1  # to initialise loop
             while linesprocessed >= 1:
+                if end - start == 1 and not lines[start]:
+                    # only the empty string after the last newline is left
+                    break
                 newdtd = dtdunit(android=self.android)
                 try:
-                    linesprocessed = newdtd.parse(
-                        (b"\n".join(lines[start:end])).decode(self.encoding)
+                    # the units are parsed straight from the decoded lines,
+                    # without joining (and splitting) the rest of the file
+                    linesprocessed = newdtd.parselines(
+                        lines[i] for i in range(start, end)
                     )
                     if linesprocessed >= 1 and (
                         not newdtd.isblank() or newdtd.unparsedlines
@@ -589,18 +609,18 @@ class dtdfile(base.TranslationStore):
                 except Exception as e:
                     warnings.warn(
                         "%s\nError occured between lines %d and %d:\n%s"
-                        % (e, start + 1, end, b"\n".join(lines[start:end]))
+                        % (e, start + 1, end, "\n".join(lines[start:end]))
                     )
                 start += linesprocessed
 
     def serialize(self, out):
         """Write content to file"""
-        content = b""
+        chunks = []
         for dtd in self.units:
             unit_str = str(dtd).encode(self.encoding)
             out.write(unit_str)
-            content += unit_str
-        if not self._valid_store(content):
+            chunks.append(unit_str)
+        if not self._valid_store(b"".join(chunks)):
             warnings.warn("DTD file '%s' does not validate" % self.filename)
             out.truncate(0)
 
@@ -615,7 +635,7 @@ class dtdfile(base.TranslationStore):
         # Android files are invalid DTDs
         if not self.android:
             # #expand is a Mozilla hack and are removed as they are not valid in DTDs
-            _input = re.sub(b"#expand", b"", content)
+            _input = content.replace(b"#expand", b"")
             try:
                 etree.DTD(BytesIO(_input))
             except etree.DTDParseError as e:
@@ -240,6 +240,41 @@ def getobject(
     return store
 
 
+def iterunits(
+    storefile,
+    localfiletype=None,
+    ignore=None,
+    classes=None,
+    classes_str=None,
+    hiddenclasses=None,
+):
+    """Factory that yields the units of the file presented one at a time.
+
+    :type storefile: file or str
+    :param storefile: File object or file name.
+
+    Formats that can be parsed incrementally, like Gettext PO, never hold
+    the whole file in memory.
+    """
+    storefilename = _getname(storefile)
+    storeclass = getclass(
+        storefile,
+        localfiletype,
+        ignore,
+        classes=classes,
+        classes_str=classes_str,
+        hiddenclasses=hiddenclasses,
+    )
+    name, ext = os.path.splitext(storefilename)
+    ext = ext[len(os.path.extsep) :].lower()
+    if ext in decompressclass:
+        _file = import_class(*decompressclass[ext])
+        with _file(storefilename) as storefile:
+            yield from storeclass.iterparse(storefile)
+    else:
+        yield from storeclass.iterparse(storefile)
+
+
 supported = [
     (
         "Gettext PO file",
@@ -18,6 +18,8 @@
 
 """Parent class for LISA standards (TMX, TBX, XLIFF)"""
 
+import itertools
+
 from lxml import etree
 
 from translate.lang import data
@@ -291,11 +293,16 @@ class LISAfile(base.TranslationStore):
         """
         return namespaced(self.namespace, name)
 
+    @classmethod
+    def detect_namespace(cls, root):
+        """Returns the namespace of the document with the given root element."""
+        return root.nsmap.get(None, None)
+
     def initbody(self):
         """Initialises self.body so it never needs to be retrieved from the XML
         again.
         """
-        self.namespace = self.document.getroot().nsmap.get(None, None)
+        self.namespace = self.detect_namespace(self.document.getroot())
         self.body = self.document.find("//%s" % self.namespaced(self.bodyNode))
 
     def addsourceunit(self, source):
@@ -338,3 +345,51 @@ class LISAfile(base.TranslationStore):
         ):
             term = self.UnitClass.createfromxmlElement(entry)
             self.addunit(term, new=False)
+
+    @classmethod
+    def iterparse(cls, storefile):
+        """Reads the given file (or opens the given filename) and yields its
+        units one at a time.
+
+        Unlike :meth:`parsefile` the units are not collected in a store, and
+        every unit is removed from the document when the next one is read, so
+        huge files can be processed in constant memory. Anything that depends
+        on the rest of the document (like the file a XLIFF unit belongs to)
+        is therefore only available until the next unit is read. The units
+        belong to a store without units on the document parsed so far, which
+        provides the languages.
+        """
+        unittag = None
+        for _event, element in etree.iterparse(
+            storefile,
+            tag="{*}%s" % cls.UnitClass.rootNode,
+            strip_cdata=False,
+            resolve_entities=False,
+        ):
+            if unittag is None:
+                root = element.getroottree().getroot()
+                namespace = cls.detect_namespace(root)
+                assert root.tag == namespaced(namespace, cls.rootNode)
+                unittag = namespaced(namespace, cls.UnitClass.rootNode)
+                store = cls()
+                if isinstance(storefile, str):
+                    store.filename = storefile
+                else:
+                    store.filename = getattr(storefile, "name", "")
+                store.document = element.getroottree()
+                store.initbody()
+            if element.tag != unittag:
+                continue
+            unit = cls.UnitClass.createfromxmlElement(element)
+            unit.namespace = namespace
+            unit._store = store
+            yield unit
+            # The element itself is kept, its tail is still being parsed.
+            # Earlier siblings of its ancestors (like the groups and files
+            # of XLIFF) are finished as well.
+            for node in itertools.chain((element,), element.iterancestors()):
+                parent = node.getparent()
+                if parent is None:
+                    break
+                while node.getprevious() is not None:
+                    del parent[0]
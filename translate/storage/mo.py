@@ -39,6 +39,8 @@ in very small files.
 """
 
 import array
+import math
+import mmap
 import re
 import struct
 
@@ -66,17 +68,18 @@ def my_swap4(result):
 
 
 def hashpjw(str_param):
-    HASHWORDBITS = 32
+    # Like hash_string() in gettext, only the bytes up to the first NUL are
+    # hashed, so plural messages are found by their singular msgid.
+    # HASHWORDBITS is 32: the masks and shifts below are 0xF << 28 and 24
     hval = 0
-    g = None
-    s = str_param
     for s in str_param:
-        hval = hval << 4
-        hval += s
-        g = hval & 0xF << (HASHWORDBITS - 4)
-        if g != 0:
-            hval = hval ^ g >> (HASHWORDBITS - 8)
-            hval = hval ^ g
+        if not s:
+            break
+        hval = (hval << 4) + s
+        g = hval & 0xF0000000
+        if g:
+            hval ^= g >> 24
+            hval ^= g
     return hval
 
 
@@ -90,7 +93,7 @@ def get_next_prime_number(start):
         if (num == 2) or (num == 3):
             return True
         # check for numbers > 4
-        for divider in range(2, num // 2):
+        for divider in range(2, int(math.sqrt(num)) + 1):
             if num % divider == 0:
                 return False
         return True
@@ -192,50 +195,54 @@ class mofile(poheader.poheader, base.TranslationStore):
             if unit.target:
                 MESSAGES[source] = target
         # using "I" works for 32- and 64-bit systems, but not for 16-bit!
-        hash_table = array.array("I", [0] * hash_size)
+        hash_table = array.array("I", [0]) * hash_size
         # the keys are sorted in the .mo file
         keys = sorted(MESSAGES.keys())
-        offsets = []
-        ids = strs = b""
+        # The string table first has the list of keys, then the list of values.
+        # Each entry has first the size of the string, then the file offset
+        # relative to the start of the keys or values.
+        koffsets = array.array("I")
+        voffsets = array.array("I")
+        ids = bytearray()
+        strs = bytearray()
         for i, id in enumerate(keys):
             # For each string, we need size and file offset.  Each string is
             # NUL terminated; the NUL does not count into the size.
             # TODO: We don't do any encoding detection from the PO Header
             add_to_hash_table(id, i)
             string = MESSAGES[id]  # id already encoded for use as dictionary key
-            offsets.append((len(ids), len(id), len(strs), len(string)))
-            ids = ids + id + b"\0"
-            strs = strs + string + b"\0"
-        output = ""
+            koffsets.extend((len(id), len(ids)))
+            voffsets.extend((len(string), len(strs)))
+            ids += id
+            ids.append(0)
+            strs += string
+            strs.append(0)
         # The header is 7 32-bit unsigned integers
         keystart = 7 * 4 + 16 * len(keys) + hash_size * 4
         # and the values start after the keys
         valuestart = keystart + len(ids)
-        koffsets = []
-        voffsets = []
-        # The string table first has the list of keys, then the list of values.
-        # Each entry has first the size of the string, then the file offset.
-        for o1, l1, o2, l2 in offsets:
-            koffsets = koffsets + [l1, o1 + keystart]
-            voffsets = voffsets + [l2, o2 + valuestart]
-        offsets = koffsets + voffsets
-        output = struct.pack(
-            "Iiiiiii",
-            MO_MAGIC_NUMBER,  # Magic
-            0,  # Version
-            len(keys),  # # of entries
-            7 * 4,  # start of key index
-            7 * 4 + len(keys) * 8,  # start of value index
-            hash_size,  # size of hash table
-            7 * 4 + 2 * (len(keys) * 8),
+        for i in range(1, len(koffsets), 2):
+            koffsets[i] += keystart
+            voffsets[i] += valuestart
+        out.write(
+            struct.pack(
+                "Iiiiiii",
+                MO_MAGIC_NUMBER,  # Magic
+                0,  # Version
+                len(keys),  # # of entries
+                7 * 4,  # start of key index
+                7 * 4 + len(keys) * 8,  # start of value index
+                hash_size,  # size of hash table
+                7 * 4 + 2 * (len(keys) * 8),
+            )
         )  # offset of hash table
         # additional data is not necessary for empty mo files
         if len(keys) > 0:
-            output = output + array.array("i", offsets).tobytes()
-            output = output + hash_table.tobytes()
-            output = output + ids
-            output = output + strs
-        return out.write(output)
+            out.write(koffsets.tobytes())
+            out.write(voffsets.tobytes())
+            out.write(hash_table.tobytes())
+            out.write(ids)
+            out.write(strs)
 
     def parse(self, input):
         """parses the given file or file source string"""
@@ -247,6 +254,14 @@ class mofile(poheader.poheader, base.TranslationStore):
             mosrc = input.read()
             input.close()
             input = mosrc
+        endian, lenkeys, startkey, startvalue = self._readheader(input)[:4]
+        for i in range(lenkeys):
+            self.addunit(self._readunit(input, endian, startkey, startvalue, i))
+
+    def _readheader(self, input):
+        """Returns the byte order and the table layout of the MO data in
+        input.
+        """
         (little,) = struct.unpack("<L", input[:4])
         (big,) = struct.unpack(">L", input[:4])
         if little == MO_MAGIC_NUMBER:
@@ -270,35 +285,214 @@ class mofile(poheader.poheader, base.TranslationStore):
                 """Unable to process version %d.%d MO files"""
                 % (version_maj, version_min)
             )
-        for i in range(lenkeys):
-            nextkey = startkey + (i * 2 * 4)
-            nextvalue = startvalue + (i * 2 * 4)
-            klength, koffset = struct.unpack(
-                "%sii" % endian, input[nextkey : nextkey + (2 * 4)]
+        return endian, lenkeys, startkey, startvalue, sizehash, offsethash
+
+    def _readunit(self, input, endian, startkey, startvalue, i):
+        """Returns the i-th message of the MO data in input as a unit."""
+        nextkey = startkey + (i * 2 * 4)
+        nextvalue = startvalue + (i * 2 * 4)
+        klength, koffset = struct.unpack(
+            "%sii" % endian, input[nextkey : nextkey + (2 * 4)]
+        )
+        vlength, voffset = struct.unpack(
+            "%sii" % endian, input[nextvalue : nextvalue + (2 * 4)]
+        )
+        source = input[koffset : koffset + klength]
+        context = None
+        if b"\x04" in source:
+            context, source = source.split(b"\x04")
+        # Still need to handle KDE comments
+        if source == "":
+            charset = re.search(
+                b"charset=([^\\s]+)", input[voffset : voffset + vlength]
             )
-            vlength, voffset = struct.unpack(
-                "%sii" % endian, input[nextvalue : nextvalue + (2 * 4)]
+            if charset:
+                self.encoding = charset.group(1)
+        source = multistring([s.decode(self.encoding) for s in source.split(b"\0")])
+        target = multistring(
+            [
+                s.decode(self.encoding)
+                for s in input[voffset : voffset + vlength].split(b"\0")
+            ]
+        )
+        newunit = mounit(source)
+        newunit.target = target
+        if context is not None:
+            newunit.msgctxt.append(context.decode(self.encoding))
+        return newunit
+
+
+class mmapmofile(mofile):
+    """A .mo file that is memory mapped instead of read into memory.
+
+    Messages are only decoded when they are needed: :meth:`findunit` and
+    :meth:`translate` look them up through the hash table of the file,
+    while all the units are decoded the first time :attr:`units` is used.
+    """
+
+    def __init__(self, inputfile=None, **kwargs):
+        super().__init__(**kwargs)
+        self._data = None
+        if inputfile is not None:
+            self.parse(inputfile)
+
+    @classmethod
+    def parsefile(cls, storefile):
+        newstore = cls()
+        newstore.parse(storefile)
+        return newstore
+
+    @property
+    def units(self):
+        if self._units is None:
+            self._readunits()
+        return self._units
+
+    @units.setter
+    def units(self, units):
+        self._units = units
+
+    def parse(self, input):
+        """Maps the given file (or opens the given filename), or uses the
+        given file source string.
+        """
+        if isinstance(input, str):
+            with open(input, "rb") as fileobj:
+                return self.parse(fileobj)
+        if hasattr(input, "name"):
+            self.filename = input.name
+        elif not getattr(self, "filename", ""):
+            self.filename = ""
+        if hasattr(input, "read"):
+            try:
+                # The map stays valid after the file is closed
+                data = mmap.mmap(input.fileno(), 0, access=mmap.ACCESS_READ)
+            except (AttributeError, OSError, ValueError):
+                # Not a real file, or an empty one
+                data = input.read()
+            input.close()
+            input = data
+        self._layout = self._readheader(input)
+        self._data = input
+        self._units = None
+        self._oldhash = None
+
+    def close(self):
+        """Releases the memory map. Only the units decoded before stay
+        available.
+        """
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+            self._data = None
+
+    def _readunits(self):
+        """Decodes all the messages."""
+        if self._data is None:
+            raise ValueError("the units of a closed file were not decoded")
+        self._units = []
+        endian, lenkeys, startkey, startvalue = self._layout[:4]
+        for i in range(lenkeys):
+            unit = self._readunit(self._data, endian, startkey, startvalue, i)
+            self.addunit(unit)
+
+    def _getkey(self, i):
+        """Returns the i-th key up to the plural, which is what gettext
+        compares when looking up messages.
+        """
+        endian, lenkeys, startkey = self._layout[:3]
+        length, offset = struct.unpack_from(endian + "ii", self._data, startkey + i * 8)
+        end = self._data.find(b"\0", offset, offset + length)
+        return self._data[offset : end if end >= 0 else offset + length]
+
+    def _findindex(self, key):
+        """Returns the position of the message with the encoded key, or None."""
+        if self._layout[4] <= 2:
+            return self._bisect(key)
+        index = self._probe(key)
+        if index is not None or not self._hasoldhash():
+            return index
+        # Older versions of the toolkit hashed the plural as well, so the
+        # plural messages in their files can only be found by bisecting
+        index = self._bisect(key)
+        if index is None:
+            return None
+        endian, lenkeys, startkey = self._layout[:3]
+        length, offset = struct.unpack_from(
+            endian + "ii", self._data, startkey + index * 8
+        )
+        if self._data.find(b"\0", offset, offset + length) < 0:
+            return None
+        return index
+
+    def _probe(self, key):
+        """Looks for the encoded key in the hash table."""
+        endian, lenkeys, startkey, startvalue, sizehash, offsethash = self._layout
+        # Open addressing as done in gettext-0.17:gettext-runtime/intl/dcigettext.c
+        hashval = hashpjw(key)
+        index = hashval % sizehash
+        increment = 1 + (hashval % (sizehash - 2))
+        for _ in range(sizehash):
+            (nstr,) = struct.unpack_from(
+                endian + "I", self._data, offsethash + index * 4
             )
-            source = input[koffset : koffset + klength]
-            context = None
-            if b"\x04" in source:
-                context, source = source.split(b"\x04")
-            # Still need to handle KDE comments
-            if source == "":
-                charset = re.search(
-                    b"charset=([^\\s]+)", input[voffset : voffset + vlength]
+            if nstr == 0:
+                break
+            if nstr <= lenkeys and self._getkey(nstr - 1) == key:
+                return nstr - 1
+            index = (index + increment) % sizehash
+        return None
+
+    def _hasoldhash(self):
+        """Checks once whether the plural messages were hashed with their
+        plural, as older versions of the toolkit did, by looking up the first
+        of them.
+        """
+        if self._oldhash is None:
+            self._oldhash = False
+            endian, lenkeys, startkey = self._layout[:3]
+            for i in range(lenkeys):
+                length, offset = struct.unpack_from(
+                    endian + "ii", self._data, startkey + i * 8
                 )
-                if charset:
-                    self.encoding = charset.group(1)
-            source = multistring([s.decode(self.encoding) for s in source.split(b"\0")])
-            target = multistring(
-                [
-                    s.decode(self.encoding)
-                    for s in input[voffset : voffset + vlength].split(b"\0")
-                ]
-            )
-            newunit = mounit(source)
-            newunit.target = target
-            if context is not None:
-                newunit.msgctxt.append(context.decode(self.encoding))
-            self.addunit(newunit)
+                if self._data.find(b"\0", offset, offset + length) >= 0:
+                    self._oldhash = self._probe(self._getkey(i)) != i
+                    break
+        return self._oldhash
+
+    def _bisect(self, key):
+        """Looks for the encoded key in the sorted keys."""
+        low, high = 0, self._layout[1]
+        while low < high:
+            middle = (low + high) // 2
+            middlekey = self._getkey(middle)
+            if middlekey == key:
+                return middle
+            if middlekey < key:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def findunit(self, source, context=None):
+        """Find the unit with the given source string (and context) without
+        decoding any other messages.
+
+        :rtype: :class:`mounit` or None
+        """
+        if self._units is not None:
+            for unit in self.findunits(source) or []:
+                if unit.getcontext() == (context or ""):
+                    return unit
+            return None
+        if self._data is None:
+            raise ValueError("the units of a closed file were not decoded")
+        if isinstance(source, multistring):
+            source = source.strings[0]
+        key = source.encode(self.encoding)
+        if context:
+            key = context.encode(self.encoding) + b"\x04" + key
+        index = self._findindex(key)
+        if index is None:
+            return None
+        endian, lenkeys, startkey, startvalue = self._layout[:4]
+        return self._readunit(self._data, endian, startkey, startvalue, index)
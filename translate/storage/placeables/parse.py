@@ -22,9 +22,23 @@ based "rich" string element trees.
 """
 
 
+from functools import lru_cache
+
 from translate.storage.placeables.strelem import StringElem
 
 
+def iscacheable(parse_func):
+    """Whether the result of the parsing function only depends on the string
+    it parses, as declared by the class it is a method of.
+    """
+    return getattr(getattr(parse_func, "__self__", None), "parse_cacheable", False)
+
+
+@lru_cache(maxsize=1024)
+def _parse_string(string, parse_funcs):
+    return parse(StringElem(string), parse_funcs)
+
+
 def parse(tree, parse_funcs):
     """Parse placeables from the given string or sub-tree by using the
     parsing functions provided.
@@ -45,8 +59,14 @@ def parse(tree, parse_funcs):
                         return a list of ``StringElem``s which, together,
                         form the original string. If nothing could be
                         parsed, it should return ``None``.
+
+    The trees parsed from strings are cached if all the parsing functions are
+    cacheable (see :func:`iscacheable`), and a copy is returned.
     """
     if isinstance(tree, str):
+        parse_funcs = tuple(parse_funcs)
+        if all(iscacheable(parse_func) for parse_func in parse_funcs):
+            return _parse_string(str(tree), parse_funcs).copy()
         tree = StringElem(tree)
     if not parse_funcs:
         return tree
@@ -63,14 +83,16 @@ def parse(tree, parse_funcs):
         if not unileaf:
             continue
 
+        changed = False
         subleaves = parse_func(unileaf)
         if subleaves is not None:
+            changed = True
             if (
                 len(subleaves) == 1
                 and isinstance(subleaves[0], type(leaf))
                 and leaf == subleaves[0]
             ):
-                pass
+                changed = False
             elif isinstance(leaf, str):
                 parent = tree.get_parent_elem(leaf)
                 if parent is not None:
@@ -86,6 +108,8 @@ def parse(tree, parse_funcs):
 
         parse(leaf, parse_funcs[1:])
 
-        if isinstance(leaf, StringElem):
+        # An unchanged leaf was already pruned by the last level of recursion,
+        # and pruning it again would not change it.
+        if isinstance(leaf, StringElem) and (changed or len(parse_funcs) == 1):
             leaf.prune()
     return tree
@@ -54,6 +54,9 @@ class StringElem:
     isvisible = True
     """Whether this string should be visible to the user. Not used at
     the moment."""
+    parse_cacheable = True
+    """Whether the result of :meth:`parse` only depends on the given string,
+    so that :func:`~translate.storage.placeables.parse.parse` can cache it."""
 
     # INITIALIZERS #
     def __init__(self, sub=None, id=None, rid=None, xid=None, **kwargs):
@@ -789,6 +792,26 @@ class StringElem:
         )
         return False
 
+    def isempty(self):
+        """Whether this instance renders as an empty string.
+
+        This is the same as ``len(self) == 0``, but it stops at the first
+        non-empty string instead of rendering the whole sub-tree.
+
+        :rtype: bool
+        """
+        if callable(self.renderer):
+            return not self.renderer(self)
+        if not self.isvisible:
+            return True
+        for e in self.sub:
+            if isinstance(e, str):
+                if e:
+                    return False
+            elif not e.isempty():
+                return False
+        return True
+
     def isleaf(self):
         """
         Whether or not this instance is a leaf node in the ``StringElem`` tree.
@@ -863,16 +886,21 @@ class StringElem:
                 print((f"{indent_prefix}{indent_prefix}[{elem}]").encode("utf-8"))
 
     def prune(self):
-        """Remove unnecessary nodes to make the tree optimal."""
+        """Remove unnecessary nodes to make the tree optimal.
+
+        Pruning a tree that was just pruned doesn't change it.
+        """
         changed = False
         for elem in self.iter_depth_first():
-            if len(elem.sub) == 1:
+            sublen = len(elem.sub)
+            if sublen == 1:
                 child = elem.sub[0]
                 # Symbolically: X->StringElem(leaf) => X(leaf)
                 #   (where X is any sub-class of StringElem,
                 #   but not StringElem)
                 if type(child) is StringElem and child.isleaf():
                     elem.sub = child.sub
+                    changed = True
 
                 # Symbolically:
                 #   StringElem->StringElem2->(leaves) => StringElem->(leaves)
@@ -897,36 +925,43 @@ class StringElem:
                 # Collapse all strings in this leaf into one string.
                 elem.sub = ["".join(elem.sub)]
 
+            # elem.isleaf() is the same as not nonstrings, kept up to date
+            # while changing elem.sub below
+            nonstrings = len([e for e in elem.sub if not isinstance(e, str)])
             for i in reversed(range(len(elem.sub))):
                 # Remove empty strings or StringElem nodes
                 # (but not StringElem sub-class instances, because they
                 # might contain important (non-rendered) data.
-                if (
-                    type(elem.sub[i]) == StringElem or isinstance(elem.sub[i], str)
-                ) and len(elem.sub[i]) == 0:
+                if isinstance(elem.sub[i], str):
+                    if not elem.sub[i]:
+                        del elem.sub[i]
+                        continue
+                elif type(elem.sub[i]) == StringElem and elem.sub[i].isempty():
                     del elem.sub[i]
+                    nonstrings -= 1
                     continue
 
-                if isinstance(elem.sub[i], str) and not elem.isleaf():
+                if isinstance(elem.sub[i], str) and nonstrings:
                     elem.sub[i] = StringElem(elem.sub[i])
+                    nonstrings += 1
                     changed = True
 
             # Merge sibling StringElem leaves
-            if not elem.isleaf():
-                leafchanged = True
-                while leafchanged:
-                    leafchanged = False
-
-                    for i in range(len(elem.sub) - 1):
-                        lsub = elem.sub[i]
-                        rsub = elem.sub[i + 1]
-
-                        if type(lsub) is StringElem and type(rsub) is StringElem:
-                            changed = True
-                            lsub.sub.extend(rsub.sub)
-                            del elem.sub[i + 1]
-                            leafchanged = True
-                            break
+            if nonstrings:
+                i = 0
+                while i < len(elem.sub) - 1:
+                    lsub = elem.sub[i]
+                    rsub = elem.sub[i + 1]
+
+                    if type(lsub) is StringElem and type(rsub) is StringElem:
+                        lsub.sub.extend(rsub.sub)
+                        del elem.sub[i + 1]
+                    else:
+                        i += 1
+
+            # Removing sub-elements can make more of the above apply
+            if len(elem.sub) != sublen:
+                changed = True
 
         # If any changes were made, call prune() again to make sure that
         # changes made later does not create situations fixed by earlier
@@ -35,6 +35,8 @@ class TerminologyPlaceable(base.Ph):
     """A list of matcher objects to use to identify terminology."""
     translations = []
     """The available translations for this placeable."""
+    parse_cacheable = False
+    """The result of parsing depends on the matchers."""
 
     def __init__(self, *args, **kwargs):
         self.translations = []
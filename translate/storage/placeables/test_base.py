@@ -187,6 +187,28 @@ class TestStringElem:
         elem.prune()
         assert elem == StringElem("foobar")
 
+    def test_prune_again(self):
+        elem = base.Bx(id="1", sub=[StringElem(["", "a"]), ""])
+        elem.prune()
+        assert elem.sub == ["a"]
+        tree = repr(elem)
+        elem.prune()
+        assert repr(elem) == tree
+
+    def test_isempty(self):
+        assert StringElem("").isempty()
+        assert StringElem([StringElem(""), StringElem([""])]).isempty()
+        assert not StringElem([StringElem(""), "a"]).isempty()
+        assert base.Bx(id="1").isempty()
+        assert not self.elem.isempty()
+
+    def test_parse_cached(self):
+        elem = parse(self.ORIGSTR, general.parsers)
+        assert elem == self.elem
+        assert elem is not self.elem
+        elem.sub[0].sub.append("foo")
+        assert parse(self.ORIGSTR, general.parsers) == self.elem
+
 
 class TestConverters:
     def setup_method(self, method):
@@ -380,11 +380,17 @@ def parse_header(parse_state, store):
     return first_unit
 
 
-def parse_units(parse_state, store):
+def iter_units(parse_state, store):
+    """Yields the units as they are parsed, without adding them to store."""
     unit = parse_header(parse_state, store)
     while unit:
         unit.infer_state()
-        store.addunit(unit)
+        yield unit
         unit = parse_unit(parse_state)
     if not parse_state.eof:
         raise ValueError(f"Syntax error on line {parse_state.lineno}")
+
+
+def parse_units(parse_state, store):
+    for unit in iter_units(parse_state, store):
+        store.addunit(unit)
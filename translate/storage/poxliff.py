@@ -353,6 +353,12 @@ class PoXliffFile(xliff.xlifffile, poheader.poheader):
 
         return self.units[-pluralnum]
 
+    @classmethod
+    def iterparse(cls, storefile):
+        # plural units are made up of several trans-unit elements, so the
+        # whole document is needed
+        yield from cls.parsefile(storefile).units
+
     def parse(self, xml):
         """Populates this object from the given xml string"""
         # TODO: Make more robust
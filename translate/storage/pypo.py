@@ -21,6 +21,7 @@
 files (pofile).
 """
 
+import codecs
 import copy
 import logging
 import re
@@ -30,7 +31,7 @@ from itertools import chain
 from translate.lang import data
 from translate.misc import quote
 from translate.misc.multistring import multistring
-from translate.storage import pocommon, poparser
+from translate.storage import pocommon, poheader, poparser
 
 
 logger = logging.getLogger(__name__)
@@ -45,6 +46,31 @@ po_unescape_map = {"\\r": "\r", "\\t": "\t", '\\"': '"', "\\n": "\n", "\\\\": "\
 po_escape_map = {value: key for (key, value) in po_unescape_map.items()}
 
 
+newline_re = re.compile(b"[\r\n]")
+
+
+def findnewline(text, eof=True):
+    """Returns the newline used after the first msgid in text.
+
+    If eof is False, more text might follow, and None is returned while the
+    newline can not be determined yet.
+    """
+    msgid_pos = text.find(b"msgid")
+    if msgid_pos < 0:
+        if not eof:
+            return None
+        msgid_pos = 0
+    match = newline_re.search(text, msgid_pos)
+    if match is None:
+        return b"\n" if eof else None
+    pos = match.start()
+    if text[pos] == 10:
+        return b"\n"
+    if pos + 1 < len(text):
+        return b"\r\n" if text[pos + 1] == 10 else b"\r"
+    return b"\r" if eof else None
+
+
 def splitlines(text):
     """Split lines based on first newline char.
 
@@ -60,21 +86,42 @@ def splitlines(text):
     # by gettext, but some editors might create it, so better handle it.
     if text[:3] == b"\xEF\xBB\xBF":
         text = text[3:]
-    # Find first newline
-    newline = b"\n"
-    msgid_pos = max(0, text.find(b"msgid"))
-    for i, ch in enumerate(text[msgid_pos:]):
-        # Iteration over bytes yields numbers in Python 3
-        if ch in ("\n", 10):
-            break
-        if ch in ("\r", 13):
-            if text[msgid_pos + i + 1] in ("\n", 10):
-                newline = b"\r\n"
-            else:
-                newline = b"\r"
+    newline = findnewline(text)
+    return [x + newline for x in text.split(newline)]
+
+
+def iterlines(inputfile, chunksize=65536):
+    """Yields the same lines as :func:`splitlines`, reading inputfile in
+    chunks of chunksize bytes.
+    """
+    text = inputfile.read(chunksize)
+    eof = not text
+    newline = findnewline(text, eof)
+    while newline is None:
+        chunk = inputfile.read(chunksize)
+        eof = not chunk
+        text += chunk
+        newline = findnewline(text, eof)
+    if text[:3] == b"\xEF\xBB\xBF":
+        text = text[3:]
+    lines = text.split(newline)
+    while True:
+        text = lines.pop()
+        for line in lines:
+            yield line + newline
+        chunk = inputfile.read(chunksize)
+        if not chunk:
             break
+        lines = (text + chunk).split(newline)
+    yield text + newline
 
-    return [x + newline for x in text.split(newline)]
+
+def iterparse(inputfile):
+    """Yields the units of a PO file (or filename) one at a time.
+
+    See :meth:`pofile.iterparse`.
+    """
+    return pofile.iterparse(inputfile)
 
 
 def escapeforpo(line):
@@ -160,37 +207,19 @@ def quoteforpo(text, wrapper_obj=None):
     return polines
 
 
+unescape_re = re.compile(r"\\.", re.DOTALL)
+
+
 def unescape(line):
     """Unescape the given line.
 
     Quotes on either side should already have been removed.
     """
-    escape_places = quote.find_all(line, "\\")
-    if not escape_places:
+    if "\\" not in line:
         return line
-
-    # filter escaped escapes
-    true_escape = False
-    true_escape_places = []
-    for escape_pos in escape_places:
-        if escape_pos - 1 in escape_places:
-            true_escape = not true_escape
-        else:
-            true_escape = True
-        if true_escape:
-            true_escape_places.append(escape_pos)
-
-    extracted = []
-    lastpos = 0
-    for pos in true_escape_places:
-        # everything leading up to the escape
-        extracted.append(line[lastpos:pos])
-        # the escaped sequence (consuming 2 characters)
-        extracted.append(unescapehandler(line[pos : pos + 2]))
-        lastpos = pos + 2
-
-    extracted.append(line[lastpos:])
-    return "".join(extracted)
+    # Every backslash escapes the following character, so matching them left
+    # to right also takes care of escaped backslashes.
+    return unescape_re.sub(lambda match: unescapehandler(match.group()), line)
 
 
 def unquotefrompo(postr):
@@ -226,6 +255,12 @@ class pounit(pocommon.pounit):
     # fashion
     __shallow__ = ["_store", "wrapper"]
 
+    # The unquoted source and target strings, together with copies of the
+    # quoted lines they were unquoted from. The lines are public and often
+    # changed in place, so the cache is only used while they are unchanged.
+    _source_cache = None
+    _target_cache = None
+
     def __init__(self, source=None, wrapper=None, **kwargs):
         self.wrapper = wrapper
         self.obsolete = False
@@ -289,10 +324,29 @@ class pounit(pocommon.pounit):
             msgid_plural = []
         return msgid, msgid_plural
 
+    def _get_source_strings(self):
+        """Returns the unescaped msgid and msgid_plural, using the cache if
+        the quoted lines didn't change.
+        """
+        cache = self._source_cache
+        if cache is None or cache[0] != self.msgid or cache[1] != self.msgid_plural:
+            strings = [unquotefrompo(self.msgid)]
+            if self.hasplural():
+                strings.append(unquotefrompo(self.msgid_plural))
+            cache = self._source_cache = (
+                list(self.msgid),
+                list(self.msgid_plural),
+                strings,
+            )
+        return cache[2]
+
     @property
     def source(self):
         """Returns the unescaped msgid"""
-        return self._get_source_vars(self.msgid, self.msgid_plural)
+        strings = self._get_source_strings()
+        if len(strings) > 1:
+            return multistring(strings)
+        return strings[0]
 
     @source.setter
     def source(self, source):
@@ -302,6 +356,7 @@ class pounit(pocommon.pounit):
         """
         self._rich_source = None
         self.msgid, self.msgid_plural = self._set_source_vars(source)
+        self._source_cache = None
 
     def _get_prev_source(self):
         """Returns the unescaped msgid"""
@@ -316,12 +371,28 @@ class pounit(pocommon.pounit):
 
     prev_source = property(_get_prev_source, _set_prev_source)
 
+    def _get_target_strings(self):
+        """Returns the unescaped msgstr (a list for plurals), using the cache
+        if the quoted lines didn't change.
+        """
+        cache = self._target_cache
+        if cache is None or cache[0] != self.msgstr:
+            if isinstance(self.msgstr, dict):
+                lines = {key: list(value) for key, value in self.msgstr.items()}
+                strings = list(map(unquotefrompo, self.msgstr.values()))
+            else:
+                lines = list(self.msgstr)
+                strings = unquotefrompo(self.msgstr)
+            cache = self._target_cache = (lines, strings)
+        return cache[1]
+
     @property
     def target(self):
         """Returns the unescaped msgstr"""
-        if isinstance(self.msgstr, dict):
-            return multistring(list(map(unquotefrompo, self.msgstr.values())))
-        return unquotefrompo(self.msgstr)
+        strings = self._get_target_strings()
+        if isinstance(strings, list):
+            return multistring(strings)
+        return strings
 
     @target.setter
     def target(self, target):
@@ -450,19 +521,14 @@ class pounit(pocommon.pounit):
         return copy.deepcopy(self)
 
     def _msgidlen(self):
-        if self.hasplural():
-            return len(unquotefrompo(self.msgid)) + len(
-                unquotefrompo(self.msgid_plural)
-            )
-        return len(unquotefrompo(self.msgid))
+        return sum(map(len, self._get_source_strings()))
 
     def _msgstrlen(self):
-        if isinstance(self.msgstr, dict):
-            combinedstr = "\n".join(
-                filter(None, [unquotefrompo(msgstr) for msgstr in self.msgstr.values()])
-            )
+        strings = self._get_target_strings()
+        if isinstance(strings, list):
+            combinedstr = "\n".join(filter(None, strings))
             return len(combinedstr)
-        return len(unquotefrompo(self.msgstr))
+        return len(strings)
 
     def merge(self, otherpo, overwrite=False, comments=True, authoritative=False):
         """Merges the otherpo (with the same msgid) into this one.
@@ -880,6 +946,29 @@ class pofile(pocommon.pofile):
         self.units = []
         poparser.parse_units(poparser.ParseState(input, self.create_unit), self)
 
+    @classmethod
+    def iterparse(cls, storefile):
+        """Reads the given file (or opens the given filename) and yields its
+        units one at a time.
+
+        Unlike :meth:`parsefile` the units are not collected in a store, so
+        huge files can be processed in constant memory. The units belong to
+        a store holding only the header, which provides the languages and
+        other header information.
+        """
+        if isinstance(storefile, str):
+            with open(storefile, "rb") as fileobj:
+                yield from cls.iterparse(fileobj)
+            return
+        store = cls(noheader=True)
+        store.filename = getattr(storefile, "name", "")
+        parse_state = poparser.ParseState(iterlines(storefile), store.create_unit)
+        for unit in poparser.iter_units(parse_state, store):
+            if not store.units and unit.isheader():
+                store.units.append(unit)
+            unit._store = store
+            yield unit
+
     def removeduplicates(self, duplicatestyle="merge"):
         """Make sure each msgid is unique ; merge comments etc from
         duplicates into original
@@ -989,3 +1078,47 @@ class pofile(pocommon.pofile):
     def addunit(self, unit):
         unit.wrapper = self.wrapper
         super().addunit(unit)
+
+
+class powriter:
+    """Writes the units of a PO file one at a time, without keeping them in
+    a store.
+
+    The encoding is decided up front: the charset of a header written first
+    is changed to match it, so the output never has to be rewritten.
+    """
+
+    def __init__(self, out, encoding="utf-8"):
+        self.out = out
+        self.encoding = encoding
+        self.unitcount = 0
+
+    def addunit(self, unit):
+        """Writes unit to the output, the header has to be the first unit."""
+        if self.unitcount:
+            self.out.write(b"\n")
+        elif unit.isheader():
+            unit = self._getheader(unit)
+        self.out.write(unit._getoutput().encode(self.encoding))
+        self.unitcount += 1
+
+    def _getheader(self, header):
+        """Returns header, or a copy of it with the charset of the output."""
+        charset = re.search(
+            "charset=([^\\s;]+)",
+            poheader.parseheaderstring(header.target).get("Content-Type", ""),
+        )
+        try:
+            if (
+                charset
+                and codecs.lookup(charset.group(1)).name
+                == codecs.lookup(self.encoding).name
+            ):
+                return header
+        except LookupError:
+            pass
+        store = pofile(noheader=True)
+        store.addunit(header.copy())
+        return store.updateheader(
+            add=True, Content_Type="text/plain; charset=%s" % self.encoding.upper()
+        )
@@ -21,6 +21,7 @@
 
 """
 
+import hashlib
 import logging
 import os.path
 import re
@@ -54,6 +55,9 @@ xmltagre = re.compile(
     re.VERBOSE,
 )
 numberre = re.compile("\\D\\.\\D")
+# A word as returned by Common.words(): a run of non-whitespace characters
+# that isn't only punctuation
+wordre = re.compile(r"\S*[^\s%s]\S*" % re.escape(Common.punctuation))
 
 extended_state_strings = {
     StateEnum.EMPTY: "empty",
@@ -68,6 +72,10 @@ UNTRANSLATED = StateEnum.EMPTY
 FUZZY = StateEnum.NEEDS_WORK
 TRANSLATED = StateEnum.UNREVIEWED
 
+# The name of the rows in uniterrors marking units whose checks need to run
+# again, as they changed since the checks of their file were cached
+UNCHECKED = "-unchecked"
+
 state_strings = {
     UNTRANSLATED: "untranslated",
     FUZZY: "fuzzy",
@@ -78,12 +86,29 @@ state_strings = {
 def wordcount(string):
     # TODO: po class should understand KDE style plurals ##
     # string = kdepluralre.sub("", string) #Restore this if you really need support for old kdeplurals
-    string = brtagre.sub("\n", string)
-    string = xmltagre.sub("", string)
-    string = numberre.sub(" ", string)
+    # The substitutions are done one after the other, as a later one can match
+    # text left by an earlier one, but skipped when they can't match at all.
+    if "<" in string:
+        string = brtagre.sub("\n", string)
+        string = xmltagre.sub("", string)
+    if "." in string:
+        string = numberre.sub(" ", string)
     # TODO: This should still use the correct language to count in the target
     # language
-    return len(Common.words(string))
+    return len(wordre.findall(string))
+
+
+def unitdigest(unit):
+    """Returns a digest of everything the cached statistics of the unit are
+    calculated from, to find the units that changed when recaching a store.
+    """
+    values = [unit.getid(), str(statefordb(unit)), str(unit.get_state_id())]
+    for value in (unit.source, unit.target):
+        if isinstance(value, multistring):
+            values.append("\1".join(value.strings))
+        else:
+            values.append(value or "")
+    return hashlib.sha1("\0".join(values).encode("utf-8")).hexdigest()
 
 
 def wordsinunit(unit):
@@ -291,6 +316,17 @@ def get_mod_info(file_path):
     return file_stat.st_mtime, file_stat.st_size
 
 
+def get_file_hash(file_path):
+    """Returns the SHA-1 digest of the contents of the file, so that files
+    that were only touched don't need to be parsed again.
+    """
+    digest = hashlib.sha1()
+    with open(file_path, "rb") as fh:
+        for block in iter(lambda: fh.read(65536), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
 def suggestion_extension():
     return os.path.extsep + "pending"
 
@@ -303,45 +339,50 @@ def suggestion_filename(filename):
 class StatsCache:
     """An object instantiated as a singleton for each statsfile that provides
     access to the database cache from a pool of StatsCache objects.
+
+    The database is kept in WAL mode, so that several processes can share the
+    same statsfile: readers don't block each other nor the single writer.
     """
 
     _caches = {}
     defaultfile = None
+    timeout = 60.0
+    """Seconds to wait for another process to release the database"""
     con = None
     """This cache's connection"""
     cur = None
     """The current cursor"""
 
     def __new__(cls, statsfile=None):
-        current_thread_ident = current_thread().ident
+        # Connections can't be shared with forked processes either
+        current_thread_ident = (os.getpid(), current_thread().ident)
 
         def make_database(statsfile):
             def connect(cache):
                 # sqlite needs to get the name in utf-8 on all platforms
-                cache.con = dbapi2.connect(statsfile)
+                cache.con = dbapi2.connect(statsfile, timeout=cls.timeout)
                 cache.cur = cache.con.cursor()
+                cache.cur.execute("""PRAGMA journal_mode = WAL;""")
+                cache.cur.execute("""PRAGMA synchronous = NORMAL;""")
 
             def clear_old_data(cache):
                 try:
                     cache.cur.execute("""SELECT min(toolkitbuild) FROM files""")
                     val = cache.cur.fetchone()
-                    # If the database is empty, we have no idea whether its layout
-                    # is correct, so we might as well delete it.
-                    if val is None or val[0] < toolkitversion.build:
-                        cache.con.close()
-                        del cache
-                        os.unlink(statsfile)
-                        return True
-                    return False
                 except dbapi2.OperationalError:
-                    return False
+                    return
+                # If the database is empty, we have no idea whether its layout
+                # is correct, so we might as well delete it. The tables are
+                # dropped rather than the file, since other processes might
+                # be using it.
+                if val is None or val[0] is None or val[0] < toolkitversion.build:
+                    cache.drop()
 
             cache = cls._caches.setdefault(current_thread_ident, {})[
                 statsfile
             ] = object.__new__(cls)
             connect(cache)
-            if clear_old_data(cache):
-                connect(cache)
+            clear_old_data(cache)
             cache.create()
             return cache
 
@@ -370,6 +411,20 @@ class StatsCache:
         # No existing cache. Let's build a new one and keep a copy
         return make_database(statsfile)
 
+    @transaction
+    def drop(self):
+        """Drop all tables."""
+        for table in ("filetotals", "files", "units", "checkerconfigs", "uniterrors"):
+            self.cur.execute("""DROP TABLE IF EXISTS %s;""" % table)
+
+    def _addcolumn(self, table, column, definition):
+        """Add a column missing from a table created by an older version."""
+        self.cur.execute("""PRAGMA table_info(%s);""" % table)
+        if column not in [row[1] for row in self.cur.fetchall()]:
+            self.cur.execute(
+                """ALTER TABLE %s ADD COLUMN %s %s;""" % (table, column, definition)
+            )
+
     @transaction
     def create(self):
         """Create all tables and indexes."""
@@ -381,8 +436,10 @@ class StatsCache:
             path VARCHAR NOT NULL UNIQUE,
             st_mtime INTEGER NOT NULL,
             st_size INTEGER NOT NULL,
-            toolkitbuild INTEGER NOT NULL);"""
+            toolkitbuild INTEGER NOT NULL,
+            hash VARCHAR);"""
         )
+        self._addcolumn("files", "hash", "VARCHAR")
 
         self.cur.execute(
             """CREATE UNIQUE INDEX IF NOT EXISTS filepathindex
@@ -400,8 +457,10 @@ class StatsCache:
             state INTEGER,
             e_state INTEGER,
             sourcewords INTEGER,
-            targetwords INTEGER);"""
+            targetwords INTEGER,
+            digest VARCHAR);"""
         )
+        self._addcolumn("units", "digest", "VARCHAR")
 
         self.cur.execute(
             """CREATE INDEX IF NOT EXISTS fileidindex
@@ -439,7 +498,8 @@ class StatsCache:
         """return fileid representing the given file in the statscache.
 
         if file not in cache or has been updated since last record
-        update, recalculate stats.
+        update, recalculate stats. Files that were touched without changing
+        their contents are recognised by their hash and not parsed again.
 
         optional argument store can be used to avoid unnessecary
         reparsing of already loaded translation files.
@@ -450,7 +510,7 @@ class StatsCache:
             filename = str(filename, sys.getfilesystemencoding())
         realpath = os.path.realpath(filename)
         self.cur.execute(
-            """SELECT fileid, st_mtime, st_size FROM files
+            """SELECT fileid, st_mtime, st_size, hash FROM files
                 WHERE path=?;""",
             (realpath,),
         )
@@ -458,25 +518,28 @@ class StatsCache:
         mod_info = get_mod_info(realpath)
         if filerow:
             fileid = filerow[0]
-            if not check_mod_info:
+            if check_mod_info and (filerow[1], filerow[2]) == mod_info:
+                return fileid
+            filehash = get_file_hash(realpath)
+            if not check_mod_info or filerow[3] == filehash:
                 # Update the mod_info of the file
                 self.cur.execute(
                     """UPDATE files
-                        SET st_mtime=?, st_size=?
+                        SET st_mtime=?, st_size=?, hash=?
                         WHERE fileid=?;""",
-                    (mod_info[0], mod_info[1], fileid),
+                    (mod_info[0], mod_info[1], filehash, fileid),
                 )
                 return fileid
-            if (filerow[1], filerow[2]) == mod_info:
-                return fileid
+        else:
+            filehash = get_file_hash(realpath)
 
-        # file wasn't in db at all, lets recache it
+        # file wasn't in db at all or changed, lets recache it
         if callable(store):
             store = store()
         else:
             store = store or factory.getobject(realpath)
 
-        return self._cachestore(store, realpath, mod_info)
+        return self._cachestore(store, realpath, mod_info, filehash)
 
     def _getstoredcheckerconfig(self, checker):
         """See if this checker configuration has been used before."""
@@ -516,6 +579,7 @@ class StatsCache:
                         targetwords,
                         unit_state_for_db,
                         unit.get_state_id(),
+                        unitdigest(unit),
                     )
                 )
                 file_totals_record = file_totals_record + FileTotals.new_record(
@@ -524,8 +588,8 @@ class StatsCache:
         # XXX: executemany is non-standard
         self.cur.executemany(
             """INSERT INTO units
-            (unitid, fileid, unitindex, source, target, sourcewords, targetwords, state, e_state)
-            values (?, ?, ?, ?, ?, ?, ?, ?, ?);""",
+            (unitid, fileid, unitindex, source, target, sourcewords, targetwords, state, e_state, digest)
+            values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);""",
             unitvalues,
         )
         self.file_totals[fileid] = file_totals_record
@@ -533,29 +597,177 @@ class StatsCache:
             return state_strings[statefordb(units[0])]
         return ""
 
+    def _diffunitstats(self, units, fileid):
+        """Cache the statistics for the units of a store, only rewriting the
+        units that changed since they were last cached.
+
+        Cached units are found by their digest, so that units that only moved
+        (like after inserting a unit) are just given their new index. The
+        cached checks are kept for those, and marked to be run again for the
+        changed units.
+
+        Returns whether any of the units changed.
+        """
+        self.cur.execute(
+            """SELECT digest, unitindex, id, state, sourcewords, targetwords
+            FROM units WHERE fileid=? ORDER BY unitindex;""",
+            (fileid,),
+        )
+        cached = {}
+        for row in self.cur.fetchall():
+            cached.setdefault(row[0], []).append(row[1:])
+        # Summing Records is slow for big stores, so only the counts are kept
+        totals = dict.fromkeys(FileTotals.keys, 0)
+        moved = []
+        changed = []
+        for index, unit in enumerate(units):
+            if not unit.istranslatable():
+                continue
+            digest = unitdigest(unit)
+            rows = cached.get(digest)
+            if rows:
+                oldindex, rowid, unit_state_for_db, sourcewords, targetwords = rows.pop(
+                    0
+                )
+                if oldindex != index:
+                    moved.append((index, oldindex, rowid))
+            else:
+                sourcewords, targetwords = wordsinunit(unit)
+                unit_state_for_db = statefordb(unit)
+                changed.append(
+                    (
+                        index,
+                        (
+                            unit.getid(),
+                            unit.source,
+                            unit.target,
+                            sourcewords,
+                            targetwords,
+                            unit_state_for_db,
+                            unit.get_state_id(),
+                            digest,
+                        ),
+                    )
+                )
+            state_string = state_strings[unit_state_for_db]
+            totals[state_string] += 1
+            totals[state_string + "sourcewords"] += sourcewords
+            if unit_state_for_db == TRANSLATED:
+                totals["translatedtargetwords"] += targetwords
+        self.file_totals[fileid] = Record(
+            FileTotals.keys,
+            [totals[key] for key in FileTotals.keys],
+            FileTotals._compute_derived_values,
+        )
+        # The rows of the changed units are reused where possible, by index
+        unused = {row[0]: row[1] for rows in cached.values() for row in rows}
+        if not (moved or changed or unused):
+            return False
+        self.cur.execute(
+            """SELECT DISTINCT configid FROM uniterrors WHERE fileid=?;""",
+            (fileid,),
+        )
+        configids = [row[0] for row in self.cur.fetchall()]
+        # The checks of the changed and removed units are dropped, those of
+        # the moved units are moved along in two steps through negative
+        # indices, as the old and new indices overlap.
+        self.cur.executemany(
+            """DELETE FROM uniterrors WHERE fileid=? AND unitindex=?;""",
+            [(fileid, oldindex) for oldindex in unused],
+        )
+        self.cur.executemany(
+            """UPDATE uniterrors SET unitindex=?
+            WHERE fileid=? AND unitindex=?;""",
+            [(-2 - index, fileid, oldindex) for index, oldindex, rowid in moved],
+        )
+        self.cur.execute(
+            """UPDATE uniterrors SET unitindex=-2 - unitindex
+            WHERE fileid=? AND unitindex < -1;""",
+            (fileid,),
+        )
+        self.cur.executemany(
+            """UPDATE units SET unitindex=? WHERE id=?;""",
+            [(index, rowid) for index, oldindex, rowid in moved],
+        )
+        insertvalues = []
+        updatevalues = []
+        for index, values in changed:
+            rowid = unused.pop(index, None)
+            if rowid is None:
+                insertvalues.append((fileid, index) + values)
+            else:
+                updatevalues.append(values + (rowid,))
+        # XXX: executemany is non-standard
+        self.cur.executemany(
+            """INSERT INTO units
+            (fileid, unitindex, unitid, source, target, sourcewords, targetwords, state, e_state, digest)
+            values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);""",
+            insertvalues,
+        )
+        self.cur.executemany(
+            """UPDATE units
+            SET unitid=?, source=?, target=?, sourcewords=?, targetwords=?, state=?, e_state=?, digest=?
+            WHERE id=?;""",
+            updatevalues,
+        )
+        self.cur.executemany(
+            """DELETE FROM units WHERE id=?;""",
+            [(rowid,) for rowid in unused.values()],
+        )
+        self.cur.executemany(
+            """INSERT INTO uniterrors
+            (unitindex, fileid, configid, name, message)
+            values (?, ?, ?, ?, '');""",
+            [
+                (index, fileid, configid, UNCHECKED)
+                for configid in configids
+                for index, values in changed
+            ],
+        )
+        return True
+
     @transaction
-    def _cachestore(self, store, realpath, mod_info):
+    def _cachestore(self, store, realpath, mod_info, filehash=None):
         """Calculates and caches the statistics of the given store
         unconditionally.
+
+        The file keeps its fileid, and only the units that changed are
+        written to the database.
         """
+        if filehash is None:
+            filehash = get_file_hash(realpath)
+        if not self.con.in_transaction:
+            # Take the write lock before reading, so that a concurrent
+            # writer makes us wait instead of failing on commit.
+            self.cur.execute("""BEGIN IMMEDIATE;""")
         self.cur.execute(
-            """DELETE FROM files WHERE
+            """SELECT fileid, hash FROM files WHERE
             path=?;""",
             (realpath,),
         )
+        filerow = self.cur.fetchone()
+        if filerow is None:
+            self.cur.execute(
+                """INSERT INTO files
+                (fileid, path, st_mtime, st_size, toolkitbuild, hash)
+                values (NULL, ?, ?, ?, ?, ?);""",
+                (realpath, mod_info[0], mod_info[1], toolkitversion.build, filehash),
+            )
+            # Unusual capitalisation intended. See bug 2073.
+            fileid = self.cur.lastrowid
+            self._diffunitstats(store.units, fileid)
+            return fileid
+        fileid = filerow[0]
         self.cur.execute(
-            """INSERT INTO files
-            (fileid, path, st_mtime, st_size, toolkitbuild) values (NULL, ?, ?, ?, ?);""",
-            (realpath, mod_info[0], mod_info[1], toolkitversion.build),
-        )
-        # Unusual capitalisation intended. See bug 2073.
-        fileid = self.cur.lastrowid
-        self.cur.execute(
-            """DELETE FROM units WHERE
-            fileid=?""",
-            (fileid,),
+            """UPDATE files
+            SET st_mtime=?, st_size=?, toolkitbuild=?, hash=?
+            WHERE fileid=?;""",
+            (mod_info[0], mod_info[1], toolkitversion.build, filehash, fileid),
         )
-        self._cacheunitstats(store.units, fileid)
+        if filerow[1] == filehash:
+            # Another process cached this version of the file in the meantime
+            return fileid
+        self._diffunitstats(store.units, fileid)
         return fileid
 
     def file_extended_totals(self, filename, store=None):
@@ -598,7 +810,7 @@ class StatsCache:
         for index, unit in enumerate(units):
             if unit.istranslatable():
                 # Correctly assign the unitindex
-                if unitindex:
+                if unitindex is not None:
                     index = unitindex
                 failures = checker.run_filters(unit)
                 for checkname, checkmessage in failures.items():
@@ -608,7 +820,7 @@ class StatsCache:
                     errornames.append("check-" + checkname)
         checker.setsuggestionstore(None)
 
-        if unitindex:
+        if unitindex is not None:
             # We are only updating a single unit, so we don't want to add an
             # extra noerror-entry
             unitvalues.remove(dummy)
@@ -638,6 +850,30 @@ class StatsCache:
         self._cacheunitschecks(store.units, fileid, configid, checker)
         return fileid
 
+    @transaction
+    def _recacheunitschecks(self, fileid, store, checker, configid, unitindexes):
+        """Runs the checks again for the units that changed since the checks
+        of the given store were cached.
+        """
+        self.cur.execute(
+            """DELETE FROM uniterrors WHERE
+            fileid=? AND configid=? AND name=?;""",
+            (fileid, configid, UNCHECKED),
+        )
+        unitvalues = []
+        for index in unitindexes:
+            failures = checker.run_filters(store.units[index])
+            for checkname, checkmessage in failures.items():
+                unitvalues.append((index, fileid, configid, checkname, checkmessage))
+        checker.setsuggestionstore(None)
+        # XXX: executemany is non-standard
+        self.cur.executemany(
+            "INSERT INTO uniterrors "
+            "(unitindex, fileid, configid, name, message) "
+            "values (?, ?, ?, ?, ?);",
+            unitvalues,
+        )
+
     def get_unit_stats(self, fileid, unitid):
         values = self.cur.execute(
             """
@@ -719,9 +955,16 @@ class StatsCache:
             )
             return self.cur.fetchone(), self.cur
 
-        first, cur = geterrors()
-        if first is not None:
-            return first, cur
+        self.cur.execute(
+            """SELECT unitindex FROM uniterrors
+            WHERE fileid=? AND configid=? AND name=?;""",
+            (fileid, configid, UNCHECKED),
+        )
+        unchecked = [row[0] for row in self.cur.fetchall()]
+        if not unchecked:
+            first, cur = geterrors()
+            if first is not None:
+                return first, cur
 
         # This could happen if we haven't done the checks before, or the
         # file changed, or we are using a different configuration
@@ -736,7 +979,10 @@ class StatsCache:
                     suggestion_filename(filename), ignore=suggestion_extension()
                 )
             )
-        self._cachestorechecks(fileid, store, checker, configid)
+        if unchecked:
+            self._recacheunitschecks(fileid, store, checker, configid, unchecked)
+        else:
+            self._cachestorechecks(fileid, store, checker, configid)
         return geterrors()
 
     def _geterrors(self, filename, fileid, configid, checker, store):
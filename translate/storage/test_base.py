@@ -41,6 +41,30 @@ def first_translatable(store):
         return store.units[0]
 
 
+def test_detect_encoding():
+    store = base.TranslationStore(encoding="auto")
+    text = "Zkouška…"
+    assert store.detect_encoding(text.encode("utf-8")) == (text, "utf-8")
+    assert store.detect_encoding(text.encode("utf-8-sig")) == (text, "utf-8-sig")
+    assert store.detect_encoding(text.encode("utf-32")) == (text, "utf-32")
+    assert store.detect_encoding(b"ascii") == ("ascii", "utf-8")
+    store = base.TranslationStore(encoding="cp1250")
+    assert store.detect_encoding(text.encode("cp1250")) == (text, "cp1250")
+
+
+def test_detect_encoding_sample(monkeypatch):
+    store = base.TranslationStore(encoding="auto")
+    monkeypatch.setattr(store, "encoding_sample_size", 1000)
+    # The sample starts after the ASCII text
+    text = " " * 2000 + "Le coeur déçu mais l'âme plutôt naïve. " * 50
+    assert store.detect_encoding(text.encode("iso-8859-1")) == (text, "iso-8859-1")
+    # The whole file is used if the sample is misleading
+    text = ("Déjà vu. " * 200).encode("utf-8") + "Déjà".encode("iso-8859-1")
+    detected = store.detect_encoding(text)
+    assert detected[0].endswith(" Déjà")
+    assert detected[1] != "utf-8"
+
+
 class TestTranslationUnit:
     """
     Tests a TranslationUnit.
@@ -370,6 +370,13 @@ certificate.">
         assert len(dtdfile.units) == 1
         assert recwarn.pop(Warning)
 
+    def test_undecodable_line(self, recwarn):
+        """test that only the line that can't be decoded is skipped"""
+        dtdsource = b'<!ENTITY a "x">\n\xff\n<!ENTITY b "y">\n'
+        dtdfile = self.dtdparse(dtdsource)
+        assert [unit.entity for unit in dtdfile.units] == ["a", "b"]
+        assert recwarn.pop(Warning)
+
     # Test for bug #68
     def test_entity_escaping(self):
         """Test entities escaping (&amp; &quot; &lt; &gt; &apos;) (bug #68)"""
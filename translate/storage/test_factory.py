@@ -118,6 +118,23 @@ class BaseTestFactory:
         store = factory.getobject(filename)
         assert isinstance(store, self.expected_instance)
 
+    def test_iterunits(self):
+        """Tests that the units are yielded as in the store."""
+        fileobj = givefile(self.filename, self.file_content)
+        store = factory.getobject(fileobj)
+        fileobj = givefile(self.filename, self.file_content)
+        units = list(factory.iterunits(fileobj))
+        assert [unit.source for unit in units] == [unit.source for unit in store.units]
+
+    def test_iterunits_gzfile(self):
+        """Test that we can iterate over a gzip file correctly."""
+        filename = os.path.join(self.testdir, self.filename + ".gz")
+        with GzipFile(filename, mode="wb") as gzfile:
+            gzfile.write(self.file_content)
+        store = factory.getobject(filename)
+        units = list(factory.iterunits(filename))
+        assert [unit.source for unit in units] == [unit.source for unit in store.units]
+
     def test_directory(self):
         """Test that a directory is correctly detected."""
         object = factory.getobject(self.testdir)
@@ -1,8 +1,12 @@
 import os
+import struct
 import subprocess
 import sys
 from io import BytesIO
 
+from pytest import raises
+
+from translate.misc.multistring import multistring
 from translate.storage import factory, mo, test_base
 
 
@@ -143,6 +147,38 @@ class TestMOFile(test_base.TestTranslationStore):
         assert len(newstore.units) == 1
         assert newstore.units[0].getcontext(), "context"
 
+    def test_roundtrip(self):
+        store = self.StoreClass()
+        for i in range(100):
+            unit = store.addsourceunit("source %d" % i)
+            unit.target = "target %d" % i
+        unit = store.addsourceunit(multistring(["tree", "trees"]))
+        unit.target = multistring(["boom", "bome"])
+        newstore = self.StoreClass.parsestring(bytes(store))
+        assert len(newstore.units) == 101
+        targets = {unit.source: unit.target for unit in newstore.units}
+        assert targets["source 42"] == "target 42"
+        assert targets[multistring(["tree", "trees"])].strings == ["boom", "bome"]
+
+    def test_next_prime_number(self):
+        primes = [mo.get_next_prime_number(i) for i in range(30)]
+        assert primes[:12] == [2, 2, 2, 3, 5, 5, 7, 7, 11, 11, 11, 11]
+        assert primes[24:] == [29, 29, 29, 29, 29, 29]
+        assert mo.get_next_prime_number(133334) == 133337
+
+    def test_small_hash_table(self):
+        # 3 messages: int(3 * 4 / 3) is 4, which is not prime
+        store = self.StoreClass()
+        for source in ("one", "two", "three"):
+            unit = store.addsourceunit(source)
+            unit.target = source.upper()
+        output = bytes(store)
+        hash_size, hash_offset = struct.unpack("<2I", output[20:28])
+        assert hash_size == 5
+        assert hash_offset == 7 * 4 + 16 * 3
+        hash_table = struct.unpack("<5I", output[hash_offset : hash_offset + 20])
+        assert sorted(hash_table) == [0, 0, 1, 2, 3]
+
     def test_output(self):
         for posource in posources:
             print("PO source file")
@@ -177,3 +213,81 @@ class TestMOFile(test_base.TestTranslationStore):
             print(repr(mo_pocompile))
 
             assert mo_msgfmt == mo_pocompile
+
+
+class TestMMapMOFile(TestMOFile):
+    StoreClass = mo.mmapmofile
+
+    def write_sample(self, hashtable=True):
+        store = mo.mofile()
+        for i in range(50):
+            unit = store.addsourceunit("source %d" % i)
+            unit.target = "target %d" % i
+        unit = store.addsourceunit("source 1")
+        unit.setcontext("context")
+        unit.target = "context target"
+        unit = store.addsourceunit(multistring(["tree", "trees"]))
+        unit.target = multistring(["boom", "bome"])
+        data = bytes(store)
+        if not hashtable:
+            # Set the size of the hash table to 0
+            data = data[:20] + b"\0\0\0\0" + data[24:]
+        with open(self.filename, "wb") as fh:
+            fh.write(data)
+
+    def test_findunit_lazy(self):
+        for hashtable in (True, False):
+            self.write_sample(hashtable)
+            store = self.StoreClass(self.filename)
+            assert store.translate("source 42") == "target 42"
+            assert store.findunit("source 1").target == "target 1"
+            assert store.findunit("source 1", "context").target == "context target"
+            assert store.findunit("tree").target.strings == ["boom", "bome"]
+            assert store.findunit("source 50") is None
+            assert store.findunit("source 2", "context") is None
+            assert store._units is None
+            store.close()
+            # the units are not decoded when closing
+            assert store._units is None
+            with raises(ValueError):
+                store.units
+            with raises(ValueError):
+                store.findunit("source 1")
+            store = self.StoreClass(self.filename)
+            assert len(store.units) == 52
+            store.close()
+            assert len(store.units) == 52
+            assert store.findunit("source 1", "context").target == "context target"
+            assert store.translate("source 42") == "target 42"
+            assert store.findunit("source 50") is None
+
+    def test_findunit_missing(self, monkeypatch):
+        """checks that missing messages are not bisected for"""
+        self.write_sample()
+        store = self.StoreClass(self.filename)
+        monkeypatch.setattr(store, "_bisect", None)
+        assert store.findunit("source 50") is None
+        assert store.findunit("trees") is None
+        assert store.findunit("tree").target.strings == ["boom", "bome"]
+
+    def test_findunit_old_hash(self, monkeypatch):
+        def hashpjw(str_param):
+            # Older versions of the toolkit also hashed the plural
+            hval = 0
+            for s in str_param:
+                hval = (hval << 4) + s
+                g = hval & 0xF0000000
+                if g:
+                    hval ^= g >> 24
+                    hval ^= g
+            return hval
+
+        with monkeypatch.context() as patch:
+            patch.setattr(mo, "hashpjw", hashpjw)
+            self.write_sample()
+        store = self.StoreClass(self.filename)
+        assert store.findunit("tree").target.strings == ["boom", "bome"]
+        assert store.findunit("source 42").target == "target 42"
+        assert store.findunit("trees") is None
+        assert store.findunit("source 50") is None
+        assert store._units is None
@@ -24,6 +24,24 @@ class TestHelpers:
         assert pypo.unescape(r"\"\\koei\"\\") == '"\\koei"\\'
         assert pypo.unescape(r"\\\rkoei\r\\") == "\\\rkoei\r\\"
 
+        assert pypo.unescape(r"\\\\n") == "\\\\n"
+        assert pypo.unescape(r"unknown \a escape") == r"unknown \a escape"
+        assert pypo.unescape("trailing \\") == "trailing \\"
+
+    def test_iterlines(self):
+        """checks that reading in chunks gives the same lines as splitlines"""
+        for text in (
+            b'msgid "a"\nmsgstr "b"\n',
+            b'#: a\rb\nmsgid "a"\r\nmsgstr "b"\r\n\r\n',
+            b'# \n\rmsgid "a"\rmsgstr "b"',
+            b'\xEF\xBB\xBFmsgid "a"\nmsgstr "b"\n',
+            b"# no messages",
+            b"",
+        ):
+            for chunksize in (1, 2, 5, 1000):
+                lines = pypo.iterlines(BytesIO(text), chunksize)
+                assert list(lines) == pypo.splitlines(text)
+
     def test_quoteforpo(self):
         """Special escaping routine to manage newlines and linewrap in PO"""
         # Simple case
@@ -111,6 +129,23 @@ class TestPYPOUnit(test_po.TestPOUnit):
         assert unit.target.strings == ["Sk\u00ear", "Sk\u00eare"]
         assert unit.target == "Sk\u00ear"
 
+    def test_cached_strings(self):
+        """checks that changing the quoted lines in place changes the strings"""
+        unit = self.UnitClass("Cow")
+        unit.target = "Koei"
+        assert unit.source == "Cow"
+        assert unit.target == "Koei"
+        unit.msgid.append('"s"')
+        unit.msgstr[0] = '"Koeie"'
+        assert unit.source == "Cows"
+        assert unit.target == "Koeie"
+        unit.msgid_plural = ['"Cows"']
+        unit.msgstr = {0: ['"Koei"'], 1: ['"Koeie"']}
+        assert unit.source.strings == ["Cows", "Cows"]
+        assert unit.target.strings == ["Koei", "Koeie"]
+        unit.msgstr[1][0] = '"Beeste"'
+        assert unit.target.strings == ["Koei", "Beeste"]
+
     def test_plural_reduction(self):
         """checks that reducing the number of plurals supplied works"""
         unit = self.UnitClass("Tree")
@@ -234,6 +269,91 @@ msgstr ""
 class TestPYPOFile(test_po.TestPOFile):
     StoreClass = pypo.pofile
 
+    def test_iterparse(self):
+        """checks that iterparse yields the same units as parse"""
+        posource = r"""msgid ""
+msgstr ""
+"Content-Type: text/plain; charset=ISO-8859-1\n"
+"Language: af\n"
+
+#: file.c
+msgid "Cow"
+msgstr "Koei"
+
+msgid "Tree"
+msgid_plural "Trees"
+msgstr[0] "Boom"
+msgstr[1] "Bome"
+
+#~ msgid "Old"
+#~ msgstr "Oud"
+"""
+        posource = posource.replace("Oud", "Ou\xe9").encode("iso-8859-1")
+        pofile = self.StoreClass.parsestring(posource)
+        units = list(pypo.iterparse(BytesIO(posource)))
+        assert len(units) == len(pofile.units) == 4
+        for unit, expected in zip(units, pofile.units):
+            assert str(unit) == str(expected)
+        assert units[3].target == "Ou\xe9"
+        assert units[3].isobsolete()
+        assert units[1].gettargetlanguage() == "af"
+        # Only the header is kept in the store of the units
+        assert units[1]._store.units == units[:1]
+
+    def test_powriter(self):
+        """checks that writing units one at a time matches serialize"""
+        posource = b"""msgid ""
+msgstr ""
+"Content-Type: text/plain; charset=UTF-8\\n"
+
+msgid "Cow"
+msgstr "Koei"
+
+msgid "Tree"
+msgid_plural "Trees"
+msgstr[0] "Boom"
+msgstr[1] "Bome"
+"""
+        pofile = self.StoreClass.parsestring(posource)
+        out = BytesIO()
+        writer = pypo.powriter(out)
+        for unit in pypo.iterparse(BytesIO(posource)):
+            writer.addunit(unit)
+        assert out.getvalue() == bytes(pofile) == posource
+
+    def test_powriter_charset(self):
+        """checks that the header charset is changed to the output encoding"""
+        posource = """msgid ""
+msgstr ""
+"Content-Type: text/plain; charset=ISO-8859-1\\n"
+"Content-Transfer-Encoding: 8bit\\n"
+
+msgid "Cow"
+msgstr "K\u00f6ei"
+"""
+        units = list(pypo.iterparse(BytesIO(posource.encode("iso-8859-1"))))
+        out = BytesIO()
+        writer = pypo.powriter(out)
+        for unit in units:
+            writer.addunit(unit)
+        assert out.getvalue() == posource.replace("ISO-8859-1", "UTF-8").encode()
+        # The unit that was passed in is left alone
+        assert "ISO-8859-1" in units[0].target
+        out = BytesIO()
+        writer = pypo.powriter(out, "iso-8859-1")
+        for unit in units:
+            writer.addunit(unit)
+        assert out.getvalue() == posource.encode("iso-8859-1")
+
+    def test_iterparse_syntax_error(self):
+        """checks that syntax errors are raised once the units before are read"""
+        posource = b'msgid "Cow"\nmsgstr "Koei"\n\nmsgid "Tree"\nmsgstr "Boom"\nwrong\n'
+        units = pypo.iterparse(BytesIO(posource))
+        assert next(units).source == "Cow"
+        assert next(units).source == "Tree"
+        with raises(ValueError):
+            next(units)
+
     def test_combine_msgidcomments(self):
         """checks that we don't get duplicate msgid comments"""
         posource = 'msgid "test me"\nmsgstr ""'
@@ -149,3 +149,95 @@ class TestStatsDb:
         assert cache1 == cache2
         cache1.close()
         cache2.close()
+
+    def test_wal(self):
+        f, cache = self.setup_file_and_db(jtoolkit_extract)
+        cache.cur.execute("PRAGMA journal_mode;")
+        assert cache.cur.fetchone()[0] == "wal"
+        cache.close()
+
+    def test_touched_file_not_reparsed(self, monkeypatch):
+        f, cache = self.setup_file_and_db(jtoolkit_extract)
+        totals = cache.filetotals(f.filename)
+        fileid = self.make_file_and_return_id(cache, f.filename)[0]
+        mtime = os.path.getmtime(f.filename) + 10
+        os.utime(f.filename, (mtime, mtime))
+
+        def getobject(*args, **kwargs):
+            raise AssertionError("the file should not be parsed again")
+
+        monkeypatch.setattr(factory, "getobject", getobject)
+        assert cache.filetotals(f.filename) == totals
+        assert self.make_file_and_return_id(cache, f.filename) == (
+            fileid,
+            mtime,
+            os.path.getsize(f.filename),
+        )
+        cache.close()
+
+    def test_recache_changed_units(self, monkeypatch):
+        f, cache = self.setup_file_and_db(jtoolkit_extract)
+        checker = checks.UnitChecker()
+        cache.filestats(f.filename, checker)
+        fileid = self.make_file_and_return_id(cache, f.filename)[0]
+        cache.cur.execute("SELECT id, unitindex FROM units ORDER BY unitindex;")
+        rows = cache.cur.fetchall()
+
+        counted = []
+        wordsinunit = statsdb.wordsinunit
+        monkeypatch.setattr(
+            statsdb,
+            "wordsinunit",
+            lambda unit: counted.append(unit.source) or wordsinunit(unit),
+        )
+        with open(f.filename, "w") as fh:
+            fh.write(
+                jtoolkit_extract[: -len('msgstr ""\n')]
+                + 'msgstr ", bevestig asseblief aanmelding"\n'
+            )
+        s = cache.filestats(f.filename, checker)
+        assert counted == [", please confirm login"]
+        assert s["translated"] == [2, 3, 5, 6]
+        assert s["untranslated"] == []
+        assert self.make_file_and_return_id(cache, f.filename)[0] == fileid
+        cache.cur.execute("SELECT id, unitindex FROM units ORDER BY unitindex;")
+        assert cache.cur.fetchall() == rows
+        assert cache.filetotals(f.filename)["translated"] == 4
+        cache.close()
+
+    def test_recache_inserted_unit(self, monkeypatch):
+        f, cache = self.setup_file_and_db(jtoolkit_extract)
+        checker = checks.StandardChecker()
+        cache.filestats(f.filename, checker)
+        cache.cur.execute("SELECT id, unitindex FROM units ORDER BY unitindex;")
+        rows = cache.cur.fetchall()
+
+        counted = []
+        wordsinunit = statsdb.wordsinunit
+        monkeypatch.setattr(
+            statsdb,
+            "wordsinunit",
+            lambda unit: counted.append(unit.source) or wordsinunit(unit),
+        )
+        checked = []
+        run_filters = checker.run_filters
+        monkeypatch.setattr(
+            checker,
+            "run_filters",
+            lambda unit: checked.append(unit.source) or run_filters(unit),
+        )
+        header, separator, body = jtoolkit_extract.partition("\n\n")
+        with open(f.filename, "w") as fh:
+            fh.write(header + '\n\nmsgid "Open %s"\nmsgstr "Maak oop"\n\n' + body)
+        s = cache.filestats(f.filename, checker)
+        # only the inserted unit is counted and checked
+        assert counted == ["Open %s"]
+        assert checked == ["Open %s"]
+        cache.cur.execute("SELECT id, unitindex FROM units ORDER BY unitindex;")
+        assert cache.cur.fetchall()[1:] == [(rowid, index + 1) for rowid, index in rows]
+        monkeypatch.undo()
+        fresh = statsdb.StatsCache(os.path.join(self.path, "fresh.db"))
+        assert s == fresh.filestats(f.filename, checks.StandardChecker())
+        assert s["check-printf"] == [1]
+        fresh.close()
+        cache.close()
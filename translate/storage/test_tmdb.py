@@ -0,0 +1,264 @@
+import os
+from sqlite3 import dbapi2
+
+import pytest
+
+from translate.storage import tmdb
+
+
+class FTS3TMDB(tmdb.TMDB):
+    """A TMDB as created by SQLite versions without fts5"""
+
+    def init_trigram(self):
+        return False
+
+
+class TestTMDB:
+    def setup_method(self, method):
+        self.filename = "%s_%s.tmdb" % (self.__class__.__name__, method.__name__)
+        self.remove_db()
+
+    def teardown_method(self, method):
+        for connection, cursor in tmdb.TMDB._tm_dbs.pop(self.filename, {}).values():
+            connection.close()
+        tmdb.TMDB._tm_caches.pop(self.filename, None)
+        self.remove_db()
+
+    def remove_db(self):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.filename + suffix):
+                os.remove(self.filename + suffix)
+
+    def add_sample(self, db):
+        db.add_list(
+            [
+                {
+                    "source": "Open the file",
+                    "target": "Maak die lêer oop",
+                    "context": "",
+                },
+                {
+                    "source": "Close the file",
+                    "target": "Maak die lêer toe",
+                    "context": "",
+                },
+                {"source": "Save", "target": "Stoor", "context": ""},
+                {"source": "OK", "target": "Goed", "context": ""},
+            ],
+            "en",
+            "af",
+        )
+
+    def test_translate_unit(self):
+        db = tmdb.TMDB(self.filename)
+        self.add_sample(db)
+        results = db.translate_unit("Open the files", "en", "af")
+        assert [result["target"] for result in results] == ["Maak die lêer oop"]
+        results = db.translate_unit("Save", "en", "af")
+        assert results[0]["target"] == "Stoor"
+        assert results[0]["quality"] == 100
+        results = db.translate_unit("OK", "en", "af")
+        assert results[0]["target"] == "Goed"
+        assert db.translate_unit("Something else", "en", "af") == []
+
+    def test_translate_unit_low_similarity(self):
+        """checks the length window is used if any string can be similar"""
+        db = tmdb.TMDB(self.filename, min_similarity=70)
+        db.add_dict(
+            {"source": "Add the new one", "target": "Voeg die nuwe by", "context": ""},
+            "en",
+            "af",
+        )
+        results = db.translate_unit("Add the new one", "en", "af")
+        assert [result["target"] for result in results] == ["Voeg die nuwe by"]
+        results = db.translate_unit("Add the new ones", "en", "af")
+        assert [result["target"] for result in results] == ["Voeg die nuwe by"]
+
+    def test_migrate_fts3(self):
+        """checks that a fts3 fulltext table is replaced by a trigram one"""
+        db = FTS3TMDB(self.filename)
+        self.add_sample(db)
+        db.connection.close()
+        tmdb.TMDB._tm_dbs.pop(self.filename)
+        db = tmdb.TMDB(self.filename)
+        if db.trigram:
+            db.cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'fulltext'")
+            assert "fts5" in db.cursor.fetchone()[0]
+        results = db.translate_unit("Close the files", "en", "af")
+        assert [result["target"] for result in results] == ["Maak die lêer toe"]
+        db.add_list(
+            [
+                {
+                    "source": "Delete the file",
+                    "target": "Vee die lêer uit",
+                    "context": "",
+                }
+            ],
+            "en",
+            "af",
+        )
+        results = db.translate_unit("Delete the files", "en", "af")
+        assert [result["target"] for result in results] == ["Vee die lêer uit"]
+
+    def test_cache(self):
+        db = tmdb.TMDB(self.filename)
+        self.add_sample(db)
+        results = db.translate_unit("Save", "en", "af")
+        assert db.cache.get_stats()["misses"] == 1
+        results[0]["target"] = "changed"
+        assert db.translate_unit("Save", "en", "af")[0]["target"] == "Stoor"
+        assert db.cache.get_stats()["hits"] == 1
+        # another language pair is not affected by the insert
+        assert db.translate_unit("Save", "en", "fr") == []
+        db.add_list([{"source": "Save", "target": "Spaar", "context": ""}], "en", "af")
+        assert len(db.cache) == 1
+        results = db.translate_unit("Save", "en", "af")
+        assert sorted(result["target"] for result in results) == ["Spaar", "Stoor"]
+        assert db.cache.get_stats()["misses"] == 3
+        db.translate_unit("Save", "en", "fr")
+        assert db.cache.get_stats()["hits"] == 2
+
+    def test_cache_scores(self):
+        """checks that cached results are the same as computed ones"""
+        db = tmdb.TMDB(self.filename)
+        db.add_dict({"source": "Open", "target": "Oop", "context": ""}, "en", "af")
+        self.add_sample(db)
+        sources = ("OPEN", "  open   ", "Open the  file", "Open")
+        computed = []
+        for source in sources:
+            db.cache.clear()
+            computed.append(db.translate_unit(source, "en", "af"))
+        assert computed[0] == computed[1] == []
+        assert 0 < computed[2][0]["quality"] < 100
+        assert computed[3][0]["quality"] == 100
+        for source in sources:
+            db.translate_unit(source, "en", "af")
+        hits = db.cache.get_stats()["hits"]
+        assert [db.translate_unit(source, "en", "af") for source in sources] == computed
+        assert db.cache.get_stats()["hits"] == hits + len(sources)
+
+    def test_close(self):
+        db = tmdb.TMDB(self.filename)
+        self.add_sample(db)
+        db.translate_unit("Save", "en", "af")
+        cache = db.cache
+        db.close()
+        assert cache.connection is None
+        assert self.filename not in tmdb.TMDB._tm_caches
+        assert self.filename not in tmdb.TMDB._tm_dbs
+        other = tmdb.TMDB(self.filename)
+        assert other.cache is not cache
+        assert len(other.cache) == 0
+        assert other.translate_unit("Save", "en", "af")[0]["target"] == "Stoor"
+
+    def test_cache_size(self):
+        db = tmdb.TMDB(self.filename, cache_size=2)
+        self.add_sample(db)
+        db.translate_unit("Save", "en", "af")
+        db.translate_unit("OK", "en", "af")
+        db.translate_unit("Save", "en", "af")
+        db.translate_unit("Open the files", "en", "af")
+        assert len(db.cache) == 2
+        db.translate_unit("Save", "en", "af")
+        assert db.cache.get_stats()["hits"] == 2
+        db.translate_unit("OK", "en", "af")
+        assert db.cache.get_stats()["hits"] == 2
+
+    def test_cache_external_change(self):
+        db = tmdb.TMDB(self.filename)
+        self.add_sample(db)
+        assert db.translate_unit("Save", "en", "af")[0]["target"] == "Stoor"
+        # another process, like build_tmdb, changes the database
+        connection = dbapi2.connect(self.filename)
+        connection.execute("UPDATE targets SET text = 'Bewaar' WHERE text = 'Stoor'")
+        connection.commit()
+        connection.close()
+        assert db.translate_unit("Save", "en", "af")[0]["target"] == "Bewaar"
+        assert db.cache.get_stats()["hits"] == 0
+
+    def test_cache_size_shared(self):
+        db = tmdb.TMDB(self.filename)
+        self.add_sample(db)
+        db.translate_unit("Save", "en", "af")
+        db.translate_unit("OK", "en", "af")
+        other = tmdb.TMDB(self.filename, cache_size=1)
+        assert other.cache is db.cache
+        assert len(db.cache) == 1
+        tmdb.TMDB(self.filename)
+        assert db.cache.get_stats()["max_size"] == 1
+
+    def test_get_stats(self):
+        db = tmdb.TMDB(self.filename)
+        self.add_sample(db)
+        db.add_list([{"source": "Save", "target": "Sauver", "context": ""}], "en", "fr")
+        stats = db.get_stats("en", "af")
+        assert stats["sources"] == 4
+        assert stats["targets"] == 4
+        assert db.get_stats()["targets"] == 5
+        assert stats["cache"]["size"] == 0
+
+    def test_add_list_duplicates(self):
+        db = tmdb.TMDB(self.filename)
+        self.add_sample(db)
+        count = db.add_list(
+            [
+                {"source": "Save", "target": "Stoor", "context": ""},
+                {"source": "Save", "target": "Bewaar", "context": ""},
+                {"source": "Save", "target": "Bewaar", "context": "menu"},
+            ],
+            "en",
+            "af",
+        )
+        assert count == 3
+        assert db.get_stats("en", "af")["sources"] == 5
+        assert db.get_stats("en", "af")["targets"] == 6
+
+    def test_bulk_import(self):
+        db = tmdb.TMDB(self.filename)
+        self.add_sample(db)
+        db.cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger'")
+        (triggers,) = db.cursor.fetchone()
+        db.cursor.execute("PRAGMA journal_mode")
+        (journal_mode,) = db.cursor.fetchone()
+        with db.bulk_import():
+            db.cursor.execute("PRAGMA synchronous")
+            assert db.cursor.fetchone()[0] == 0
+            db.add_list(
+                [
+                    {
+                        "source": "Delete the file",
+                        "target": "Vee die lêer uit",
+                        "context": "",
+                    }
+                ],
+                "en",
+                "af",
+                commit=False,
+            )
+        db.cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger'")
+        assert db.cursor.fetchone()[0] == triggers
+        db.cursor.execute("PRAGMA synchronous")
+        assert db.cursor.fetchone()[0] != 0
+        db.cursor.execute("PRAGMA journal_mode")
+        assert db.cursor.fetchone()[0] == journal_mode
+        results = db.translate_unit("Delete the files", "en", "af")
+        assert [result["target"] for result in results] == ["Vee die lêer uit"]
+        # the triggers work again
+        db.add_list(
+            [{"source": "Open a file", "target": "Maak oop", "context": ""}], "en", "af"
+        )
+        results = db.translate_unit("Open a files", "en", "af")
+        assert results[0]["target"] == "Maak oop"
+        # nothing is left of a failed import
+        with pytest.raises(ValueError):
+            with db.bulk_import():
+                db.add_list(
+                    [{"source": "Close a file", "target": "Maak toe", "context": ""}],
+                    "en",
+                    "af",
+                    commit=False,
+                )
+                raise ValueError
+        db.cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger'")
+        assert db.cursor.fetchone()[0] == triggers
+        assert db.translate_unit("Close a files", "en", "af") == []
@@ -75,6 +75,19 @@ class TestTMXfile(test_base.TestTranslationStore):
         print(bytes(tmxfile))
         assert newfile.translate("First line\nSecond line") == "Eerste lyn\nTweede lyn"
 
+    def test_iterparse(self):
+        """checks that iterparse yields the same units as parse"""
+        tmxfile = tmx.tmxfile()
+        tmxfile.addtranslation("First", "en", "Eerste", "af", "comment")
+        tmxfile.addtranslation("Mail & News", "en", "Nuus & pos", "af")
+        units = list(tmx.tmxfile.iterparse(BytesIO(bytes(tmxfile))))
+        assert [(unit.source, unit.target, unit.getnotes()) for unit in units] == [
+            ("First", "Eerste", "comment"),
+            ("Mail & News", "Nuus & pos", ""),
+        ]
+        # the languages are known, as needed by build_tmdb
+        assert units[0].getsourcelanguage() == "en"
+
     def test_xmlentities(self):
         """Test that the xml entities '&' and '<'  are escaped correctly"""
         tmxfile = tmx.tmxfile()
@@ -1,7 +1,9 @@
+from io import BytesIO
+
 from lxml import etree
 
 from translate.misc.xml_helpers import setXMLspace
-from translate.storage import test_base, xliff
+from translate.storage import poxliff, test_base, xliff
 from translate.storage.placeables import StringElem
 from translate.storage.placeables.xliff import G, X
 
@@ -73,6 +75,17 @@ class TestXLIFFUnit(test_base.TestTranslationUnit):
             self.unit.target = "Een%s" % chr(int(code, 16))
             assert self.unit.target == "Een%s" % chr(int(code, 16))
 
+    def test_languagenodes(self):
+        unit = xliff.xliffunit("One")
+        assert unit.getlanguageNode(index=0) is unit.getlanguageNodes()[0]
+        assert unit.getlanguageNode(index=1) is None
+        unit.target = "Een"
+        assert unit.getlanguageNode(index=1) is unit.getlanguageNodes()[1]
+        # Without a source there are no language nodes
+        unit.xmlelement.remove(unit.getlanguageNode(index=0))
+        assert unit.getlanguageNodes() == []
+        assert unit.getlanguageNode(index=1) is None
+
     def test_unaccepted_control_chars_escapes_roundtrip(self):
         """Test control characters go ok on escaping roundtrip."""
         for code in xliff.ASCII_CONTROL_CODES:
@@ -532,6 +545,73 @@ class TestXLIFFfile(test_base.TestTranslationStore):
         assert newxfile.getfilenode("file1") is not None
         assert not newxfile.getfilenode("foo")
 
+    def test_filenode_index(self):
+        xfile = xliff.xlifffile()
+        for filename in ("file0", "file1", "file0"):
+            unitid = str(len(xfile.units))
+            xunit = xliff.xlifffile.UnitClass(source=unitid)
+            xunit.setid("%s\x04%s" % (filename, unitid))
+            xfile.addunit(xunit)
+        assert xfile.getfilenames() == ["file0", "file1"]
+        assert list(xfile.getids("file0")) == ["0", "2"]
+        assert list(xfile.getids("file1")) == ["1"]
+        assert xfile.findid("1") is xfile.units[1]
+        file0 = xfile.getfilenode("file0")
+        xfile.setfilename(file0, "renamed")
+        assert xfile.getfilenode("renamed") is file0
+        assert xfile.getfilenode("file0") is None
+        # a node renamed directly is found by its new name
+        file0.set("original", "other")
+        assert xfile.getfilenode("other") is file0
+        assert xfile.getfilenode("renamed") is None
+        xfile.removeunit(xfile.units[2])
+        assert list(xfile.getids("other")) == ["0"]
+
+    def test_getids_changed(self):
+        xfile = xliff.xlifffile()
+        xunit = xliff.xlifffile.UnitClass(source="One")
+        xunit.setid("f\x04one")
+        xfile.addunit(xunit)
+        assert list(xfile.getids("f")) == ["one"]
+        xunit.setid("two")
+        assert list(xfile.getids("f")) == ["two"]
+        xfile.setfilename(xfile.getfilenode("f"), "g")
+        assert list(xfile.getids("g")) == ["two"]
+        assert list(xfile.getids("f")) == []
+
+    def test_iterparse(self):
+        xlfsource = self.skeleton % (
+            '<trans-unit id="1"><source>One</source><target>Een</target></trans-unit>'
+            '<group><trans-unit id="2"><source>Two</source></trans-unit></group>'
+        )
+        ids = []
+        for unit in xliff.xlifffile.iterparse(BytesIO(xlfsource.encode("utf-8"))):
+            # ids depend on the file node, which is there until the next unit
+            ids.append(unit.getid())
+            assert unit.getsourcelanguage() == "en-US"
+        assert ids == ["doc.txt\x041", "doc.txt\x042"]
+        xlfsource = xlfsource.replace('source-language="en-US"', 'datatype="po"')
+        units = xliff.xlifffile.iterparse(BytesIO(xlfsource.encode("utf-8")))
+        assert [type(unit) for unit in units] == [poxliff.PoXliffUnit] * 2
+        # finished groups and files are not kept in the document
+        group = '<group><trans-unit id="%d"><source>Text</source></trans-unit></group>'
+        filenode = (
+            '<file original="doc%d.txt" source-language="en-US"><body>%s</body></file>'
+        )
+        xlfsource = (
+            '<xliff xmlns="urn:oasis:names:tc:xliff:document:1.1" version="1.1">%s</xliff>'
+            % "".join(
+                filenode % (i, "".join(group % j for j in range(50))) for i in range(2)
+            )
+        )
+        ids = []
+        for unit in xliff.xlifffile.iterparse(BytesIO(xlfsource.encode("utf-8"))):
+            ids.append(unit.getid())
+            root = unit.xmlelement.getroottree().getroot()
+        assert len(ids) == 100
+        assert len(list(root.iter())) == 6
+        assert ids[-1] == "doc1.txt\x0449"
+
     def test_indent(self):
         xlfsource = b"""<?xml version='1.0' encoding='UTF-8'?>
 <xliff xmlns="urn:oasis:names:tc:xliff:document:1.1" version="1.1">
@@ -24,10 +24,14 @@ import math
 import re
 import threading
 import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import islice
 from sqlite3 import dbapi2
 
 from translate.lang import data
 from translate.search.lshtein import LevenshteinComparer
+from translate.search.qgram import qgrams, required_qgrams
 
 
 STRIP_REGEXP = re.compile(r"\W", re.UNICODE)
@@ -41,10 +45,203 @@ class LanguageError(Exception):
         return str(self.value)
 
 
+def getlanguages(unit, source_lang=None, target_lang=None):
+    """returns the source and target language of unit, falling back to the
+    given languages
+    """
+    # TODO: is that really the best way to handle unspecified
+    # source and target languages? what about conflicts between
+    # unit attributes and passed arguments
+    if unit.getsourcelanguage():
+        source_lang = unit.getsourcelanguage()
+    if unit.gettargetlanguage():
+        target_lang = unit.gettargetlanguage()
+
+    if not source_lang:
+        raise LanguageError("undefined source language")
+    if not target_lang:
+        raise LanguageError("undefined target language")
+    return source_lang, target_lang
+
+
+def iterbatches(units, source_lang=None, target_lang=None, batchsize=1000):
+    """yields (source_lang, target_lang, dicts) tuples with the translated
+    units in batches, represented as dictionaries as expected by
+    :meth:`TMDB.add_list`
+    """
+    batches = {}
+    for unit in units:
+        if not (unit.istranslatable() and unit.istranslated()):
+            continue
+        languages = getlanguages(unit, source_lang, target_lang)
+        batch = batches.setdefault(languages, [])
+        batch.append(
+            {"source": unit.source, "target": unit.target, "context": unit.getcontext()}
+        )
+        if len(batch) >= batchsize:
+            yield languages + (batches.pop(languages),)
+    for languages, batch in batches.items():
+        yield languages + (batch,)
+
+
+class SuggestionCache:
+    """A bounded least recently used cache of TM suggestions.
+
+    Entries are keyed by the source string, the languages and the settings
+    affecting the results. The source is not normalized, as strings only
+    differing in case or whitespace get different scores. Inserting a
+    translation drops the entries of its language pair, other suggestions
+    stay valid. Changes committed otherwise,
+    like by build_tmdb while tmserver is running, are noticed through the
+    ``data_version`` of db_file and drop all entries.
+    """
+
+    def __init__(self, max_size=1024, db_file=None):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        # maps every (source language, target language) pair to the keys of
+        # the entries involving it
+        self.pairs = {}
+        self.lock = threading.Lock()
+        # bumped on every invalidation, so that results computed while the
+        # database changed are not stored
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        # a connection of its own, as the data_version of a connection only
+        # changes with the commits of other connections
+        self.connection = None
+        if db_file is not None:
+            self.connection = dbapi2.connect(db_file, check_same_thread=False)
+        self.data_version = self.get_data_version()
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def getpairs(key):
+        source_langs, target_langs = key[1], key[2]
+        return [
+            (source_lang, target_lang)
+            for source_lang in source_langs.split(",")
+            for target_lang in target_langs.split(",")
+        ]
+
+    def get_data_version(self):
+        if self.connection is None:
+            return None
+        (data_version,) = self.connection.execute("PRAGMA data_version").fetchone()
+        return data_version
+
+    def refresh(self):
+        """Drops all entries if the database changed without invalidating
+        them.
+        """
+        with self.lock:
+            data_version = self.get_data_version()
+            if data_version != self.data_version:
+                self.data_version = data_version
+                self.generation += 1
+                self.entries.clear()
+                self.pairs.clear()
+
+    def resize(self, max_size):
+        with self.lock:
+            self.max_size = max_size
+            while self.entries and len(self.entries) > max_size:
+                self.remove(next(iter(self.entries)))
+
+    def get(self, key):
+        """Returns a copy of the cached results for key, or None."""
+        with self.lock:
+            try:
+                results = self.entries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+        return [dict(result) for result in results]
+
+    def set(self, key, results, generation):
+        """Stores results for key, unless the cache was invalidated after
+        generation.
+        """
+        if self.max_size <= 0:
+            return
+        with self.lock:
+            if generation != self.generation:
+                return
+            self.entries[key] = [dict(result) for result in results]
+            self.entries.move_to_end(key)
+            for pair in self.getpairs(key):
+                self.pairs.setdefault(pair, set()).add(key)
+            while len(self.entries) > self.max_size:
+                self.remove(next(iter(self.entries)))
+
+    def remove(self, key):
+        del self.entries[key]
+        for pair in self.getpairs(key):
+            keys = self.pairs[pair]
+            keys.discard(key)
+            if not keys:
+                del self.pairs[pair]
+
+    def invalidate(self, source_lang, target_lang):
+        """Drops all entries involving the language pair, after it was
+        changed.
+        """
+        with self.lock:
+            self.generation += 1
+            # this change is no reason to drop the other entries (a change by
+            # somebody else committed meanwhile goes unnoticed, though)
+            self.data_version = self.get_data_version()
+            for key in list(self.pairs.get((source_lang, target_lang), ())):
+                self.remove(key)
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.data_version = self.get_data_version()
+            self.entries.clear()
+            self.pairs.clear()
+
+    def close(self):
+        """Closes the connection to the database, changes by others are not
+        noticed any more.
+        """
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "size": len(self.entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
 class TMDB:
     _tm_dbs = {}
-
-    def __init__(self, db_file, max_candidates=3, min_similarity=75, max_length=1000):
+    # suggestion caches, shared like the connections so that any instance
+    # writing to a database invalidates them. A cache_size given to any of the
+    # instances applies to the shared cache. Both are kept until close().
+    _tm_caches = {}
+    # the number of best ranked trigram index matches that are compared
+    max_fulltext_candidates = 100
+
+    def __init__(
+        self,
+        db_file,
+        max_candidates=3,
+        min_similarity=75,
+        max_length=1000,
+        cache_size=None,
+    ):
 
         self.max_candidates = max_candidates
         self.min_similarity = min_similarity
@@ -57,6 +254,11 @@ class TMDB:
         if db_file not in self._tm_dbs:
             self._tm_dbs[db_file] = {}
         self._tm_db = self._tm_dbs[db_file]
+        if db_file not in self._tm_caches:
+            self._tm_caches[db_file] = SuggestionCache(db_file=db_file)
+        self.cache = self._tm_caches[db_file]
+        if cache_size is not None:
+            self.cache.resize(cache_size)
 
         # FIXME: do we want to do any checks before we initialize the DB?
         self.init_database()
@@ -78,6 +280,20 @@ class TMDB:
     connection = property(lambda self: self._get_connection(0))
     cursor = property(lambda self: self._get_connection(1))
 
+    def close(self):
+        """closes the connections to the database shared by the instances
+        using it, and drops its suggestion cache
+        """
+        connections = self._tm_dbs.pop(self.db_file, {})
+        # the connections of other threads can only be dropped, they are
+        # closed once they are garbage collected
+        if threading.currentThread() in connections:
+            connections[threading.currentThread()][0].close()
+        self._tm_db.clear()
+        cache = self._tm_caches.pop(self.db_file, None)
+        if cache is not None:
+            cache.close()
+
     def init_database(self):
         """creates database tables and indices"""
 
@@ -116,6 +332,80 @@ CREATE UNIQUE INDEX IF NOT EXISTS targets_uniq_idx ON targets (sid, text, lang);
             raise
 
     def init_fulltext(self):
+        """initializes the fulltext index table, using fts5 with the trigram
+        tokenizer when SQLite supports it and fts3 otherwise
+        """
+        if self.init_trigram():
+            self.fulltext = True
+            self.trigram = True
+        else:
+            self.trigram = False
+            self.init_fts3()
+
+    def init_trigram(self):
+        """initializes an fts5 trigram fulltext index table if supported
+
+        A fulltext table from an older database (fts3, or one that was left
+        out of sync) is replaced and rebuilt from the sources table.
+        """
+        try:
+            script = """
+DROP TABLE IF EXISTS temp.test_for_fts5;
+CREATE VIRTUAL TABLE temp.test_for_fts5 USING fts5(text, tokenize='trigram');
+DROP TABLE temp.test_for_fts5;
+"""
+            self.cursor.executescript(script)
+        except dbapi2.OperationalError as e:
+            logging.debug("fts5 trigram tokenizer not supported: " + str(e))
+            return False
+        logging.debug("fts5 trigram tokenizer supported")
+
+        self.cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'fulltext'")
+        table = self.cursor.fetchone()
+        # the triggers are missing if a bulk import was interrupted
+        self.cursor.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name IN "
+            "('sources_insert_trig', 'sources_update_trig', 'sources_delete_trig')"
+        )
+        (triggers,) = self.cursor.fetchone()
+        if table and "fts5" in table[0].lower() and triggers == 3:
+            logging.debug("fulltext table already exists")
+            return True
+
+        # the index uses sources as external content table, the triggers
+        # keep it in sync
+        script = """
+DROP TRIGGER IF EXISTS sources_insert_trig;
+DROP TRIGGER IF EXISTS sources_update_trig;
+DROP TRIGGER IF EXISTS sources_delete_trig;
+DROP TABLE IF EXISTS fulltext;
+CREATE VIRTUAL TABLE fulltext USING fts5(text, content='sources', content_rowid='sid', tokenize='trigram');
+CREATE VIRTUAL TABLE IF NOT EXISTS fulltext_vocab USING fts5vocab(fulltext, row);
+INSERT INTO fulltext (fulltext) VALUES ('rebuild');
+CREATE TRIGGER sources_insert_trig AFTER INSERT ON sources FOR EACH ROW
+BEGIN
+    INSERT INTO fulltext (rowid, text) VALUES (NEW.sid, NEW.text);
+END;
+CREATE TRIGGER sources_update_trig AFTER UPDATE OF text ON sources FOR EACH ROW
+BEGIN
+    INSERT INTO fulltext (fulltext, rowid, text) VALUES ('delete', OLD.sid, OLD.text);
+    INSERT INTO fulltext (rowid, text) VALUES (NEW.sid, NEW.text);
+END;
+CREATE TRIGGER sources_delete_trig AFTER DELETE ON sources FOR EACH ROW
+BEGIN
+    INSERT INTO fulltext (fulltext, rowid, text) VALUES ('delete', OLD.sid, OLD.text);
+END;
+"""
+        try:
+            self.cursor.executescript(script)
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+        logging.debug("created fts5 fulltext table and triggers")
+        return True
+
+    def init_fts3(self):
         """detects if fts3 fulltext indexing module exists, initializes fulltext table if it does"""
 
         # HACKISH: no better way to detect fts3 support except trying to
@@ -180,7 +470,7 @@ DROP TRIGGER IF EXISTS sources_delete_trig;
         performance
         """
         if self.fulltext:
-            query = """SELECT COUNT(*) FROM sources s JOIN fulltext f ON s.sid = f.docid JOIN targets t on s.sid = t.sid"""
+            query = """SELECT COUNT(*) FROM sources s JOIN fulltext f ON s.sid = f.rowid JOIN targets t on s.sid = t.sid"""
         else:
             query = """SELECT COUNT(*) FROM sources s JOIN targets t on s.sid = t.sid"""
         self.cursor.execute(query)
@@ -190,19 +480,7 @@ DROP TRIGGER IF EXISTS sources_delete_trig;
 
     def add_unit(self, unit, source_lang=None, target_lang=None, commit=True):
         """inserts unit in the database"""
-        # TODO: is that really the best way to handle unspecified
-        # source and target languages? what about conflicts between
-        # unit attributes and passed arguments
-        if unit.getsourcelanguage():
-            source_lang = unit.getsourcelanguage()
-        if unit.gettargetlanguage():
-            target_lang = unit.gettargetlanguage()
-
-        if not source_lang:
-            raise LanguageError("undefined source language")
-        if not target_lang:
-            raise LanguageError("undefined target language")
-
+        source_lang, target_lang = getlanguages(unit, source_lang, target_lang)
         unitdict = {
             "source": unit.source,
             "target": unit.target,
@@ -246,14 +524,22 @@ DROP TRIGGER IF EXISTS sources_delete_trig;
             if commit:
                 self.connection.rollback()
             raise
+        finally:
+            self.cache.invalidate(source_lang, target_lang)
 
     def add_store(self, store, source_lang, target_lang, commit=True):
         """insert all units in store in database"""
+        return self.add_units(store.units, source_lang, target_lang, commit)
+
+    def add_units(self, units, source_lang, target_lang, commit=True):
+        """insert all units in the iterable units in database"""
         count = 0
-        for unit in store.units:
-            if unit.istranslatable() and unit.istranslated():
-                self.add_unit(unit, source_lang, target_lang, commit=False)
-                count += 1
+        for batch_source_lang, batch_target_lang, batch in iterbatches(
+            units, source_lang, target_lang
+        ):
+            count += self.add_list(
+                batch, batch_source_lang, batch_target_lang, commit=False
+            )
         if commit:
             self.connection.commit()
         return count
@@ -262,14 +548,142 @@ DROP TRIGGER IF EXISTS sources_delete_trig;
         """insert all units in list into the database, units are represented as
         dictionaries
         """
+        source_lang = data.normalize_code(source_lang)
+        target_lang = data.normalize_code(target_lang)
+        units = iter(units)
         count = 0
-        for unit in units:
-            self.add_dict(unit, source_lang, target_lang, commit=False)
-            count += 1
-        if commit:
-            self.connection.commit()
+        try:
+            batch = list(islice(units, 1000))
+            while batch:
+                self.cursor.executemany(
+                    "INSERT OR IGNORE INTO sources (text, context, lang, length) VALUES (?, ?, ?, ?)",
+                    [
+                        (
+                            unit["source"],
+                            unit["context"],
+                            source_lang,
+                            len(unit["source"]),
+                        )
+                        for unit in batch
+                    ],
+                )
+                now = int(time.time())
+                self.cursor.executemany(
+                    """INSERT OR IGNORE INTO targets (sid, text, lang, time)
+                       SELECT sid, ?, ?, ? FROM sources WHERE text = ? AND context IS ? AND lang = ?""",
+                    [
+                        (
+                            unit["target"],
+                            target_lang,
+                            now,
+                            unit["source"],
+                            unit["context"],
+                            source_lang,
+                        )
+                        for unit in batch
+                    ],
+                )
+                count += len(batch)
+                batch = list(islice(units, 1000))
+            if commit:
+                self.connection.commit()
+        except Exception:
+            if commit:
+                self.connection.rollback()
+            raise
+        finally:
+            self.cache.invalidate(source_lang, target_lang)
         return count
 
+    @contextmanager
+    def bulk_import(self):
+        """a context for adding many units at once
+
+        The fulltext index is only updated at the end, everything is added in
+        a single transaction and syncing to disk is disabled meanwhile. The
+        journal mode of the database is left alone.
+        """
+        self.connection.commit()
+        self.cursor.execute("PRAGMA synchronous")
+        (synchronous,) = self.cursor.fetchone()
+        self.cursor.execute("PRAGMA synchronous = OFF")
+        try:
+            # an explicit transaction, so that savepoints do not commit and
+            # the triggers are only dropped along with the import. Should the
+            # process die before the triggers are restored anyway,
+            # init_trigram() rebuilds the index and the triggers on the next
+            # open.
+            self.cursor.execute("BEGIN")
+            self.cursor.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'sources'"
+            )
+            triggers = self.cursor.fetchall()
+            self.cursor.execute("SELECT IFNULL(MAX(sid), 0) FROM sources")
+            (lastsid,) = self.cursor.fetchone()
+            for name, sql in triggers:
+                self.cursor.execute("DROP TRIGGER %s" % name)
+            yield self
+            # index the new strings and restore the triggers
+            if self.fulltext:
+                self.cursor.execute(
+                    "INSERT INTO fulltext (rowid, text) SELECT sid, text FROM sources WHERE sid > ?",
+                    (lastsid,),
+                )
+            for name, sql in triggers:
+                self.cursor.execute(sql)
+            self.connection.commit()
+        except Exception:
+            # this restores the triggers as well
+            self.connection.rollback()
+            raise
+        finally:
+            self.cursor.execute("PRAGMA synchronous = %d" % synchronous)
+            self.cache.clear()
+
+    @contextmanager
+    def savepoint(self):
+        """a context undoing the changes made in it on an exception, without
+        ending the current transaction
+        """
+        self.cursor.execute("SAVEPOINT tmdb_savepoint")
+        try:
+            yield self
+        except Exception:
+            self.cursor.execute("ROLLBACK TO tmdb_savepoint")
+            raise
+        finally:
+            self.cursor.execute("RELEASE tmdb_savepoint")
+
+    def get_trigram_query(self, text, maxlen):
+        """returns a fulltext query for the strings up to maxlen characters
+        long that can be similar enough to text, or None if all of them can be
+        """
+        text = text[: self.max_length]
+        grams = qgrams(text.lower())
+        required = min(
+            required_qgrams(length, self.min_similarity)
+            for length in range(len(text), max(len(text), maxlen) + 1)
+        )
+        if required <= 0:
+            return None
+        self.cursor.execute(
+            "SELECT term, doc FROM fulltext_vocab WHERE term IN (%s)"
+            % ",".join("?" * len(grams)),
+            list(grams),
+        )
+        docs = dict(self.cursor.fetchall())
+        # a string sharing less than the required number of trigrams is never
+        # similar enough, so it has to contain one of the rarest trigrams
+        # that leave less than that number
+        remaining = sum(grams.values())
+        selected = []
+        for gram in sorted(grams, key=lambda gram: docs.get(gram, 0)):
+            if remaining < required:
+                break
+            selected.append('"%s"' % gram.replace('"', '""'))
+            remaining -= grams[gram]
+        return " OR ".join(selected)
+
     def translate_unit(self, unit_source, source_langs, target_langs):
         """return TM suggestions for unit_source"""
         if isinstance(unit_source, bytes):
@@ -285,6 +699,21 @@ DROP TRIGGER IF EXISTS sources_delete_trig;
         else:
             target_langs = data.normalize_code(target_langs)
 
+        key = (
+            unit_source,
+            source_langs,
+            target_langs,
+            self.min_similarity,
+            self.max_candidates,
+            self.max_length,
+        )
+        self.cache.refresh()
+        results = self.cache.get(key)
+        if results is not None:
+            logging.debug("cached results: %s", str(results))
+            return results
+        generation = self.cache.generation
+
         minlen = min_levenshtein_length(len(unit_source), self.min_similarity)
         maxlen = max_levenshtein_length(
             len(unit_source), self.min_similarity, self.max_length
@@ -295,7 +724,28 @@ DROP TRIGGER IF EXISTS sources_delete_trig;
         unit_words = STRIP_REGEXP.sub(" ", unit_source).split()
         unit_words = list(filter(lambda word: len(word) > 2, unit_words))
 
-        if self.fulltext and len(unit_words) > 3:
+        if self.trigram:
+            search_str = self.get_trigram_query(unit_source, maxlen)
+        else:
+            search_str = None
+
+        if search_str:
+            logging.debug("trigram matching")
+            query = """SELECT s.text, t.text, s.context, s.lang, t.lang FROM fulltext f JOIN sources s ON s.sid = f.rowid JOIN targets t ON s.sid = t.sid
+                       WHERE fulltext MATCH ? AND s.lang IN (?) AND t.lang IN (?) AND s.length BETWEEN ? AND ?
+                       ORDER BY f.rank LIMIT ?"""
+            self.cursor.execute(
+                query,
+                (
+                    search_str,
+                    source_langs,
+                    target_langs,
+                    minlen,
+                    maxlen,
+                    self.max_fulltext_candidates,
+                ),
+            )
+        elif self.fulltext and not self.trigram and len(unit_words) > 3:
             logging.debug("fulltext matching")
             query = """SELECT s.text, t.text, s.context, s.lang, t.lang FROM sources s JOIN targets t ON s.sid = t.sid JOIN fulltext f ON s.sid = f.docid
                        WHERE s.lang IN (?) AND t.lang IN (?) AND s.length BETWEEN ? AND ?
@@ -326,8 +776,38 @@ DROP TRIGGER IF EXISTS sources_delete_trig;
         results.sort(key=lambda match: match["quality"], reverse=True)
         results = results[: self.max_candidates]
         logging.debug("results: %s", str(results))
+        self.cache.set(key, results, generation)
         return results
 
+    def get_stats(self, source_lang=None, target_lang=None):
+        """returns the number of source and target strings in the database,
+        optionally only those in the given languages, and the suggestion cache
+        statistics
+        """
+        query = "SELECT COUNT(*) FROM sources s"
+        params = ()
+        if source_lang:
+            query += " WHERE s.lang = ?"
+            params = (data.normalize_code(source_lang),)
+        self.cursor.execute(query, params)
+        (sources,) = self.cursor.fetchone()
+
+        query = "SELECT COUNT(*) FROM targets t JOIN sources s ON s.sid = t.sid"
+        conditions = []
+        params = []
+        if source_lang:
+            conditions.append("s.lang = ?")
+            params.append(data.normalize_code(source_lang))
+        if target_lang:
+            conditions.append("t.lang = ?")
+            params.append(data.normalize_code(target_lang))
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        self.cursor.execute(query, params)
+        (targets,) = self.cursor.fetchone()
+
+        return {"sources": sources, "targets": targets, "cache": self.cache.get_stats()}
+
 
 def min_levenshtein_length(length, min_similarity):
     return math.ceil(max(length * (min_similarity / 100.0), 2))
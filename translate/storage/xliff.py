@@ -21,6 +21,8 @@
 The official recommendation is to use the extention .xlf for XLIFF files.
 """
 
+import re
+
 from lxml import etree
 
 from translate.misc.multistring import multistring
@@ -80,6 +82,10 @@ ASCII_CONTROL_CHARACTERS_ESCAPES = {
     code: "&#x%s;" % code.lstrip("0") or "0" for code in ASCII_CONTROL_CODES
 }
 
+ASCII_CONTROL_CHARACTERS_RE = re.compile(
+    "[%s]" % "".join(ASCII_CONTROL_CHARACTERS.values())
+)
+
 
 class xliffunit(lisa.LISAunit):
     """A single term in the xliff file."""
@@ -132,7 +138,7 @@ class xliffunit(lisa.LISAunit):
     def getNodeText(self, languageNode, xml_space="preserve"):
         """Retrieves the term from the given :attr:`languageNode`."""
         text = super().getNodeText(languageNode, xml_space=xml_space)
-        if text is not None:
+        if text is not None and "&#x" in text:
             # Unescape the unaccepted ASCII control characters.
             for code, character in ASCII_CONTROL_CHARACTERS.items():
                 text = text.replace(ASCII_CONTROL_CHARACTERS_ESCAPES[code], character)
@@ -151,8 +157,11 @@ class xliffunit(lisa.LISAunit):
         # setXMLlang(langset, lang)
 
         # Escape the unaccepted ASCII control characters.
-        for code in ASCII_CONTROL_CODES:
-            text = text.replace(chr(int(code, 16)), "&#x%s;" % code.lstrip("0") or "0")
+        if ASCII_CONTROL_CHARACTERS_RE.search(text):
+            for code in ASCII_CONTROL_CODES:
+                text = text.replace(
+                    chr(int(code, 16)), "&#x%s;" % code.lstrip("0") or "0"
+                )
 
         langset.text = text
         return langset
@@ -175,6 +184,18 @@ class xliffunit(lisa.LISAunit):
                 nodes.append(target)
         return nodes
 
+    def getlanguageNode(self, lang=None, index=None):
+        """We override this to only look up the nodes that are needed."""
+        if lang or index not in (0, 1):
+            return super().getlanguageNode(lang, index)
+        # the same nodes as getlanguageNodes() returns
+        source = next(
+            self.xmlelement.iterchildren(self.namespaced(self.languageNode)), None
+        )
+        if index == 0 or source is None:
+            return source
+        return next(self.xmlelement.iterchildren(self.namespaced("target")), None)
+
     def set_rich_source(self, value, sourcelang="en"):
         sourcelanguageNode = self.get_source_dom()
         if sourcelanguageNode is None:
@@ -642,19 +663,25 @@ class xlifffile(lisa.LISAfile):
 
     def __init__(self, *args, **kwargs):
         self._filename = None
+        self._filenodes = None
+        self._fileids = None
         super().__init__(*args, **kwargs)
         self._messagenum = 0
 
-    def initbody(self):
+    @classmethod
+    def detect_namespace(cls, root):
         # detect the xliff namespace, handle both 1.1 and 1.2
-        for prefix, ns in self.document.getroot().nsmap.items():
-            if ns and ns.startswith(self.unversioned_namespace):
-                self.namespace = ns
-                break
-        else:
-            # handle crappy xliff docs without proper namespace declaration
-            # by simply using the xmlns default namespace
-            self.namespace = self.document.getroot().nsmap.get(None, None)
+        for prefix, ns in root.nsmap.items():
+            if ns and ns.startswith(cls.unversioned_namespace):
+                return ns
+        # handle crappy xliff docs without proper namespace declaration
+        # by simply using the xmlns default namespace
+        return root.nsmap.get(None, None)
+
+    def initbody(self):
+        self.namespace = self.detect_namespace(self.document.getroot())
+        self._filenodes = None
+        self._fileids = None
 
         if self._filename:
             filenode = self.getfilenode(self._filename, createifmissing=True)
@@ -680,13 +707,13 @@ class xlifffile(lisa.LISAfile):
             targetlanguage = self.targetlanguage
 
         # find the default NoName file tag and use it instead of creating a new one
-        for filenode in self.document.getroot().iterchildren(self.namespaced("file")):
-            if filenode.get("original") == "NoName":
-                filenode.set("original", filename)
-                filenode.set("source-language", sourcelanguage)
-                if targetlanguage:
-                    filenode.set("target-language", targetlanguage)
-                return filenode
+        filenode = self.getfilenode("NoName")
+        if filenode is not None:
+            self.setfilename(filenode, filename)
+            filenode.set("source-language", sourcelanguage)
+            if targetlanguage:
+                filenode.set("target-language", targetlanguage)
+            return filenode
 
         filenode = etree.Element(self.namespaced("file"))
         filenode.set("original", filename)
@@ -703,6 +730,8 @@ class xlifffile(lisa.LISAfile):
 
     def setfilename(self, filenode, filename):
         """set the name of the given file"""
+        self._filenodes = None
+        self._fileids = None
         return filenode.set("original", filename)
 
     def getfilenames(self):
@@ -714,12 +743,30 @@ class xlifffile(lisa.LISAfile):
             filenames = []
         return filenames
 
+    def _getfilenodes(self, rebuild=False):
+        """Returns the first filenode with every name.
+
+        The index is built again when file nodes were added or removed without
+        the methods of this class, as detected by the number of children of
+        the root node, or when asked to because a file node was renamed
+        without :meth:`setfilename`.
+        """
+        root = self.document.getroot()
+        if rebuild or self._filenodes is None or self._filenodes_count != len(root):
+            self._filenodes = {}
+            for filenode in root.iterchildren(self.namespaced("file")):
+                self._filenodes.setdefault(self.getfilename(filenode), filenode)
+            self._filenodes_count = len(root)
+        return self._filenodes
+
     def getfilenode(self, filename, createifmissing=False):
         """finds the filenode with the given name"""
-        filenodes = self.document.getroot().iterchildren(self.namespaced("file"))
-        for filenode in filenodes:
-            if self.getfilename(filenode) == filename:
-                return filenode
+        filenode = self._getfilenodes().get(filename)
+        if filenode is None or self.getfilename(filenode) != filename:
+            # a file node might have been renamed without setfilename()
+            filenode = self._getfilenodes(rebuild=True).get(filename)
+        if filenode is not None:
+            return filenode
         if createifmissing:
             filenode = self.createfilenode(filename)
             return filenode
@@ -729,11 +776,19 @@ class xlifffile(lisa.LISAfile):
         if not filename:
             return super().getids()
 
-        self.id_index = {}
+        # the ids of all files are indexed at once, until units are added or
+        # removed, files are renamed or units of this file changed their id
         prefix = filename + ID_SEPARATOR
-        units = (unit for unit in self.units if unit.getid().startswith(prefix))
-        for index, unit in enumerate(units):
-            self.id_index[unit.getid()[len(prefix) :]] = unit
+        if self._fileids is None or any(
+            unit.getid() != prefix + unitid
+            for unitid, unit in self._fileids.get(filename, {}).items()
+        ):
+            self._fileids = {}
+            for unit in self.units:
+                unitfilename, separator, unitid = unit.getid().partition(ID_SEPARATOR)
+                if separator:
+                    self._fileids.setdefault(unitfilename, {})[unitid] = unit
+        self.id_index = dict(self._fileids.get(filename, {}))
         return self.id_index.keys()
 
     def setsourcelanguage(self, language):
@@ -838,6 +893,11 @@ class xlifffile(lisa.LISAfile):
             self.switchfile(filename, createifmissing=True)
             unit.setid(unitid)
         super().addunit(unit, new=new)
+        self._fileids = None
+
+    def removeunit(self, unit):
+        super().removeunit(unit)
+        self._fileids = None
 
     def addsourceunit(self, source, filename="NoName", createifmissing=False):
         """adds the given trans-unit to the last used body node if the filename
@@ -865,7 +925,10 @@ class xlifffile(lisa.LISAfile):
             if not createifmissing:
                 return False
             filenode = self.createfilenode(filename)
+            filenodes = self._getfilenodes()
             self.document.getroot().append(filenode)
+            filenodes.setdefault(filename, filenode)
+            self._filenodes_count = len(self.document.getroot())
 
         self.body = self.getbodynode(filenode, createifmissing=createifmissing)
         if self.body is None:
@@ -894,6 +957,32 @@ class xlifffile(lisa.LISAfile):
         reindent(self.document.getroot(), indent="  ", max_level=4)
         super().serialize(out)
 
+    @classmethod
+    def iterparse(cls, storefile):
+        units = super().iterparse(storefile)
+        header = next(units, None)
+        if header is None:
+            return
+        # the same check as in parsestring, with what was parsed so far
+        filenode = next(
+            header.xmlelement.getroottree()
+            .getroot()
+            .iterchildren(header.namespaced("file"))
+        )
+        datatype = ""
+        if filenode.get("original") != "NoName":
+            datatype = filenode.get("datatype")
+        if "gettext-domain-header" in (header.getrestype() or "") or datatype == "po":
+            from translate.storage import poxliff
+
+            units.close()
+            if not isinstance(storefile, str):
+                storefile.seek(0)
+            yield from poxliff.PoXliffFile.iterparse(storefile)
+            return
+        yield header
+        yield from units
+
     @classmethod
     def parsestring(cls, storestring):
         """Parses the string to return the correct file object"""
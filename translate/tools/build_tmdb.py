@@ -18,9 +18,12 @@
 
 """Import units from translations files into tmdb."""
 
+import collections
 import logging
+import multiprocessing
 import os
 from argparse import ArgumentParser
+from queue import Empty
 
 from translate.storage import factory, tmdb
 
@@ -28,11 +31,27 @@ from translate.storage import factory, tmdb
 logger = logging.getLogger(__name__)
 
 
+def parsefile(job):
+    """Puts the batches of units in a file on a queue as (batch, error)
+    tuples, for a worker process. The last tuple has no batch.
+    """
+    filename, source_lang, target_lang, queue = job
+    try:
+        units = factory.iterunits(filename)
+        for batch in tmdb.iterbatches(units, source_lang, target_lang):
+            queue.put((batch, None))
+    except Exception as e:
+        queue.put((None, str(e)))
+    else:
+        queue.put((None, None))
+
+
 class Builder:
-    def __init__(self, tmdbfile, source_lang, target_lang, filenames):
+    def __init__(self, tmdbfile, source_lang, target_lang, filenames, jobs=1):
         self.tmdb = tmdb.TMDB(tmdbfile)
         self.source_lang = source_lang
         self.target_lang = target_lang
+        self.filenames = []
 
         for filename in filenames:
             if not os.path.exists(filename):
@@ -41,29 +60,102 @@ class Builder:
             elif os.path.isdir(filename):
                 self.handledir(filename)
             else:
-                self.handlefile(filename)
-        self.tmdb.connection.commit()
+                self.filenames.append(filename)
+
+        with self.tmdb.bulk_import():
+            if jobs > 1 and len(self.filenames) > 1:
+                self.handleparallel(jobs)
+            else:
+                for filename in self.filenames:
+                    self.handlefile(filename)
 
     def handlefile(self, filename):
         try:
-            store = factory.getobject(filename)
+            # nothing is added from a file that fails to parse
+            with self.tmdb.savepoint():
+                units = factory.iterunits(filename)
+                self.tmdb.add_units(
+                    units, self.source_lang, self.target_lang, commit=False
+                )
         except Exception as e:
             logger.error(str(e))
             return
-        # do something useful with the store and db
-        try:
-            self.tmdb.add_store(store, self.source_lang, self.target_lang, commit=False)
-        except Exception as e:
-            print(e)
         print("File added:", filename)
 
+    def handleparallel(self, jobs):
+        """Parses the files in several processes, while adding the units
+        parsed so far.
+        """
+        with multiprocessing.Manager() as manager, multiprocessing.Pool(jobs) as pool:
+            filenames = iter(self.filenames)
+            pending = collections.deque()
+
+            def submit():
+                filename = next(filenames, None)
+                if filename is None:
+                    return
+                # the queues are bounded, so that a worker does not get far
+                # ahead of the file being added
+                queue = manager.Queue(4)
+                result = pool.apply_async(
+                    parsefile, ((filename, self.source_lang, self.target_lang, queue),)
+                )
+                pending.append((filename, queue, result))
+
+            for _ in range(jobs):
+                submit()
+            while pending:
+                filename, queue, result = pending.popleft()
+                try:
+                    with self.tmdb.savepoint():
+                        self.addqueued(queue, result)
+                except Exception as e:
+                    logger.error(str(e))
+                else:
+                    print("File added:", filename)
+                submit()
+
+    def addqueued(self, queue, result):
+        """Adds the batches of units a worker process puts on queue, until
+        the worker is done with its file.
+        """
+        while True:
+            batch, error = self.getqueued(queue, result)
+            if error is not None:
+                raise RuntimeError(error)
+            if batch is None:
+                return
+            source_lang, target_lang, units = batch
+            try:
+                self.tmdb.add_list(units, source_lang, target_lang, commit=False)
+            except Exception:
+                # the worker would be blocked on the bounded queue forever
+                while batch is not None:
+                    batch, error = self.getqueued(queue, result)
+                raise
+
+    @staticmethod
+    def getqueued(queue, result):
+        """Returns the next tuple a worker process puts on queue, raising the
+        error of the worker if it failed instead.
+        """
+        while True:
+            try:
+                return queue.get(timeout=1)
+            except Empty:
+                if result.ready():
+                    # raises the error of the worker, otherwise its last
+                    # tuple is already on the queue
+                    result.get()
+                    return queue.get(timeout=1)
+
     def handlefiles(self, dirname, filenames):
         for filename in filenames:
             pathname = os.path.join(dirname, filename)
             if os.path.isdir(pathname):
                 self.handledir(pathname)
             else:
-                self.handlefile(pathname)
+                self.filenames.append(pathname)
 
     def handledir(self, dirname):
         path, name = os.path.split(dirname)
@@ -96,12 +188,20 @@ def main():
         help="target language of translation files",
         required=True,
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        type=int,
+        default=1,
+        help="number of processes parsing files (default: %(default)s)",
+    )
     parser.add_argument("files", metavar="input files", nargs="+")
     args = parser.parse_args()
 
     logging.basicConfig(format="%(name)s: %(levelname)s: %(message)s")
 
-    Builder(args.tmdb_file, args.source_lang, args.target_lang, args.files)
+    Builder(args.tmdb_file, args.source_lang, args.target_lang, args.files, args.jobs)
 
 
 if __name__ == "__main__":
@@ -69,6 +69,12 @@ class ConflictOptionParser(optrecurse.RecursiveOptionParser):
         else:
             super().set_usage(usage)
 
+    def setjobsoption(self):
+        """Files are gathered into shared results, so they are always
+        processed one at a time.
+        """
+        pass
+
     def recursiveprocess(self, options):
         """recurse through directories and process files"""
         if self.isrecursive(options.input, "input") and getattr(
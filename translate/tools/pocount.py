@@ -26,6 +26,7 @@ for examples and usage instructions.
 
 
 import logging
+import multiprocessing
 import os
 import sys
 from argparse import ArgumentParser
@@ -124,6 +125,14 @@ def calcstats(filename):
     return statscache.filetotals(filename, extended=True)
 
 
+def countfile(filename):
+    """Returns the statistics of a file, for a worker process."""
+    try:
+        return filename, calcstats(filename), None
+    except Exception as e:
+        return filename, None, str(e)
+
+
 def summarize(title, stats, style=style_full, indent=8, incomplete_only=False):
     """Print summary for a .po file in specified format.
 
@@ -314,9 +323,13 @@ def untranslatedmessages(units):
 
 
 class summarizer:
-    def __init__(self, filenames, style=default_style, incomplete_only=False):
+    chunksize = 16
+    """Number of files sent to a worker process at a time"""
+
+    def __init__(self, filenames, style=default_style, incomplete_only=False, jobs=1):
         self.totals = {}
         self.filecount = 0
+        self.filenames = []
         self.longestfilename = 0
         self.style = style
         self.incomplete_only = incomplete_only
@@ -340,6 +353,11 @@ Review Messages, Review Source Words"""
             elif os.path.isdir(filename):
                 self.handledir(filename)
             else:
+                self.filenames.append(filename)
+        if jobs > 1 and len(self.filenames) > 1:
+            self.handleparallel(jobs)
+        else:
+            for filename in self.filenames:
                 self.handlefile(filename)
         if self.filecount > 1 and (self.style == style_full):
             if self.incomplete_only:
@@ -363,24 +381,42 @@ Review Messages, Review Source Words"""
                 self.totals[key] = 0
             self.totals[key] += stats[key]
 
+    def handlestats(self, filename, stats):
+        self.updatetotals(stats)
+        self.complete_count += summarize(
+            filename, stats, self.style, self.longestfilename, self.incomplete_only
+        )
+        self.filecount += 1
+
     def handlefile(self, filename):
         try:
-            stats = calcstats(filename)
-            self.updatetotals(stats)
-            self.complete_count += summarize(
-                filename, stats, self.style, self.longestfilename, self.incomplete_only
-            )
-            self.filecount += 1
+            self.handlestats(filename, calcstats(filename))
         except Exception:  # This happens if we have a broken file.
             logger.error(sys.exc_info()[1])
 
+    def handleparallel(self, jobs):
+        """Counts the files in several processes, reporting them in order so
+        that the output and the totals are the same as when counting serially.
+        """
+        with multiprocessing.Pool(jobs) as pool:
+            for filename, stats, error in pool.imap(
+                countfile, self.filenames, self.chunksize
+            ):
+                if error is not None:
+                    logger.error(error)
+                    continue
+                try:
+                    self.handlestats(filename, stats)
+                except Exception:
+                    logger.error(sys.exc_info()[1])
+
     def handlefiles(self, dirname, filenames):
         for filename in filenames:
             pathname = os.path.join(dirname, filename)
             if os.path.isdir(pathname):
                 self.handledir(pathname)
             else:
-                self.handlefile(pathname)
+                self.filenames.append(pathname)
 
     def handledir(self, dirname):
         path, name = os.path.split(dirname)
@@ -440,6 +476,14 @@ def main():
     output_group.add_argument(
         "--no-color", action="store_true", help="show output without color"
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        type=int,
+        default=1,
+        help="number of processes counting files (default: %(default)s)",
+    )
 
     parser.add_argument("files", nargs="+")
 
@@ -448,7 +492,7 @@ def main():
     logging.basicConfig(format="%(name)s: %(levelname)s: %(message)s")
     ConsoleColor.color_mode = not args.no_color
 
-    summarizer(args.files, args.style, args.incomplete_only)
+    summarizer(args.files, args.style, args.incomplete_only, args.jobs)
 
 
 if __name__ == "__main__":
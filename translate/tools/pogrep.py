@@ -32,7 +32,7 @@ import re
 from translate.lang import data
 from translate.misc import optrecurse
 from translate.misc.multistring import multistring
-from translate.storage import factory
+from translate.storage import factory, pypo
 from translate.storage.poheader import poheader
 
 
@@ -247,6 +247,29 @@ class GrepFilter:
             thenewfile.updateheader(add=True, **thefile.parseheader())
         return thenewfile
 
+    def filterunits(self, units, out):
+        """runs filters on PO units one at a time, writing the matching ones
+        to out as they are found.
+
+        Returns whether any translatable unit was written.
+        """
+        writer = None
+        found = False
+        for unit in units:
+            if unit.isheader() or not self.filterunit(unit):
+                continue
+            if writer is None:
+                thefile = unit._store
+                thenewfile = type(thefile)()
+                thenewfile.setsourcelanguage(thefile.sourcelanguage)
+                thenewfile.settargetlanguage(thefile.targetlanguage)
+                thenewfile.updateheader(add=True, **thefile.parseheader())
+                writer = pypo.powriter(out, thenewfile.encoding)
+                writer.addunit(thenewfile.header())
+            writer.addunit(unit)
+            found = found or unit.istranslatable()
+        return found
+
     def getmatches(self, units):
         if not self.searchstring:
             return [], []
@@ -360,6 +383,8 @@ class GrepOptionParser(optrecurse.RecursiveOptionParser):
 
 def rungrep(inputfile, outputfile, templatefile, checkfilter):
     """reads in inputfile, filters using checkfilter, writes to outputfile"""
+    if issubclass(factory.getclass(inputfile), pypo.pofile):
+        return checkfilter.filterunits(factory.iterunits(inputfile), outputfile)
     fromfile = factory.getobject(inputfile)
     tofile = checkfilter.filterfile(fromfile)
     if tofile.isempty():
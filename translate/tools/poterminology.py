@@ -465,6 +465,12 @@ class TerminologyOptionParser(optrecurse.RecursiveOptionParser):
         )
         self.recursiveprocess(options)
 
+    def setjobsoption(self):
+        """Files are gathered into shared results, so they are always
+        processed one at a time.
+        """
+        pass
+
     def recursiveprocess(self, options):
         """recurse through directories and process files"""
         if self.isrecursive(options.input, "input") and getattr(
@@ -504,8 +510,7 @@ class TerminologyOptionParser(optrecurse.RecursiveOptionParser):
     def processfile(self, fileprocessor, options, fullinputpath):
         """process an individual file"""
         inputfile = self.openinputfile(options, fullinputpath)
-        inputfile = factory.getobject(inputfile)
-        self.extractor.processunits(inputfile.units, fullinputpath)
+        self.extractor.processunits(factory.iterunits(inputfile), fullinputpath)
 
     def outputterminology(self, options):
         """saves the generated terminology glossary"""
@@ -45,10 +45,20 @@ def memory(tmfiles, max_candidates=1, min_similarity=75, max_length=1000):
             max_candidates=max_candidates,
             min_similarity=min_similarity,
             max_length=max_length,
+            useindex=True,
         )
     return tmmatcher
 
 
+def preload_memory(tm=None, min_similarity=75, fuzzymatching=True, **kwargs):
+    """Initialises the TM before any file is processed, so that parallel
+    jobs share it instead of each loading their own copy.
+    """
+    if tm and fuzzymatching:
+        # FIXME: max_length hardcoded
+        memory(tm, max_candidates=1, min_similarity=min_similarity, max_length=1000)
+
+
 def pretranslate_file(
     input_file,
     output_file,
@@ -240,6 +250,7 @@ def main(argv=None):
         help="The file to use as translation memory when fuzzy matching",
     )
     parser.passthrough.append("tm")
+    parser.digestfiles.append("tm")
     defaultsimilarity = 75
     parser.add_option(
         "-s",
@@ -258,6 +269,7 @@ def main(argv=None):
         help="Disable fuzzy matching",
     )
     parser.passthrough.append("fuzzymatching")
+    parser.preparejobs = preload_memory
     parser.run(argv)
 
 
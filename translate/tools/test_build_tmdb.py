@@ -0,0 +1,99 @@
+import functools
+import os
+
+from translate.storage import tmdb
+from translate.tools import build_tmdb
+
+
+def failingparsefile(job):
+    raise ValueError("worker failed")
+
+
+class TestBuildTMDB:
+    def setup_method(self, method):
+        self.testdir = "%s_%s" % (self.__class__.__name__, method.__name__)
+        self.tmdbfile = self.testdir + ".db"
+        self.cleardir()
+        os.mkdir(self.testdir)
+        for number in range(3):
+            with open(os.path.join(self.testdir, "file%d.po" % number), "w") as pofile:
+                pofile.write(
+                    'msgid "Open file %d"\nmsgstr "Maak lêer %d oop"\n\n'
+                    'msgid "Untranslated"\nmsgstr ""\n' % (number, number)
+                )
+
+    def teardown_method(self, method):
+        tmdb.TMDB._tm_dbs.pop(self.tmdbfile, None)
+        tmdb.TMDB._tm_caches.pop(self.tmdbfile, None)
+        self.cleardir()
+
+    def cleardir(self):
+        if os.path.exists(self.testdir):
+            for filename in os.listdir(self.testdir):
+                os.remove(os.path.join(self.testdir, filename))
+            os.rmdir(self.testdir)
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.tmdbfile + suffix):
+                os.remove(self.tmdbfile + suffix)
+
+    def check_tmdb(self, builder):
+        assert builder.tmdb.get_stats()["targets"] == 3
+        results = builder.tmdb.translate_unit("Open file 1", "en", "af")
+        assert results[0]["target"] == "Maak lêer 1 oop"
+        builder.tmdb.connection.close()
+
+    def test_build(self):
+        builder = build_tmdb.Builder(self.tmdbfile, "en", "af", [self.testdir])
+        self.check_tmdb(builder)
+
+    def test_build_parallel(self):
+        builder = build_tmdb.Builder(self.tmdbfile, "en", "af", [self.testdir], jobs=2)
+        self.check_tmdb(builder)
+
+    def add_broken_file(self):
+        # the error comes after the first batch of units was added
+        with open(os.path.join(self.testdir, "broken.po"), "w") as pofile:
+            for number in range(1001):
+                pofile.write(
+                    'msgid "Save %d"\nmsgstr "Stoor %d"\n\n' % (number, number)
+                )
+            pofile.write("msgid broken\n")
+
+    def test_build_parse_error(self):
+        self.add_broken_file()
+        builder = build_tmdb.Builder(self.tmdbfile, "en", "af", [self.testdir])
+        self.check_tmdb(builder)
+
+    def test_build_parallel_parse_error(self):
+        self.add_broken_file()
+        builder = build_tmdb.Builder(self.tmdbfile, "en", "af", [self.testdir], jobs=2)
+        self.check_tmdb(builder)
+
+    def test_build_parallel_worker_error(self, monkeypatch):
+        monkeypatch.setattr(build_tmdb, "parsefile", failingparsefile)
+        builder = build_tmdb.Builder(self.tmdbfile, "en", "af", [self.testdir], jobs=2)
+        assert builder.tmdb.get_stats()["targets"] == 0
+        builder.tmdb.connection.close()
+
+    def test_build_parallel_add_error(self, monkeypatch):
+        # the workers are blocked on their queues when adding the first
+        # batch of their files fails
+        for name in ("failing1.po", "failing2.po"):
+            with open(os.path.join(self.testdir, name), "w") as pofile:
+                for number in range(10):
+                    pofile.write(
+                        'msgid "Save %d"\nmsgstr "Stoor %d"\n\n' % (number, number)
+                    )
+        monkeypatch.setattr(
+            tmdb, "iterbatches", functools.partial(tmdb.iterbatches, batchsize=1)
+        )
+        add_list = tmdb.TMDB.add_list
+
+        def failing_add_list(db, units, *args, **kwargs):
+            if units[0]["source"].startswith("Save"):
+                raise ValueError("cannot add")
+            return add_list(db, units, *args, **kwargs)
+
+        monkeypatch.setattr(tmdb.TMDB, "add_list", failing_add_list)
+        builder = build_tmdb.Builder(self.tmdbfile, "en", "af", [self.testdir], jobs=2)
+        self.check_tmdb(builder)
@@ -52,6 +52,9 @@ class TestCount:
         self.count("<p>A word</p>\n<p>Another word</p>", 4)
         # Not really an XML tag
         self.count("<no label>", 2)
+        # Tags are removed before looking for the dots between words
+        self.count("One<br>.Two", 2)
+        self.count("One<b>.</b>Two", 2)
 
     def test_newlines(self):
         """test to see that newlines divide words"""
@@ -162,3 +165,30 @@ msgstr ""
         pofile = BytesIO(self.inputdata)
         stats = pocount.calcstats_old(pofile)
         assert stats["totalsourcewords"] == 6
+
+    def test_calcstats(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(
+            statsdb.StatsCache, "defaultfile", str(tmp_path / "stats.db")
+        )
+        pofile = tmp_path / "test.po"
+        pofile.write_bytes(self.inputdata)
+        stats = pocount.calcstats(str(pofile))
+        old_stats = pocount.calcstats_old(str(pofile))
+        for key in stats.keys():
+            if key != "extended":
+                assert stats[key] == old_stats[key]
+
+    def test_parallel(self, tmp_path, monkeypatch, capsys):
+        monkeypatch.setattr(
+            statsdb.StatsCache, "defaultfile", str(tmp_path / "stats.db")
+        )
+        monkeypatch.setattr(pocount.summarizer, "chunksize", 1)
+        for i in range(4):
+            (tmp_path / ("test%d.po" % i)).write_bytes(self.inputdata * (i + 1))
+        (tmp_path / "unknown.xyz").write_bytes(self.inputdata)
+        filenames = sorted(str(path) for path in tmp_path.glob("*.*"))
+        pocount.summarizer(filenames, pocount.style_csv)
+        serial = capsys.readouterr().out
+        pocount.summarizer(filenames, pocount.style_csv, jobs=2)
+        assert capsys.readouterr().out == serial
+        assert serial.count(".po,") == 4
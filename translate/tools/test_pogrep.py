@@ -141,6 +141,44 @@ class TestPOGrep:
                     poresult = self.pogrep(source, search_letter)
                     assert poresult.index(source.encode("utf-8")) >= 0
 
+    def test_filterunits(self):
+        """check that the matching units can be streamed to the output"""
+        posource = r"""msgid ""
+msgstr ""
+"Project-Id-Version: demo\n"
+"POT-Creation-Date: 2005-01-01 00:00+0200\n"
+"PO-Revision-Date: 2005-01-01 00:00+0200\n"
+"Last-Translator: Ann <ann@example.com>\n"
+"Language-Team: Afrikaans\n"
+"Language: af\n"
+"MIME-Version: 1.0\n"
+"Content-Type: text/plain; charset=UTF-8\n"
+"Content-Transfer-Encoding: 8bit\n"
+
+#: test.c
+msgid "test"
+msgstr "toets"
+
+#: other.c
+msgid "other"
+msgstr "ander"
+"""
+        options, args = pogrep.cmdlineparser().parse_args(["xxx.po"])
+        grepfilter = pogrep.GrepFilter("test", options.searchparts)
+        out = BytesIO()
+        units = po.pofile.iterparse(BytesIO(posource.encode()))
+        assert grepfilter.filterunits(units, out)
+        result = po.pofile(out.getvalue())
+        assert len(result.units) == 2
+        assert result.parseheader()["Project-Id-Version"] == "demo"
+        assert result.gettargetlanguage() == "af"
+        assert result.units[1].source == "test"
+        grepfilter = pogrep.GrepFilter("missing", options.searchparts)
+        out = BytesIO()
+        units = po.pofile.iterparse(BytesIO(posource.encode()))
+        assert not grepfilter.filterunits(units, out)
+        assert out.getvalue() == b""
+
 
 class TestXLiffGrep:
     xliff_skeleton = """<?xml version="1.0" ?>